@@ -0,0 +1,481 @@
+"""
+Prueba de carga de la API con resultados en JSON.
+
+Carga datos de prueba en la base indicada, levanta main:app con uvicorn en un
+proceso aparte y ejecuta los escenarios con cada nivel de concurrencia:
+
+- mixto: recarga del roster de los profesores (/asignaciones/profesor), listado
+  del administrador (/asignaciones/all), asignaciones de los estudiantes, logins
+  y CRUD de /estudiantes. /create/ no devuelve el id, así que las lecturas y
+  actualizaciones usan los estudiantes sembrados y los borrados consumen una
+  reserva de estudiantes sembrados para eso (baja*@carga.bench)
+- login: ráfaga de logins (solo POST /login/, limitado por el servicio de contraseñas)
+
+Por escenario y concurrencia informa peticiones por segundo y p50/p95/p99 por
+endpoint. Los datos de prueba usan correos @carga.bench y se reemplazan en cada
+ejecución; el resto de la base no se toca, aunque conviene usar una base propia
+(con el esquema y `python migrate.py` aplicados). Requiere httpx.
+
+Uso:
+    python -m benchmarks.load run --dsn postgresql://.../escuela_carga --salida antes.json
+    python -m benchmarks.load run --modo async --concurrencia 1,8,32 --duracion 20
+    python -m benchmarks.load compare antes.json despues.json --tolerancia 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import bcrypt
+import httpx
+import psycopg2
+from config import Config
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DOMINIO = "carga.bench"
+PASSWORD = "carga-123456"
+HASH_COST_CARGA = 10  # costo de bcrypt fijo: el mismo en la carga y en el servidor
+
+# Pesos de las operaciones del escenario mixto
+MEZCLA = {"profesor": 40, "all": 10, "estudiante": 25, "login": 5,
+          "crear": 5, "leer": 5, "actualizar": 5, "borrar": 5}
+
+SQL_LIMPIAR = """
+    DELETE FROM asignacion WHERE estudiante_id IN (SELECT id FROM estudiantes WHERE correo LIKE %(patron)s);
+    DELETE FROM estudios WHERE profesor_id IN (SELECT id FROM profesores WHERE correo LIKE %(patron)s);
+    DELETE FROM estudiantes WHERE correo LIKE %(patron)s;
+    DELETE FROM profesores WHERE correo LIKE %(patron)s;
+    DELETE FROM usuarios WHERE correo LIKE %(patron)s;
+"""
+
+SQL_SEMBRAR = """
+    INSERT INTO usuarios (nombre, apellido, correo, contrasena, rol_id)
+    SELECT 'Admin', 'Carga', 'admin@' || %(dominio)s, %(hash)s, 3
+    UNION ALL
+    SELECT 'Profesor' || n, 'Carga', 'profesor' || n || '@' || %(dominio)s, %(hash)s, 1
+    FROM generate_series(1, %(profesores)s) n
+    UNION ALL
+    SELECT 'Estudiante' || n, 'Carga', 'estudiante' || n || '@' || %(dominio)s, %(hash)s, 2
+    FROM generate_series(1, %(estudiantes)s) n;
+
+    INSERT INTO profesores (nombre, apellido, correo, especialidad, usuario_id)
+    SELECT nombre, apellido, correo, 'Carga', id FROM usuarios
+    WHERE rol_id = 1 AND correo LIKE %(patron)s ORDER BY id;
+
+    INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion, usuario_id)
+    SELECT nombre, apellido, correo, 15 + id %% 10, 'Calle ' || id, id FROM usuarios
+    WHERE rol_id = 2 AND correo LIKE %(patron)s ORDER BY id;
+
+    -- Reserva para los DELETE del escenario mixto
+    INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion)
+    SELECT 'Baja' || n, 'Carga', 'baja' || n || '@' || %(dominio)s, 20, 'Calle ' || n
+    FROM generate_series(1, %(estudiantes)s) n;
+
+    -- Materias repartidas entre los profesores en orden
+    INSERT INTO estudios (nombre, descripcion, profesor_id)
+    SELECT 'Materia ' || n, 'Materia de carga ' || n, p.id
+    FROM generate_series(1, %(materias)s) n
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS i FROM profesores WHERE correo LIKE %(patron)s) p
+      ON p.i = (n - 1) %% %(profesores)s;
+
+    -- Cada estudiante en `inscripciones` materias distintas, siempre las mismas
+    WITH e AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS i FROM estudiantes WHERE correo LIKE %(patron)s),
+         m AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS i FROM estudios
+               WHERE profesor_id IN (SELECT id FROM profesores WHERE correo LIKE %(patron)s))
+    INSERT INTO asignacion (estudiante_id, estudio_id, fecha_inscripcion)
+    SELECT e.id, m.id, CURRENT_DATE
+    FROM e CROSS JOIN generate_series(0, %(inscripciones)s - 1) j
+    JOIN m ON m.i = (e.i + j * GREATEST(%(materias)s / %(inscripciones)s, 1)) %% %(materias)s
+    ON CONFLICT DO NOTHING;
+"""
+
+
+SQL_ESTUDIANTES = """
+    SELECT id, nombre, apellido, correo, edad, direccion FROM estudiantes
+    WHERE correo LIKE 'estudiante%%' || %(patron)s ORDER BY id
+"""
+
+SQL_RESERVA = "SELECT id FROM estudiantes WHERE correo LIKE 'baja%%' || %(patron)s ORDER BY id"
+
+
+def sembrar(dsn, profesores, estudiantes, materias, inscripciones):
+    """Reemplaza los datos de carga anteriores; devuelve el tiempo empleado"""
+    inicio = time.perf_counter()
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=HASH_COST_CARGA)).decode("utf-8")
+    params = {
+        "dominio": DOMINIO, "patron": f"%@{DOMINIO}", "hash": hashed,
+        "profesores": profesores, "estudiantes": estudiantes,
+        "materias": materias, "inscripciones": min(inscripciones, materias),
+    }
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SQL_LIMPIAR, params)
+            cur.execute(SQL_SEMBRAR, params)
+            cur.execute("ANALYZE usuarios, profesores, estudiantes, estudios, asignacion")
+        conn.commit()
+    finally:
+        conn.close()
+    return time.perf_counter() - inicio
+
+
+# --- Servidor ---
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def leer_estudiantes(dsn):
+    """Estudiantes sembrados (para leer y actualizar) y reserva de ids para borrar"""
+    params = {"patron": f"%@{DOMINIO}"}
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SQL_ESTUDIANTES, params)
+            columnas = [c.name for c in cur.description]
+            estudiantes = [dict(zip(columnas, fila)) for fila in cur.fetchall()]
+            cur.execute(SQL_RESERVA, params)
+            reserva = [fila[0] for fila in cur.fetchall()]
+        conn.rollback()
+    finally:
+        conn.close()
+    return estudiantes, reserva
+
+
+def levantar_servidor(dsn, modo, workers, log=None):
+    """Inicia uvicorn con main:app y espera a que /health responda (su salida va a `log`)"""
+    puerto = _puerto_libre()
+    env = {
+        **os.environ,
+        "DATABASE_URI": dsn,
+        "DB_MODE": modo,
+        "HASH_SCHEME": "bcrypt",
+        "HASH_COST": str(HASH_COST_CARGA),
+        "DEBUG": "False",
+    }
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(puerto),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=APP_DIR, env=env, stdout=log or subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al iniciar (código {proceso.returncode})")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return proceso, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError("El servidor no respondió /health a tiempo")
+
+
+def detener_servidor(proceso):
+    proceso.terminate()
+    try:
+        proceso.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+
+
+# --- Carga ---
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+class Registro:
+    """Latencias y errores por endpoint de una ejecución"""
+
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self.cache_hits = {}
+
+    def anotar(self, endpoint, segundos, respuesta):
+        self.latencias.setdefault(endpoint, []).append(segundos)
+        if respuesta is None or respuesta.status_code >= 400:
+            self.errores[endpoint] = self.errores.get(endpoint, 0) + 1
+        elif respuesta.headers.get("x-cache") == "HIT":
+            self.cache_hits[endpoint] = self.cache_hits.get(endpoint, 0) + 1
+
+    def resumen(self, duracion):
+        endpoints = {}
+        for endpoint, tiempos in sorted(self.latencias.items()):
+            ordenados = sorted(t * 1000 for t in tiempos)
+            endpoints[endpoint] = {
+                "peticiones": len(ordenados),
+                "errores": self.errores.get(endpoint, 0),
+                "cache_hits": self.cache_hits.get(endpoint, 0),
+                "rps": round(len(ordenados) / duracion, 2),
+                "p50_ms": round(percentil(ordenados, 50), 3),
+                "p95_ms": round(percentil(ordenados, 95), 3),
+                "p99_ms": round(percentil(ordenados, 99), 3),
+                "max_ms": round(ordenados[-1], 3),
+            }
+        total = sum(e["peticiones"] for e in endpoints.values())
+        return {
+            "peticiones": total,
+            "errores": sum(e["errores"] for e in endpoints.values()),
+            "rps": round(total / duracion, 2),
+            "endpoints": endpoints,
+        }
+
+
+class Datos:
+    """Lo que comparten los usuarios virtuales: sesiones, estudiantes sembrados y reserva para borrar"""
+
+    def __init__(self, sesiones, estudiantes, reserva, profesores):
+        self.ejecucion = secrets.token_hex(4)  # distingue los correos nuevos de ejecuciones con --sin-datos
+        self.sesiones = sesiones
+        self.estudiantes = estudiantes
+        self.reserva = reserva
+        self.profesores = profesores
+
+
+class Usuario:
+    """Un usuario virtual: elige operaciones del escenario con su propio generador aleatorio"""
+
+    def __init__(self, client, registro, datos, semilla):
+        self.client = client
+        self.registro = registro
+        self.datos = datos
+        self.random = random.Random(semilla)
+
+    async def pedir(self, endpoint, method, path, token=None, **kwargs):
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.client.request(method, path, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            respuesta = None
+        if self.registro is not None:
+            self.registro.anotar(endpoint, time.perf_counter() - inicio, respuesta)
+        return respuesta
+
+    async def login(self):
+        if self.random.random() < 0.5:
+            correo = f"profesor{self.random.randint(1, self.datos.profesores)}@{DOMINIO}"
+        else:
+            correo = self.random.choice(self.datos.estudiantes)["correo"]
+        await self.pedir("POST /login/", "POST", "/login/", data={"username": correo, "password": PASSWORD})
+
+    async def profesor(self):
+        await self.pedir("GET /asignaciones/profesor", "GET", "/asignaciones/profesor",
+                         self.random.choice(self.datos.sesiones["profesor"]))
+
+    async def all(self):
+        await self.pedir("GET /asignaciones/all", "GET", "/asignaciones/all", self.datos.sesiones["admin"])
+
+    async def estudiante(self):
+        await self.pedir("GET /asignaciones/estudiante", "GET", "/asignaciones/estudiante",
+                         self.random.choice(self.datos.sesiones["estudiante"]))
+
+    async def crear(self):
+        datos = {"nombre": "Nuevo", "apellido": "Carga", "correo": f"nuevo{self.datos.ejecucion}.{self.random.getrandbits(48)}@{DOMINIO}",
+                 "edad": 20, "direccion": "Calle 1"}
+        await self.pedir("POST /estudiantes/create/", "POST", "/estudiantes/create/", self.datos.sesiones["admin"], json=datos)
+
+    async def leer(self):
+        id = self.random.choice(self.datos.estudiantes)["id"]
+        await self.pedir("GET /estudiantes/{id}", "GET", f"/estudiantes/{id}", self.datos.sesiones["admin"])
+
+    async def actualizar(self):
+        estudiante = dict(self.random.choice(self.datos.estudiantes))
+        id = estudiante.pop("id")
+        estudiante["edad"] = 15 + self.random.randint(0, 9)
+        await self.pedir("PUT /estudiantes/update/{id}", "PUT", f"/estudiantes/update/{id}",
+                         self.datos.sesiones["admin"], json=estudiante)
+
+    async def borrar(self):
+        if not self.datos.reserva:
+            return await self.crear()  # reserva agotada: se mantiene el peso de las escrituras
+        id = self.datos.reserva.pop()
+        await self.pedir("DELETE /estudiantes/delete/{id}", "DELETE", f"/estudiantes/delete/{id}",
+                         self.datos.sesiones["admin"])
+
+    async def correr(self, escenario, hasta):
+        operaciones = list(MEZCLA) if escenario == "mixto" else ["login"]
+        pesos = [MEZCLA[o] for o in operaciones]
+        while time.monotonic() < hasta:
+            operacion = self.random.choices(operaciones, pesos)[0]
+            await getattr(self, operacion)()
+
+
+async def iniciar_sesiones(client, profesores, estudiantes, cuantas):
+    """Tokens del administrador y de una muestra de profesores y estudiantes"""
+    async def token(correo):
+        respuesta = await client.post("/login/", data={"username": correo, "password": PASSWORD})
+        respuesta.raise_for_status()
+        return respuesta.json()["access_token"]
+
+    admin = await token(f"admin@{DOMINIO}")
+    profesor = await asyncio.gather(*(token(f"profesor{i}@{DOMINIO}") for i in range(1, min(cuantas, profesores) + 1)))
+    estudiante = await asyncio.gather(*(token(e["correo"]) for e in estudiantes[:cuantas]))
+    return {"admin": admin, "profesor": list(profesor), "estudiante": list(estudiante)}
+
+
+async def ejecutar(url, args):
+    limites = httpx.Limits(max_connections=max(args.concurrencia), max_keepalive_connections=max(args.concurrencia))
+    resultados = []
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as client:
+        estudiantes, reserva = leer_estudiantes(args.dsn)
+        sesiones = await iniciar_sesiones(client, args.profesores, estudiantes, args.sesiones)
+        datos = Datos(sesiones, estudiantes, reserva, args.profesores)
+        for escenario in args.escenarios:
+            for concurrencia in args.concurrencia:
+                registro = Registro()
+                # Calentamiento sin registrar (conexiones del pool, cachés, planes)
+                for fase, duracion in (("calentamiento", args.calentamiento), ("medicion", args.duracion)):
+                    hasta = time.monotonic() + duracion
+                    usuarios = [
+                        Usuario(client, registro if fase == "medicion" else None, datos,
+                                semilla=f"{args.semilla}-{escenario}-{concurrencia}-{fase}-{i}")
+                        for i in range(concurrencia)
+                    ]
+                    inicio = time.monotonic()
+                    await asyncio.gather(*(u.correr(escenario, hasta) for u in usuarios))
+                    transcurrido = time.monotonic() - inicio
+                resumen = registro.resumen(transcurrido)
+                resultados.append({"escenario": escenario, "concurrencia": concurrencia,
+                                   "duracion_s": round(transcurrido, 3), **resumen})
+                print(f"{escenario:>6} c={concurrencia:<4} {resumen['rps']:9.1f} pet/s  "
+                      f"{resumen['peticiones']} peticiones, {resumen['errores']} errores", file=sys.stderr)
+    return resultados
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    meta = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "cpus": os.cpu_count(),
+        "modo": args.modo,
+        "workers": args.workers,
+        "escala": {"profesores": args.profesores, "estudiantes": args.estudiantes,
+                   "materias": args.materias, "inscripciones": args.inscripciones},
+        "mezcla": MEZCLA,
+        "duracion_s": args.duracion,
+        "semilla": args.semilla,
+    }
+    if not args.sin_datos:
+        meta["siembra_s"] = round(sembrar(args.dsn, args.profesores, args.estudiantes, args.materias, args.inscripciones), 3)
+        print(f"Datos de carga listos en {meta['siembra_s']} s", file=sys.stderr)
+
+    log = open(args.log_servidor, "w", encoding="utf-8") if args.log_servidor else None
+    try:
+        proceso, url = (None, args.url) if args.url else levantar_servidor(args.dsn, args.modo, args.workers, log)
+        try:
+            resultados = asyncio.run(ejecutar(url, args))
+        finally:
+            if proceso is not None:
+                detener_servidor(proceso)
+    finally:
+        if log is not None:
+            log.close()
+
+    salida = json.dumps({"meta": meta, "resultados": resultados}, ensure_ascii=False, indent=2)
+    if args.salida:
+        Path(args.salida).write_text(salida + "\n", encoding="utf-8")
+    else:
+        print(salida)
+    return 1 if any(r["errores"] for r in resultados) else 0
+
+
+def compare(args):
+    """Compara el p95 y las peticiones por segundo de dos ejecuciones (código 1 si hay regresiones)"""
+    def cargar(ruta):
+        datos = json.loads(Path(ruta).read_text(encoding="utf-8"))
+        return {(r["escenario"], r["concurrencia"], endpoint): e
+                for r in datos["resultados"] for endpoint, e in r["endpoints"].items()}
+
+    antes, despues = cargar(args.antes), cargar(args.despues)
+    regresiones = 0
+    for clave in sorted(antes.keys() & despues.keys()):
+        a, d = antes[clave], despues[clave]
+        cambio_p95 = (d["p95_ms"] - a["p95_ms"]) / a["p95_ms"] * 100 if a["p95_ms"] else 0.0
+        cambio_rps = (d["rps"] - a["rps"]) / a["rps"] * 100 if a["rps"] else 0.0
+        regresion = cambio_p95 > args.tolerancia
+        regresiones += regresion
+        escenario, concurrencia, endpoint = clave
+        print(f"{'REGRESIÓN' if regresion else '':>9} {escenario:>6} c={concurrencia:<4} {endpoint:<34} "
+              f"p95 {a['p95_ms']:9.2f} -> {d['p95_ms']:9.2f} ms ({cambio_p95:+6.1f}%)  "
+              f"rps {a['rps']:8.1f} -> {d['rps']:8.1f} ({cambio_rps:+6.1f}%)")
+    if regresiones:
+        print(f"\n{regresiones} endpoint(s) con el p95 más de {args.tolerancia}% por encima")
+        return 1
+    return 0
+
+
+def _lista_enteros(valor):
+    return [int(v) for v in valor.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API con resultados en JSON")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    correr = comandos.add_parser("run", help="Sembrar datos, levantar la API y medir")
+    correr.add_argument("--dsn", default=Config.DATABASE_URI, help="Base de datos de la prueba (por defecto DATABASE_URI)")
+    correr.add_argument("--url", help="Usar una API ya levantada en lugar de iniciar uvicorn")
+    correr.add_argument("--modo", choices=["sync", "async"], default=Config.DB_MODE)
+    correr.add_argument("--workers", type=int, default=1, help="Procesos de uvicorn")
+    correr.add_argument("--profesores", type=int, default=50)
+    correr.add_argument("--estudiantes", type=int, default=2000)
+    correr.add_argument("--materias", type=int, default=200)
+    correr.add_argument("--inscripciones", type=int, default=5, help="Materias por estudiante")
+    correr.add_argument("--sin-datos", action="store_true", help="No volver a sembrar los datos de carga")
+    correr.add_argument("--escenarios", type=lambda v: v.split(","), default=["mixto", "login"])
+    correr.add_argument("--concurrencia", type=_lista_enteros, default=[1, 8, 32], help="Niveles, p. ej. 1,8,32")
+    correr.add_argument("--duracion", type=float, default=10, help="Segundos medidos por nivel")
+    correr.add_argument("--calentamiento", type=float, default=2, help="Segundos sin medir antes de cada nivel")
+    correr.add_argument("--sesiones", type=int, default=20, help="Profesores y estudiantes con sesión iniciada")
+    correr.add_argument("--semilla", type=int, default=1)
+    correr.add_argument("--salida", help="Archivo JSON de resultados (por defecto la salida estándar)")
+    correr.add_argument("--log-servidor", help="Archivo para la salida de uvicorn (por defecto se descarta)")
+
+    comparar = comandos.add_parser("compare", help="Comparar dos archivos de resultados")
+    comparar.add_argument("antes")
+    comparar.add_argument("despues")
+    comparar.add_argument("--tolerancia", type=float, default=10, help="Aumento del p95 permitido, en %%")
+
+    args = parser.parse_args(argv)
+    if args.comando == "compare":
+        return compare(args)
+    if set(args.escenarios) - {"mixto", "login"}:
+        parser.error("escenarios válidos: mixto, login")
+    if args.workers > 1 and not args.url and not Config.TABLE_VERSIONS_LISTEN:
+        # Sin versiones compartidas cada worker tendría sus propios ETag y caché de respuestas
+        parser.error("--workers > 1 requiere TABLE_VERSIONS_LISTEN=True (y la migración 006 aplicada)")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
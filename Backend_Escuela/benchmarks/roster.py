@@ -0,0 +1,171 @@
+"""
+Compara las formas de armar la respuesta de /asignaciones/profesor.
+
+- python: JOIN plano materia x estudiante, reagrupado en un dict por fila y
+  serializado con json.dumps (la primera implementación del endpoint)
+- sql: el documento completo armado en Postgres con json_agg en cada petición
+- roster: documentos por materia precalculados en roster_profesor (la actual)
+
+Los datos de prueba (un profesor con N materias y M estudiantes inscritos en
+todas) se crean dentro de una transacción que se revierte al terminar, así que
+la base no queda modificada.
+
+Uso:
+    python -m benchmarks.roster [--materias 50] [--estudiantes 500] [--repeticiones 20]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from config import Config
+from routers.asignacion import SQL_ASIGNACIONES_PROFESOR, FILTRO_POR_ID
+
+SQL_PLANO = """
+    SELECT
+        es.id AS materia_id, es.nombre AS materia_nombre, es.descripcion AS materia_descripcion,
+        a.fecha_inscripcion,
+        e.id AS estudiante_id, e.nombre AS estudiante_nombre, e.apellido AS estudiante_apellido,
+        e.correo AS estudiante_correo, e.edad AS estudiante_edad
+    FROM estudios es
+    LEFT JOIN asignacion a ON es.id = a.estudio_id
+    LEFT JOIN estudiantes e ON a.estudiante_id = e.id
+    WHERE es.profesor_id = %s
+    ORDER BY es.nombre, e.nombre
+"""
+
+SQL_JSON_AGG = """
+    SELECT json_build_object(
+        'profesor', json_build_object(
+            'id', p.id, 'nombre', p.nombre, 'apellido', p.apellido, 'especialidad', p.especialidad
+        ),
+        'materias', COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', es.id,
+                'nombre', es.nombre,
+                'descripcion', es.descripcion,
+                'estudiantes', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'id', e.id, 'nombre', e.nombre, 'apellido', e.apellido,
+                        'correo', e.correo, 'edad', e.edad,
+                        'fecha_inscripcion', a.fecha_inscripcion::text
+                    ) ORDER BY e.nombre)
+                    FROM asignacion a
+                    JOIN estudiantes e ON a.estudiante_id = e.id
+                    WHERE a.estudio_id = es.id
+                ), '[]'::json)
+            ) ORDER BY es.nombre)
+            FROM estudios es
+            WHERE es.profesor_id = p.id
+        ), '[]'::json)
+    )::text AS documento
+    FROM profesores p
+    WHERE {filtro}
+"""
+
+
+def poblar(cur, materias, estudiantes):
+    """Crea el profesor, sus materias y las inscripciones; devuelve el id del profesor"""
+    cur.execute("""
+        INSERT INTO profesores (nombre, apellido, correo, especialidad)
+        VALUES ('Bench', 'Roster', 'bench.roster@escuela.test', 'Benchmark')
+        RETURNING id
+    """)
+    profesor_id = cur.fetchone()["id"]
+    cur.execute("""
+        INSERT INTO estudios (nombre, descripcion, profesor_id)
+        SELECT 'Materia ' || lpad(n::text, 4, '0'), 'Materia de prueba ' || n, %s
+        FROM generate_series(1, %s) n
+    """, (profesor_id, materias))
+    cur.execute("""
+        INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion)
+        SELECT 'Estudiante ' || lpad(n::text, 5, '0'), 'Bench', 'bench.est' || n || '@escuela.test',
+               18 + n %% 10, 'Calle ' || n
+        FROM generate_series(1, %s) n
+    """, (estudiantes,))
+    cur.execute("""
+        INSERT INTO asignacion (estudiante_id, estudio_id, fecha_inscripcion)
+        SELECT e.id, es.id, CURRENT_DATE
+        FROM estudiantes e CROSS JOIN estudios es
+        WHERE e.correo LIKE 'bench.est%%@escuela.test' AND es.profesor_id = %s
+    """, (profesor_id,))
+    cur.execute("ANALYZE estudios; ANALYZE estudiantes; ANALYZE asignacion")
+    return profesor_id
+
+
+def respuesta_python(cur, profesor_id):
+    cur.execute("SELECT id, nombre, apellido, especialidad FROM profesores WHERE id = %s", (profesor_id,))
+    profesor = cur.fetchone()
+    cur.execute(SQL_PLANO, (profesor_id,))
+    materias = {}
+    for row in cur.fetchall():
+        materia = materias.setdefault(row["materia_id"], {
+            "id": row["materia_id"],
+            "nombre": row["materia_nombre"],
+            "descripcion": row["materia_descripcion"],
+            "estudiantes": []
+        })
+        if row["estudiante_id"]:
+            materia["estudiantes"].append({
+                "id": row["estudiante_id"],
+                "nombre": row["estudiante_nombre"],
+                "apellido": row["estudiante_apellido"],
+                "correo": row["estudiante_correo"],
+                "edad": row["estudiante_edad"],
+                "fecha_inscripcion": str(row["fecha_inscripcion"])
+            })
+    return json.dumps({"profesor": dict(profesor), "materias": list(materias.values())}).encode()
+
+
+def respuesta_sql(cur, profesor_id):
+    cur.execute(SQL_JSON_AGG.format(filtro=FILTRO_POR_ID.format("%s")), (profesor_id,))
+    return cur.fetchone()["documento"].encode()
+
+
+def respuesta_roster(cur, profesor_id):
+    cur.execute(SQL_ASIGNACIONES_PROFESOR.format(filtro=FILTRO_POR_ID.format("%s")), (profesor_id,))
+    return cur.fetchone()["documento"].encode()
+
+
+def medir(funcion, cur, profesor_id, repeticiones):
+    funcion(cur, profesor_id)  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cuerpo = funcion(cur, profesor_id)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), len(cuerpo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de /asignaciones/profesor: agregación en Python, en SQL y precalculada")
+    parser.add_argument("--materias", type=int, default=50)
+    parser.add_argument("--estudiantes", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--dsn", default=Config.DATABASE_URI, help="Cadena de conexión (por defecto DATABASE_URI)")
+    args = parser.parse_args(argv)
+
+    conn = psycopg2.connect(args.dsn, cursor_factory=RealDictCursor)
+    try:
+        with conn.cursor() as cur:
+            profesor_id = poblar(cur, args.materias, args.estudiantes)
+            python_ms, python_bytes = medir(respuesta_python, cur, profesor_id, args.repeticiones)
+            sql_ms, sql_bytes = medir(respuesta_sql, cur, profesor_id, args.repeticiones)
+            roster_ms, roster_bytes = medir(respuesta_roster, cur, profesor_id, args.repeticiones)
+    finally:
+        # Los datos de prueba nunca se guardan
+        conn.rollback()
+        conn.close()
+
+    print(f"{args.materias} materias x {args.estudiantes} estudiantes, mediana de {args.repeticiones} repeticiones")
+    print(f"  python (JOIN plano + dict + json.dumps): {python_ms:8.1f} ms  {python_bytes:>9} bytes")
+    print(f"  sql    (json_agg en Postgres)          : {sql_ms:8.1f} ms  {sql_bytes:>9} bytes")
+    print(f"  roster (roster_profesor precalculado)  : {roster_ms:8.1f} ms  {roster_bytes:>9} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Microbenchmark de la serialización de las listas (p. ej. GET /estudiantes/).
+
+- antes: copiar cada fila a un dict nuevo campo por campo, jsonable_encoder y
+  JSONResponse (json.dumps de la biblioteca estándar)
+- después: las filas tal cual con json_rows (FastJSONResponse, orjson si está instalado)
+
+No usa la base: las filas se generan en memoria con la forma de la tabla estudiantes.
+
+Uso:
+    python -m benchmarks.serialization [--filas 10000] [--repeticiones 20]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from responses import json_rows, orjson
+
+COLUMNAS = ("id", "nombre", "apellido", "correo", "edad", "direccion")
+
+
+def generar_filas(n):
+    return [
+        {
+            "id": i,
+            "nombre": f"Estudiante {i}",
+            "apellido": "Pérez",
+            "correo": f"estudiante{i}@escuela.com",
+            "edad": 18 + i % 10,
+            "direccion": f"Calle {i} #{i % 97}",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def antes(filas):
+    estudiantes = []
+    for row in filas:
+        estudiantes.append({c: row[c] for c in COLUMNAS})
+    return JSONResponse(jsonable_encoder(estudiantes)).body
+
+
+def despues(filas):
+    return json_rows(filas).body
+
+
+def medir(funcion, filas, repeticiones):
+    funcion(filas)  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(filas)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de serialización de una lista de filas")
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    filas = generar_filas(args.filas)
+    antes_ms = medir(antes, filas, args.repeticiones)
+    despues_ms = medir(despues, filas, args.repeticiones)
+
+    print(f"{args.filas} filas, mediana de {args.repeticiones} repeticiones")
+    print(f"  antes   (dict por fila + jsonable_encoder + json): {antes_ms:8.2f} ms")
+    print(f"  después (json_rows, {'orjson' if orjson else 'json'}): {despues_ms:8.2f} ms")
+    print(f"  aceleración: {antes_ms / despues_ms:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
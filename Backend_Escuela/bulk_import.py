@@ -0,0 +1,148 @@
+import csv
+import io
+import json
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+# Formatos aceptados por las importaciones masivas
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def detect_format(upload, fmt=None):
+    """Formato explícito o deducido del nombre / tipo de contenido del archivo subido"""
+    if fmt:
+        return fmt
+    name = (upload.filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or "json" in (upload.content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(binary_file, fmt):
+    """
+    Recorre el archivo línea a línea sin cargarlo completo en memoria.
+    Produce (línea, dict) o (línea, mensaje de error) si la línea no se puede leer.
+    """
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            if not reader.fieldnames:
+                raise HTTPException(status_code=400, detail="El archivo CSV está vacío o no tiene encabezado")
+            for row in reader:
+                # La línea 1 es el encabezado
+                line = reader.line_num
+                if None in row:
+                    yield line, "La fila tiene más columnas que el encabezado"
+                    continue
+                yield line, {k.strip(): v for k, v in row.items() if k}
+        else:
+            for line, raw in enumerate(text, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw)
+                except ValueError as e:
+                    yield line, f"JSON inválido: {e}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line, "Cada línea debe ser un objeto JSON"
+                    continue
+                yield line, record
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+    finally:
+        text.detach()
+
+
+def _describe(error: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'fila'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def validate_batches(records, model, batch_size, unique_field=None):
+    """
+    Valida los registros contra `model` en lotes de `batch_size`.
+
+    Produce (válidos, errores) por lote: válidos es una lista de (línea, instancia)
+    y errores una lista de dicts {linea, campo, error}. Con `unique_field` también
+    se rechazan los valores repetidos dentro del mismo archivo.
+    """
+    seen = set()
+    valid, errors = [], []
+    for line, record in records:
+        if isinstance(record, str):
+            errors.append({"linea": line, "error": record})
+        else:
+            try:
+                item = model(**record)
+            except ValidationError as e:
+                errors.append({"linea": line, "error": _describe(e)})
+            except TypeError as e:
+                errors.append({"linea": line, "error": str(e)})
+            else:
+                key = getattr(item, unique_field) if unique_field else None
+                if key is not None and key in seen:
+                    errors.append({"linea": line, unique_field: key, "error": f"{unique_field} repetido en el archivo"})
+                else:
+                    if key is not None:
+                        seen.add(key)
+                    valid.append((line, item))
+        if len(valid) + len(errors) >= batch_size:
+            yield valid, errors
+            valid, errors = [], []
+    if valid or errors:
+        yield valid, errors
+
+
+def copy_buffer(rows):
+    """Buffer CSV para COPY ... FROM STDIN WITH (FORMAT csv)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+class ImportReport:
+    """Resultado de una importación: contadores y errores por fila (acotados a `max_errors`)"""
+
+    def __init__(self, max_errors=1000, dry_run=False):
+        self.max_errors = max_errors
+        self.dry_run = dry_run
+        self.total = 0
+        self.validos = 0
+        self.insertados = 0
+        self.errores = []
+        self.errores_omitidos = 0
+
+    def add_errors(self, errors):
+        self.total += len(errors)
+        for error in errors:
+            if len(self.errores) < self.max_errors:
+                self.errores.append(error)
+            else:
+                self.errores_omitidos += 1
+
+    def add_valid(self, count):
+        self.total += count
+        self.validos += count
+
+    def reject(self, errors):
+        """Filas que pasaron la validación pero se rechazaron después (p. ej. ya existían)"""
+        self.validos -= len(errors)
+        self.total -= len(errors)
+        self.add_errors(errors)
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "validos": self.validos,
+            "insertados": self.insertados,
+            "rechazados": len(self.errores) + self.errores_omitidos,
+            "dry_run": self.dry_run,
+            "errores": sorted(self.errores, key=lambda e: e["linea"]),
+            "errores_omitidos": self.errores_omitidos,
+        }
@@ -0,0 +1,220 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Caché en memoria, acotada y segura para hilos.
+
+    - Cada entrada expira `ttl` segundos después de guardarse
+    - Al superar `maxsize` entradas se descarta la usada hace más tiempo (LRU)
+    - Lleva contadores de aciertos, fallos y desalojos
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # clave -> (expira, valor)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado o `default` si no existe o ya expiró"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires, value = item
+            if expires <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Guarda un valor; `ttl` permite acortar o alargar la vida de esta entrada"""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        """Elimina una entrada (si existe)"""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def discard_where(self, predicate):
+        """Elimina las entradas cuyo valor cumple `predicate`; devuelve cuántas se eliminaron"""
+        with self._lock:
+            keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Contadores de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+class TableVersions:
+    """
+    Versión por tabla para los ETag de las listas y la caché de respuestas.
+
+    Las versiones vienen de la tabla table_versions de la base (migración 006),
+    que incrementan los triggers de cada escritura; version_listener.py las sigue con
+    LISTEN/NOTIFY, así que todos los procesos de la API arman el mismo ETag y ven las
+    escrituras de los demás y las hechas fuera de la API.
+
+    Tras una escritura propia (bump) la tabla queda pendiente hasta que el listener
+    lee su versión nueva: mientras tanto etag() devuelve None (sin ETag ni caché), y
+    lo mismo para todas las tablas si se pierde la conexión del listener.
+
+    Sin listener (migración sin aplicar o TABLE_VERSIONS_LISTEN desactivado) las
+    versiones son contadores en memoria del proceso, válidos con un solo worker; la
+    época (aleatoria por proceso) evita que un reinicio, que vuelve los contadores a
+    cero, haga pasar por vigente un ETag anterior.
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._versions = {}
+        self._shared = False  # versiones leídas de la base
+        self._stale = False  # listener sin conexión: versiones desconocidas
+        self._pending = {}  # tabla -> escrituras propias aún no leídas de la base
+        self._listeners = []
+        self._on_pending = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Registra `callback(tables)`, llamado en cada bump (p. ej. para invalidar una caché)"""
+        self._listeners.append(callback)
+
+    def _notify(self, tables):
+        if tables:
+            for callback in self._listeners:
+                callback(tables)
+
+    def bump(self, *tables):
+        """Llamar después del commit de una escritura sobre `tables`"""
+        with self._lock:
+            shared = self._shared
+            for table in tables:
+                if shared:
+                    self._pending[table] = self._pending.get(table, 0) + 1
+                else:
+                    self._versions[table] = self._versions.get(table, 0) + 1
+            on_pending = self._on_pending
+        self._notify(tables)
+        if shared and on_pending is not None:
+            on_pending()
+
+    # --- Versiones compartidas (las aplica version_listener.py) ---
+
+    def set_pending_callback(self, callback):
+        """`callback()` se llama tras cada bump con versiones compartidas (despierta al listener)"""
+        self._on_pending = callback
+
+    def load(self, epoch, versions):
+        """Reemplaza todas las versiones por las de la base (al conectar el listener)"""
+        with self._lock:
+            previous = self._versions if self._shared and not self._stale and self.epoch == epoch else {}
+            changed = [t for t in set(previous) | set(versions) | set(self._versions)
+                       if previous.get(t) != versions.get(t)]
+            self.epoch = epoch
+            self._versions = dict(versions)
+            self._shared = True
+            self._stale = False
+            self._pending.clear()
+        self._notify(tuple(changed))
+
+    def apply(self, table, version):
+        """Versión avisada por NOTIFY (los avisos pueden llegar repetidos o atrasados)"""
+        with self._lock:
+            if not self._shared or version <= self._versions.get(table, 0):
+                return
+            self._versions[table] = version
+        self._notify((table,))
+
+    def pending(self):
+        """Tablas con escrituras propias cuya versión todavía no se leyó: {tabla: marca}"""
+        with self._lock:
+            return dict(self._pending)
+
+    def refresh(self, marks, versions):
+        """
+        Versiones leídas de la base después de los bump de `marks` (resultado de
+        pending()); una tabla sigue pendiente si tuvo otro bump durante la lectura.
+        """
+        changed = []
+        with self._lock:
+            for table, mark in marks.items():
+                version = versions.get(table, 0)
+                if version > self._versions.get(table, 0):
+                    self._versions[table] = version
+                    changed.append(table)
+                if self._pending.get(table) == mark:
+                    del self._pending[table]
+        self._notify(tuple(changed))
+
+    def disconnect(self):
+        """El listener perdió la conexión: no se arman ETag hasta volver a cargar las versiones"""
+        with self._lock:
+            if not self._shared:
+                return
+            self._stale = True
+            tables = tuple(self._versions)
+        self._notify(tables)
+
+    def version(self, table):
+        return self._versions.get(table, 0)
+
+    def etag(self, *tables):
+        """ETag fuerte para una respuesta que depende de `tables`; None si alguna versión no se conoce"""
+        with self._lock:
+            if self._shared and (self._stale or any(table in self._pending for table in tables)):
+                return None
+            versions = ".".join(str(self._versions.get(table, 0)) for table in tables)
+        return f'"{self.epoch}-{versions}"'
+
+    def stats(self):
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "shared": self._shared,
+                "stale": self._stale,
+                "pending": sorted(self._pending),
+                "versions": dict(self._versions),
+            }
+
+
+# Versiones compartidas por los routers síncronos y asíncronos
+table_versions = TableVersions()
@@ -19,3 +19,69 @@ class Config:
     # Por ejemplo, tiempo de expiración de los tokens
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+    # Pool de conexiones a la base de datos
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))  # segundos esperando una conexión libre
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))  # segundos antes de reciclar una conexión (pool síncrono)
+    DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))  # segundos inactiva antes de cerrarla (pool asíncrono)
+    DB_POOL_HEALTH_CHECK_IDLE = float(os.getenv('DB_POOL_HEALTH_CHECK_IDLE', '30'))  # validar si estuvo inactiva más de esto
+
+    # Modo de acceso a datos: 'sync' (psycopg2 + threadpool) o 'async' (asyncpg + event loop)
+    DB_MODE = os.getenv('DB_MODE', 'sync')
+
+    # Versiones de tablas compartidas entre procesos (version_listener.py, migración 006)
+    TABLE_VERSIONS_LISTEN = os.getenv('TABLE_VERSIONS_LISTEN', 'True').lower() in ('1', 'true', 'yes')
+    TABLE_VERSIONS_RECONNECT = float(os.getenv('TABLE_VERSIONS_RECONNECT', '5'))  # segundos entre reintentos
+
+    # Caché de usuarios autenticados en security/auth.py
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '300'))  # segundos
+
+    # Caché de claims JWT verificados (security/tokens.py)
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+    TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', '900'))  # segundos, para tokens sin exp
+
+    # Autenticación sin estado: el token lleva el perfil del usuario y no se consulta la base de datos
+    AUTH_STATELESS = os.getenv('AUTH_STATELESS', 'False').lower() in ('1', 'true', 'yes')
+    STATELESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('STATELESS_TOKEN_EXPIRE_MINUTES', '15'))
+
+    # Pool de procesos del servicio de contraseñas (security/passwords.py)
+    HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(min(4, os.cpu_count() or 1))))  # hashes simultáneos como máximo
+    HASH_MAX_QUEUE = int(os.getenv('HASH_MAX_QUEUE', '64'))  # peticiones en espera antes de responder 503
+
+    # Servicio de contraseñas: esquema para hashes nuevos ('bcrypt' o 'scrypt') y costo.
+    # Sin HASH_COST el costo se calibra al iniciar para no superar HASH_LATENCY_BUDGET_MS por verificación
+    HASH_SCHEME = os.getenv('HASH_SCHEME', 'bcrypt')
+    HASH_COST = os.getenv('HASH_COST', '')  # rondas de bcrypt o log2(N) de scrypt
+    HASH_LATENCY_BUDGET_MS = float(os.getenv('HASH_LATENCY_BUDGET_MS', '250'))
+
+    # Paginación por cursor de los endpoints de listas (pagination.py)
+    PAGE_DEFAULT_LIMIT = int(os.getenv('PAGE_DEFAULT_LIMIT', '50'))  # si se envía cursor sin limit
+    PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', '500'))
+
+    # Búsqueda por trigramas (/estudiantes/buscar, /profesores/profesores/buscar)
+    SEARCH_DEFAULT_LIMIT = int(os.getenv('SEARCH_DEFAULT_LIMIT', '20'))
+    SEARCH_MAX_LIMIT = int(os.getenv('SEARCH_MAX_LIMIT', '100'))
+
+    # Exportación en streaming (/asignaciones/export): filas leídas por lote del cursor del servidor
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+    # Importación masiva (/estudiantes/import/): filas validadas por lote y errores devueltos como máximo
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '5000'))
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', '1000'))
+
+    # Inscripción en lote (/asignaciones/batch): máximo de pares estudiante-materia por petición
+    ASIGNACION_LOTE_MAX_PARES = int(os.getenv('ASIGNACION_LOTE_MAX_PARES', '100000'))
+
+    # Registro en lote (/usuarios/registro/lote/): máximo de usuarios por petición (un hash cada uno)
+    REGISTRO_LOTE_MAX = int(os.getenv('REGISTRO_LOTE_MAX', '500'))
+
+    # Caché de respuestas de los GET de lectura frecuente (response_cache.py)
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))  # entradas
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '60'))  # segundos, si la ruta no fija otro
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', '1048576'))  # respuestas más grandes no se guardan
+
+    # Traza de consultas (query_trace.py): con DEBUG las respuestas llevan X-Query-Count / X-Query-Time
+    DEBUG = os.getenv('DEBUG', 'False').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))  # consultas más lentas se registran en el log
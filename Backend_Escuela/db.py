@@ -1,10 +1,368 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
+from fastapi import HTTPException, Request
 from config import Config
+import query_trace
+
+
+class TracedCursor(RealDictCursor):
+    """
+    RealDictCursor que registra cada execute/executemany/copy (sentencia, duración y
+    filas) en query_trace: métricas, consultas por petición y log de consultas lentas.
+    """
+
+    def _record(self, query, params, start):
+        elapsed = time.perf_counter() - start
+        rows = self.rowcount if self.rowcount >= 0 else None
+        query_trace.record("psycopg2", lambda: self._statement(query), params, elapsed, rows)
+
+    def _statement(self, query):
+        # sql.Composed se arma con la conexión; los bytes vienen de mogrify o COPY
+        if hasattr(query, "as_string"):
+            return query.as_string(self.connection)
+        return query.decode("utf-8", "replace") if isinstance(query, bytes) else query
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, vars, start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(query, None, start)
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._record(sql, None, start)
+
+
+class PoolTimeout(Exception):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera"""
+
+
+class PoolClosed(Exception):
+    """El pool fue cerrado o aún no se ha iniciado"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones PostgreSQL seguro para hilos.
+
+    - Mantiene entre min_size y max_size conexiones abiertas
+    - Espera hasta `timeout` segundos por una conexión libre antes de fallar
+    - Valida la conexión al prestarla (SELECT 1 si estuvo inactiva más de `health_check_idle` segundos)
+    - Recicla las conexiones que superan `max_lifetime` segundos de vida
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, timeout=5.0, max_lifetime=1800.0, health_check_idle=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamaños de pool inválidos")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # (conexión, último uso)
+        self._created = {}        # id(conexión) -> momento de creación
+        self._size = 0            # conexiones abiertas (libres + prestadas)
+        self._waiting = 0
+        self._closed = True
+        self._stats = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "wait_time_total": 0.0,
+        }
+
+    def _connect(self):
+        # TracedCursor registra cada consulta en la traza de la petición (query_trace.py)
+        conn = psycopg2.connect(self.dsn, cursor_factory=TracedCursor)
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        # Cierra la conexión y libera su lugar en el pool
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._created.pop(id(conn), None)
+            self._size -= 1
+            self._stats["connections_closed"] += 1
+            self._cond.notify()
+
+    def _expired(self, conn, now):
+        created = self._created.get(id(conn), now)
+        return self.max_lifetime and now - created > self.max_lifetime
+
+    def _healthy(self, conn, last_used, now):
+        if conn.closed:
+            return False
+        if now - last_used < self.health_check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def open(self):
+        """Abre el pool y crea las conexiones mínimas"""
+        with self._cond:
+            if not self._closed:
+                return
+            self._closed = False
+        for _ in range(self.min_size):
+            with self._cond:
+                self._size += 1
+            try:
+                conn = self._connect()
+            except psycopg2.Error:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+
+    def close(self):
+        """Cierra todas las conexiones libres; las prestadas se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def getconn(self):
+        """Presta una conexión del pool, esperando como máximo `timeout` segundos"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            with self._cond:
+                entry = None
+                self._waiting += 1
+                try:
+                    while True:
+                        if self._closed:
+                            raise PoolClosed("El pool de conexiones está cerrado")
+                        if self._idle:
+                            entry = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            self._size += 1
+                            break
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout("Tiempo de espera agotado al obtener una conexión")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if entry is None:
+                # Hay espacio libre: abrir una conexión nueva
+                try:
+                    conn = self._connect()
+                except psycopg2.Error:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                conn, last_used = entry
+                now = time.monotonic()
+                if self._expired(conn, now):
+                    self._discard(conn)
+                    continue
+                if not self._healthy(conn, last_used, now):
+                    with self._cond:
+                        self._stats["health_check_failures"] += 1
+                    # Descartar y reintentar con el tiempo restante
+                    self._discard(conn)
+                    continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["wait_time_total"] += time.monotonic() - start
+            return conn
+
+    def putconn(self, conn):
+        """Devuelve una conexión al pool, deshaciendo cualquier transacción abierta"""
+        if conn.closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            self._discard(conn)
+            return
+        now = time.monotonic()
+        with self._cond:
+            if not self._closed and not self._expired(conn, now):
+                self._idle.append((conn, now))
+                self._cond.notify()
+                return
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager que presta una conexión y la devuelve al salir"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        """Estadísticas actuales del pool"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "closed": self._closed,
+            })
+        return stats
+
+
+# Pool compartido por toda la aplicación (se abre en el lifespan de main.app)
+pool = ConnectionPool(
+    Config.DATABASE_URI,
+    min_size=Config.DB_POOL_MIN_SIZE,
+    max_size=Config.DB_POOL_MAX_SIZE,
+    timeout=Config.DB_POOL_TIMEOUT,
+    max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+    health_check_idle=Config.DB_POOL_HEALTH_CHECK_IDLE,
+)
+
+
+def init_pool():
+    """Abre el pool de conexiones (llamado al iniciar la aplicación)"""
+    pool.open()
+
+
+def close_pool():
+    """Cierra el pool de conexiones (llamado al apagar la aplicación)"""
+    pool.close()
+
+
+def pool_stats():
+    """Estadísticas del pool de conexiones"""
+    return pool.stats()
+
+
+class RequestConnection:
+    """
+    Conexión compartida por toda una petición (autenticación y handler).
+
+    Se toma del pool la primera vez que se usa, de modo que las peticiones que
+    fallan en la autenticación o no consultan la base de datos no ocupan una
+    conexión, y se devuelve al pool una única vez al terminar la petición.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+        self._released = False
+
+    @property
+    def acquired(self):
+        return self._conn is not None
+
+    def _connection(self):
+        if self._released:
+            raise RuntimeError("La conexión de la petición ya fue liberada")
+        if self._conn is None:
+            try:
+                self._conn = self._pool.getconn()
+            except (PoolTimeout, PoolClosed) as e:
+                raise HTTPException(status_code=503, detail=f"Base de datos no disponible: {e}")
+            except psycopg2.Error as e:
+                raise HTTPException(status_code=503, detail=f"Error al conectar a la base de datos: {e}")
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        return self._connection().cursor(*args, **kwargs)
+
+    def commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def rollback(self):
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._connection(), name)
+
+    def release(self, commit=True):
+        """Confirma o deshace la transacción y devuelve la conexión al pool (solo una vez)"""
+        if self._released:
+            return
+        self._released = True
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if commit and not conn.closed:
+                conn.commit()
+        finally:
+            self._pool.putconn(conn)
+
+
+def get_db(request: Request):
+    """
+    Dependencia de FastAPI con la conexión/transacción de la petición.
+
+    FastAPI cachea la dependencia por petición, así que get_current_user y el
+    handler reciben la misma conexión. Al terminar se confirma la transacción
+    si no hubo errores (o se deshace si los hubo) y la conexión vuelve al pool.
+    """
+    db = RequestConnection(pool)
+    request.state.db = db
+    try:
+        yield db
+    except Exception:
+        db.release(commit=False)
+        raise
+    else:
+        db.release(commit=True)
+
 
 def get_db_connection():
     """
-    Función para obtener una conexión a la base de datos PostgreSQL
+    Función para obtener una conexión directa a la base de datos PostgreSQL
+    (sin pool, para scripts fuera de la aplicación)
     """
     try:
         connection = psycopg2.connect(
@@ -0,0 +1,181 @@
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+from fastapi import HTTPException, Request
+from config import Config
+import query_trace
+
+# Pool asíncrono compartido (se abre en el lifespan de main.app cuando DB_MODE=async)
+_pool = None
+
+
+def _status_rows(status):
+    # "UPDATE 3", "INSERT 0 1", "COPY 500" -> filas afectadas
+    count = status.rpartition(" ")[2] if isinstance(status, str) else ""
+    return int(count) if count.isdigit() else None
+
+
+class TracedConnection(asyncpg.Connection):
+    """
+    Conexión de asyncpg que registra cada consulta (sentencia, duración y filas) en
+    query_trace. El query logger de asyncpg no sirve para esto: avisa con
+    loop.call_soon, después de que la petición ya armó sus cabeceras.
+    """
+
+    _traced = True
+
+    def _record(self, query, args, start, rows):
+        if self._traced:
+            query_trace.record("asyncpg", query, args, time.perf_counter() - start, rows)
+
+    async def execute(self, query, *args, timeout=None):
+        start, status = time.perf_counter(), None
+        try:
+            status = await super().execute(query, *args, timeout=timeout)
+            return status
+        finally:
+            self._record(query, args, start, _status_rows(status))
+
+    async def executemany(self, command, args, *, timeout=None):
+        start = time.perf_counter()
+        try:
+            return await super().executemany(command, args, timeout=timeout)
+        finally:
+            self._record(command, None, start, None)
+
+    async def fetch(self, query, *args, timeout=None, record_class=None):
+        start, rows = time.perf_counter(), None
+        try:
+            rows = await super().fetch(query, *args, timeout=timeout, record_class=record_class)
+            return rows
+        finally:
+            self._record(query, args, start, None if rows is None else len(rows))
+
+    async def fetchval(self, query, *args, column=0, timeout=None):
+        start = time.perf_counter()
+        try:
+            return await super().fetchval(query, *args, column=column, timeout=timeout)
+        finally:
+            self._record(query, args, start, None)
+
+    async def fetchrow(self, query, *args, timeout=None, record_class=None):
+        start, row = time.perf_counter(), None
+        try:
+            row = await super().fetchrow(query, *args, timeout=timeout, record_class=record_class)
+            return row
+        finally:
+            self._record(query, args, start, None if row is None else 1)
+
+    async def copy_records_to_table(self, table_name, *, records, **kwargs):
+        start, status = time.perf_counter(), None
+        try:
+            status = await super().copy_records_to_table(table_name, records=records, **kwargs)
+            return status
+        finally:
+            self._record(f"COPY {table_name} FROM STDIN", None, start, _status_rows(status))
+
+    async def reset(self, *, timeout=None):
+        # Limpieza del pool al devolver la conexión: no es una consulta de la petición
+        self._traced = False
+        try:
+            await super().reset(timeout=timeout)
+        finally:
+            self._traced = True
+
+
+async def init_async_pool():
+    """Abre el pool asíncrono de conexiones (asyncpg)"""
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            Config.DATABASE_URI,
+            min_size=Config.DB_POOL_MIN_SIZE,
+            max_size=Config.DB_POOL_MAX_SIZE,
+            # asyncpg no recicla por antigüedad (DB_POOL_MAX_LIFETIME es solo del pool
+            # síncrono): cierra las conexiones que pasan DB_POOL_MAX_IDLE segundos sin usarse
+            max_inactive_connection_lifetime=Config.DB_POOL_MAX_IDLE,
+            connection_class=TracedConnection,  # traza de consultas (query_trace.py)
+        )
+
+
+async def close_async_pool():
+    """Cierra el pool asíncrono de conexiones"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def async_pool_stats():
+    """Estadísticas del pool asíncrono"""
+    if _pool is None:
+        return {"closed": True}
+    size = _pool.get_size()
+    idle = _pool.get_idle_size()
+    return {
+        "min_size": _pool.get_min_size(),
+        "max_size": _pool.get_max_size(),
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "closed": False,
+    }
+
+
+def async_connection():
+    """
+    Presta una conexión fuera del ciclo de la petición (p. ej. respuestas en
+    streaming que siguen leyendo después de que el handler terminó).
+    Uso: async with async_connection() as conn: ...
+    """
+    if _pool is None:
+        raise HTTPException(status_code=503, detail="Base de datos no disponible: el pool asíncrono no está iniciado")
+    return _pool.acquire(timeout=Config.DB_POOL_TIMEOUT)
+
+
+async def _acquire():
+    """Toma una conexión del pool; 503 si el pool no está iniciado o no hay conexión libre a tiempo"""
+    if _pool is None:
+        raise HTTPException(status_code=503, detail="Base de datos no disponible: el pool asíncrono no está iniciado")
+    try:
+        return await _pool.acquire(timeout=Config.DB_POOL_TIMEOUT)
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=f"Base de datos no disponible: {e}")
+    except (OSError, asyncpg.PostgresError) as e:
+        raise HTTPException(status_code=503, detail=f"Error al conectar a la base de datos: {e}")
+
+
+async def get_async_db(request: Request):
+    """
+    Dependencia de FastAPI que presta una conexión asyncpg durante la petición.
+    La espera por una conexión libre no bloquea el event loop. FastAPI cachea la
+    dependencia por petición, así que la autenticación y el handler comparten la
+    misma conexión, que se devuelve al pool una sola vez.
+    """
+    conn = await _acquire()
+    request.state.db = conn
+    try:
+        yield conn
+    finally:
+        await _pool.release(conn)
+
+
+@asynccontextmanager
+async def request_connection(request: Request):
+    """
+    Conexión para una consulta puntual durante la petición (p. ej. la autenticación
+    con tokens sin estado no consulta la base y no debe ocupar una conexión).
+    Reutiliza la de get_async_db si el handler ya la tomó; si no, presta una solo
+    mientras dure el bloque.
+    Uso: async with request_connection(request) as conn: ...
+    """
+    conn = getattr(request.state, "db", None)
+    if conn is not None:
+        yield conn
+        return
+    conn = await _acquire()
+    try:
+        yield conn
+    finally:
+        await _pool.release(conn)
@@ -138,9 +138,15 @@ CREATE TABLE asignacion (
     CONSTRAINT fk_estudio
         FOREIGN KEY (estudio_id) 
         REFERENCES estudios (id)
-        ON DELETE CASCADE
+        ON DELETE CASCADE,
+    -- Un estudiante se inscribe una sola vez en cada materia (ON CONFLICT en /asignaciones/create y /batch)
+    -- En una base existente: ALTER TABLE asignacion ADD CONSTRAINT uq_asignacion_estudiante_estudio UNIQUE (estudiante_id, estudio_id);
+    CONSTRAINT uq_asignacion_estudiante_estudio
+        UNIQUE (estudiante_id, estudio_id)
 );
 
+-- Índices y cambios posteriores del esquema: migrations/ (aplicar con `python migrate.py`)
+
 -- Insertar roles
 INSERT INTO roles (nombre)
 VALUES 
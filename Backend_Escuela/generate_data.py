@@ -0,0 +1,308 @@
+"""
+Generador de datos sintéticos para el esquema escuela (bases de benchmark).
+
+Produce roles, usuarios, profesores, estudiantes, materias (estudios) y
+asignaciones coherentes a cualquier escala y los carga con COPY:
+
+- los ids se asignan aquí (usuario del profesor i = 1 + i, del estudiante i =
+  1 + profesores + i), así que cada bloque de estudiantes se genera y se carga en
+  un proceso aparte sin consultar la base
+- cada bloque usa su propia semilla: el resultado no depende de --workers
+- las contraseñas salen de un pool pequeño de hashes precalculados con los
+  parámetros del servicio de contraseñas (todas corresponden a --password)
+- la popularidad de las materias sigue una ley de Zipf, las inscripciones por
+  estudiante una normal alrededor de --inscripciones y la edad una normal en 19
+- los triggers de roster_profesor se desactivan durante la carga y el roster se
+  reconstruye una sola vez al final
+
+Las tablas deben estar vacías (o usar --truncate, que borra todos los datos salvo
+los roles).
+
+Uso:
+    python generate_data.py --estudiantes 1000000 --profesores 5000 --materias 20000 --inscripciones 20
+    python generate_data.py --estudiantes 10000 --truncate --workers 4 --dsn postgresql://.../escuela_bench
+"""
+import argparse
+import bisect
+import itertools
+import multiprocessing
+import random
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import psycopg2
+from config import Config
+
+NOMBRES = (
+    "María", "José", "Ana", "Luis", "Carmen", "Carlos", "Laura", "Jorge", "Sofía", "Miguel",
+    "Lucía", "Andrés", "Valentina", "Juan", "Camila", "Diego", "Isabella", "Santiago", "Paula", "Daniel",
+    "Gabriela", "Alejandro", "Daniela", "Felipe", "Mariana", "Sebastián", "Natalia", "Mateo", "Juliana", "Nicolás",
+)
+APELLIDOS = (
+    "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez", "García", "Sánchez",
+    "Romero", "Sosa", "Torres", "Álvarez", "Ruiz", "Ramírez", "Flores", "Acosta", "Benítez", "Medina",
+    "Herrera", "Suárez", "Aguirre", "Giménez", "Gutiérrez", "Pereyra", "Rojas", "Molina", "Castro", "Ortiz",
+)
+AREAS = (
+    "Matemáticas", "Física", "Química", "Biología", "Historia", "Geografía", "Literatura", "Inglés",
+    "Filosofía", "Programación", "Economía", "Arte", "Música", "Educación Física", "Estadística",
+)
+CALLES = ("Calle", "Carrera", "Avenida", "Diagonal", "Transversal")
+DOMINIO = "escuela.com"
+
+ROLES = ((1, "Profesor"), (2, "Estudiante"), (3, "Admin"))
+TABLAS = ("asignacion", "estudios", "estudiantes", "profesores", "usuarios")
+# Tablas con triggers de roster_profesor (migrations/004_roster_profesor.sql)
+TABLAS_ROSTER = ("asignacion", "estudios", "estudiantes")
+
+ZIPF_S = 0.6  # exponente de la popularidad: la materia más pedida tiene ~1/3 de los estudiantes
+FECHA_INICIAL = date.today() - timedelta(days=730)
+
+
+def _ascii(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii").lower().replace(" ", "")
+
+
+def _persona(rnd, id, prefijo=""):
+    nombre, apellido = rnd.choice(NOMBRES), rnd.choice(APELLIDOS)
+    return nombre, apellido, f"{_ascii(nombre)}.{_ascii(apellido)}.{prefijo}{id}@{DOMINIO}"
+
+
+def _linea(*valores):
+    # Formato de texto de COPY: los valores generados no llevan tabuladores ni barras
+    return "\t".join("\\N" if v is None else str(v) for v in valores) + "\n"
+
+
+class CopyStream:
+    """Archivo de solo lectura sobre un iterador de líneas: COPY sin armar el lote en memoria"""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._rest = ""
+
+    def read(self, size=-1):
+        parts, total = [self._rest], len(self._rest)
+        self._rest = ""
+        if size < 0 or total < size:
+            for line in self._lines:
+                parts.append(line)
+                total += len(line)
+                if 0 <= size <= total:
+                    break
+        data = "".join(parts)
+        if 0 <= size < len(data):
+            data, self._rest = data[:size], data[size:]
+        return data
+
+
+def _copy(cur, tabla, columnas, lines):
+    cur.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN", CopyStream(lines), size=1 << 16)
+    return cur.rowcount
+
+
+# --- Bloques de estudiantes (procesos de trabajo) ---
+
+_popularidad = {}  # (semilla, materias) -> (pesos acumulados de Zipf, id de la materia de cada rango)
+
+
+def _elegir_materias(rnd, cantidad, semilla, materias):
+    """`cantidad` materias distintas; las populares están repartidas al azar entre los ids"""
+    if (semilla, materias) not in _popularidad:
+        orden = list(range(1, materias + 1))
+        random.Random(f"{semilla}-materias").shuffle(orden)
+        pesos = list(itertools.accumulate(1 / (rango ** ZIPF_S) for rango in range(1, materias + 1)))
+        _popularidad[semilla, materias] = (pesos, orden)
+    pesos, orden = _popularidad[semilla, materias]
+    total = pesos[-1]
+    elegidas = set()
+    while len(elegidas) < cantidad:
+        elegidas.add(orden[bisect.bisect(pesos, rnd.random() * total)])
+    return elegidas
+
+
+def cargar_bloque(dsn, semilla, desde, hasta, profesores, materias, inscripciones, hashes):
+    """
+    Genera y carga los estudiantes [desde, hasta), sus usuarios y sus asignaciones
+    en una transacción. Devuelve (estudiantes, asignaciones).
+    """
+    rnd = random.Random(f"{semilla}-{desde}")
+    estudiantes = []
+    for id in range(desde, hasta):
+        nombre, apellido, correo = _persona(rnd, id, "e")
+        edad = min(max(int(rnd.gauss(19, 2.5)), 14), 35)
+        direccion = f"{rnd.choice(CALLES)} {rnd.randint(1, 200)} # {rnd.randint(1, 99)}-{rnd.randint(1, 99)}"
+        estudiantes.append((id, nombre, apellido, correo, edad, direccion, 1 + profesores + id))
+
+    def usuarios():
+        for id, nombre, apellido, correo, _, _, usuario_id in estudiantes:
+            yield _linea(usuario_id, nombre, apellido, correo, rnd.choice(hashes), 2)
+
+    def filas_estudiantes():
+        for fila in estudiantes:
+            yield _linea(*fila)
+
+    def asignaciones():
+        desviacion = max(inscripciones / 3, 1)
+        for id, *_ in estudiantes:
+            cantidad = min(max(round(rnd.gauss(inscripciones, desviacion)), 1), materias)
+            for estudio_id in _elegir_materias(rnd, cantidad, semilla, materias):
+                yield _linea(id, estudio_id, FECHA_INICIAL + timedelta(days=rnd.randrange(730)))
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            _copy(cur, "usuarios", ("id", "nombre", "apellido", "correo", "contrasena", "rol_id"), usuarios())
+            _copy(cur, "estudiantes", ("id", "nombre", "apellido", "correo", "edad", "direccion", "usuario_id"),
+                  filas_estudiantes())
+            filas = _copy(cur, "asignacion", ("estudiante_id", "estudio_id", "fecha_inscripcion"), asignaciones())
+        conn.commit()
+    finally:
+        conn.close()
+    return len(estudiantes), filas
+
+
+# --- Proceso principal ---
+
+def generar_hashes(password, cantidad):
+    """Pool de hashes de `password` con los parámetros actuales del servicio de contraseñas"""
+    from security import passwords
+    try:
+        return [passwords.hash_password(password) for _ in range(cantidad)]
+    finally:
+        passwords.shutdown_hashing_pool()
+
+
+def preparar(cur, truncate):
+    """Vacía las tablas (con --truncate) o verifica que estén vacías; asegura los roles"""
+    if truncate:
+        cur.execute(f"TRUNCATE {', '.join(TABLAS)} RESTART IDENTITY CASCADE")
+    else:
+        for tabla in TABLAS:
+            cur.execute(f"SELECT EXISTS (SELECT 1 FROM {tabla})")
+            if cur.fetchone()[0]:
+                raise SystemExit(f"La tabla {tabla} tiene datos: usar --truncate o una base vacía")
+    cur.executemany("INSERT INTO roles (id, nombre) VALUES (%s, %s) ON CONFLICT DO NOTHING", ROLES)
+
+
+def cargar_profesores_y_materias(cur, semilla, profesores, materias, hashes):
+    rnd = random.Random(f"{semilla}-profesores")
+    admin = _linea(1, "Admin", "Sistema", f"admin@{DOMINIO}", hashes[0], 3)
+    personas = [_persona(rnd, id, "p") for id in range(1, profesores + 1)]
+    _copy(cur, "usuarios", ("id", "nombre", "apellido", "correo", "contrasena", "rol_id"), itertools.chain(
+        [admin],
+        (_linea(1 + id, nombre, apellido, correo, rnd.choice(hashes), 1)
+         for id, (nombre, apellido, correo) in enumerate(personas, start=1)),
+    ))
+    _copy(cur, "profesores", ("id", "nombre", "apellido", "correo", "especialidad", "usuario_id"), (
+        _linea(id, nombre, apellido, correo, rnd.choice(AREAS), 1 + id)
+        for id, (nombre, apellido, correo) in enumerate(personas, start=1)
+    ))
+    # Cada materia con un profesor al azar; algunos profesores quedan sin materias
+    _copy(cur, "estudios", ("id", "nombre", "descripcion", "profesor_id"), (
+        _linea(id, f"{area} {rnd.randint(1, 6)} - G{id}", f"Curso de {area.lower()}", rnd.randint(1, profesores))
+        for id, area in ((id, rnd.choice(AREAS)) for id in range(1, materias + 1))
+    ))
+
+
+def finalizar(cur, roster):
+    """Ajusta las secuencias a los ids cargados, reconstruye el roster y actualiza estadísticas"""
+    for tabla in TABLAS:
+        cur.execute(f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), COALESCE((SELECT max(id) FROM {tabla}), 0) + 1, false)")
+    if roster:
+        cur.execute("SELECT roster_reconstruir()")
+    cur.execute(f"ANALYZE {', '.join(TABLAS)}")
+
+
+def _triggers_roster(cur, accion):
+    cur.execute("SELECT to_regclass('roster_profesor') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return False
+    for tabla in TABLAS_ROSTER:
+        cur.execute(f"ALTER TABLE {tabla} {accion} TRIGGER USER")
+    return True
+
+
+def generar(args):
+    inicio = time.perf_counter()
+    conn = psycopg2.connect(args.dsn)
+    desactivados = False  # triggers del roster desactivados y aún sin reactivar
+    try:
+        with conn.cursor() as cur:
+            preparar(cur, args.truncate)
+            hashes = generar_hashes(args.password, args.hashes)
+            print(f"{len(hashes)} hashes en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+            roster = desactivados = _triggers_roster(cur, "DISABLE")
+            cargar_profesores_y_materias(cur, args.semilla, args.profesores, args.materias, hashes)
+        conn.commit()
+        print(f"Profesores y materias en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+
+        bloques = [(desde, min(desde + args.bloque, args.estudiantes + 1))
+                   for desde in range(1, args.estudiantes + 1, args.bloque)]
+        estudiantes = asignaciones = 0
+        # "spawn" como el pool de contraseñas: cada proceso abre su propia conexión
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futuros = [
+                pool.submit(cargar_bloque, args.dsn, args.semilla, desde, hasta,
+                            args.profesores, args.materias, args.inscripciones, hashes)
+                for desde, hasta in bloques
+            ]
+            for futuro in as_completed(futuros):
+                e, a = futuro.result()
+                estudiantes += e
+                asignaciones += a
+                print(f"  {estudiantes}/{args.estudiantes} estudiantes, {asignaciones} asignaciones "
+                      f"({time.perf_counter() - inicio:.1f} s)", file=sys.stderr)
+
+        with conn.cursor() as cur:
+            if roster:
+                _triggers_roster(cur, "ENABLE")
+            finalizar(cur, roster)
+        conn.commit()
+        desactivados = False
+    finally:
+        if desactivados:
+            # Nunca dejar los triggers desactivados si la carga falló a medias
+            conn.rollback()
+            with conn.cursor() as cur:
+                _triggers_roster(cur, "ENABLE")
+            conn.commit()
+        conn.close()
+
+    total = time.perf_counter() - inicio
+    print(f"Listo en {total:.1f} s: {args.profesores} profesores, {args.materias} materias, "
+          f"{estudiantes} estudiantes, {asignaciones} asignaciones ({asignaciones / total:,.0f} filas/s)")
+    print(f"Credenciales: admin@{DOMINIO} / {args.password} (todos los usuarios usan la misma contraseña)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generar datos sintéticos para el esquema escuela")
+    parser.add_argument("--dsn", default=Config.DATABASE_URI, help="Cadena de conexión (por defecto DATABASE_URI)")
+    parser.add_argument("--estudiantes", type=int, default=10000)
+    parser.add_argument("--profesores", type=int, default=None, help="Por defecto 1 cada 200 estudiantes")
+    parser.add_argument("--materias", type=int, default=None, help="Por defecto 4 por profesor")
+    parser.add_argument("--inscripciones", type=int, default=20, help="Materias por estudiante (media)")
+    parser.add_argument("--password", default="123456", help="Contraseña de todos los usuarios")
+    parser.add_argument("--hashes", type=int, default=8, help="Hashes distintos precalculados")
+    parser.add_argument("--workers", type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1))
+    parser.add_argument("--bloque", type=int, default=20000, help="Estudiantes por transacción")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--truncate", action="store_true", help="Borrar todos los datos existentes (salvo los roles)")
+    args = parser.parse_args(argv)
+
+    args.profesores = args.profesores or max(1, args.estudiantes // 200)
+    args.materias = args.materias or max(1, args.profesores * 4)
+    if min(args.estudiantes, args.inscripciones, args.hashes, args.workers, args.bloque) < 1:
+        parser.error("los valores numéricos deben ser positivos")
+    try:
+        return generar(args)
+    except psycopg2.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,12 @@
-import bcrypt
+from security import passwords
 
 def hash_password(password):
-    """Genera un hash de la contraseña usando bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Genera un hash de la contraseña con el esquema actual del servicio de contraseñas (HASH_SCHEME, en el pool de procesos)"""
+    return passwords.hash_password(password)
 
 def verify_password(password, hashed):
-    """Verifica si una contraseña coincide con su hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    """Verifica si una contraseña coincide con su hash (en el pool de procesos)"""
+    return passwords.verify_password(password, hashed)
 
 if __name__ == "__main__":
     # Contraseña que quieres usar para todos los usuarios
@@ -55,3 +55,5 @@ UPDATE usuarios SET contrasena = '{}' WHERE correo = 'estu5@escuela.com';
     print("Contraseña: 123456")
     print("Correo: estu1@escuela.com")
     print("Contraseña: 123456")
+
+    passwords.shutdown_hashing_pool()
@@ -1,19 +1,80 @@
 import logging
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from routers.login import router as login_router 
+from config import Config
+from pagination import NEXT_CURSOR_HEADER
+from responses import FastJSONResponse
 from routers.rol_usero import router as rol_user
-from routers.user import router as user_router  
-from routers import asignacion, estudiante, estudio, profesores 
-from db import get_db_connection
+from db import init_pool, close_pool, pool_stats
+from security.auth import user_cache_stats
+from security.tokens import claims_cache
+from cache import table_versions
+from version_listener import start_version_listener, stop_version_listener
+from response_cache import ResponseCacheMiddleware, CachePolicy, response_cache_stats
+from metrics import MetricsMiddleware, render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from query_trace import QueryTraceMiddleware, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from routers.asignacion import TABLAS_ASIGNACIONES
+from security.passwords import configure as configure_passwords, start_hashing_pool, shutdown_hashing_pool, hashing_stats
+
+# Seleccionar la capa de acceso a datos al iniciar (DB_MODE=sync|async)
+if Config.DB_MODE == "async":
+    from routers.aio.login import router as login_router
+    from routers.aio.user import router as user_router
+    from routers.aio import asignacion, estudiante, estudio, profesores
+    from db_async import init_async_pool, close_async_pool, async_pool_stats
+else:
+    from routers.login import router as login_router 
+    from routers.user import router as user_router  
+    from routers import asignacion, estudiante, estudio, profesores 
+
+# Abrir los pools de conexiones y de contraseñas al iniciar y cerrarlos al apagar la aplicación
+# (el pool síncrono siempre se abre: /usuarios sigue usando psycopg2).
+# El costo de los hashes se calibra aquí contra HASH_LATENCY_BUDGET_MS, y se empieza
+# a seguir las versiones de tablas de la base (ETag y caché de respuestas).
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_pool()
+    if Config.DB_MODE == "async":
+        await init_async_pool()
+    configure_passwords()
+    start_hashing_pool()
+    start_version_listener()
+    try:
+        yield
+    finally:
+        stop_version_listener()
+        shutdown_hashing_pool()
+        if Config.DB_MODE == "async":
+            await close_async_pool()
+        close_pool()
 
 # Crear la aplicación FastAPI
+# JSON con orjson por defecto; envuelto en Default() para que los endpoints con
+# response_model sigan serializando directamente con Pydantic
 app = FastAPI(
     title="API Escuela",
     description="API para gestión escolar",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=Default(FastJSONResponse)
 )
 
+# Caché de respuestas: rutas GET de lectura frecuente y las tablas que leen.
+# La clave incluye el rol del token (y el usuario en las rutas personales); las
+# escrituras de los routers invalidan las entradas de las tablas que modifican.
+# Se registra antes que CORS para quedar por dentro: las cabeceras CORS dependen del Origin.
+app.add_middleware(ResponseCacheMiddleware, policies={
+    "/estudiantes/estudiante_view": CachePolicy(tables=("estudiantes",)),
+    "/profesores/profesores/list": CachePolicy(tables=("profesores",)),
+    "/profesores/profesores_get/": CachePolicy(tables=("profesores",)),
+    "/estudios/estudios_get/": CachePolicy(tables=("estudios",)),
+    "/asignaciones/all": CachePolicy(tables=TABLAS_ASIGNACIONES, ttl=30),
+    "/asignaciones/estudiante": CachePolicy(tables=TABLAS_ASIGNACIONES, ttl=30, personal=True),
+    "/asignaciones/profesor": CachePolicy(tables=TABLAS_ASIGNACIONES, ttl=30, personal=True),
+})
+
 # Configuración de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,8 +82,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # cursor de la página siguiente, versión de las listas y consultas de la petición (DEBUG)
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
 )
 
+# Métricas por ruta (latencia, tiempo en la base, en curso y códigos); la más externa
+# para medir también la caché de respuestas y CORS
+app.add_middleware(MetricsMiddleware)
+
+# Traza de consultas SQL por petición y log de consultas lentas (SLOW_QUERY_MS);
+# con DEBUG añade X-Query-Count / X-Query-Time a todas las respuestas
+app.add_middleware(QueryTraceMiddleware, debug=Config.DEBUG)
+
 # Registrar los routers
 app.include_router(estudiante.router, prefix="/estudiantes", tags=["Estudiantes"])
 app.include_router(profesores.router, prefix="/profesores", tags=["Profesores"])
@@ -39,6 +110,34 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "OK", "message": "La API está funcionando correctamente"}
+
+# Estadísticas del pool de conexiones a la base de datos
+@app.get("/health/pool")
+def pool_health():
+    stats = {"mode": Config.DB_MODE, "sync": pool_stats()}
+    if Config.DB_MODE == "async":
+        stats["async"] = async_pool_stats()
+    return stats
+
+# Estadísticas de las cachés (autenticación, versiones de tablas y respuestas)
+@app.get("/health/cache")
+def cache_health():
+    return {
+        "usuarios": user_cache_stats(),
+        "tokens": claims_cache.stats(),
+        "versiones": table_versions.stats(),
+        "respuestas": response_cache_stats(),
+    }
+
+# Métricas en formato de texto de Prometheus
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+# Estadísticas del servicio de contraseñas (parámetros, en ejecución, en cola y rechazadas)
+@app.get("/health/hashing")
+def hashing_health():
+    return hashing_stats()
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Iniciando el servidor de la API...")
@@ -0,0 +1,179 @@
+"""
+Métricas de la API en formato de texto de Prometheus (GET /metrics).
+
+- http_requests_total{method, route, status}: peticiones terminadas por código
+- http_request_duration_seconds{method, route}: histograma de latencia total
+- http_request_db_seconds{method, route}: histograma del tiempo en la base por petición
+- http_requests_in_flight: peticiones en curso
+- db_query_duration_seconds{driver}: histograma por consulta (lo alimenta
+  query_trace.record desde los cursores de psycopg2 y las conexiones de asyncpg)
+
+`route` es la plantilla de la ruta (/estudiantes/{id}), no la URL, para que el
+número de series no crezca con los ids. El camino caliente solo suma contadores
+bajo un lock por métrica.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los buckets en segundos (de 1 ms a 10 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge:
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount):
+        with self._lock:
+            self._value += amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self._value}"
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [conteo por bucket (+Inf al final), suma]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+REQUESTS = Counter("http_requests_total", "Peticiones HTTP terminadas", ("method", "route", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route"))
+DB_TIME = Histogram("http_request_db_seconds", "Tiempo en la base de datos por petición", ("method", "route"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+QUERIES = Histogram("db_query_duration_seconds", "Duración de cada consulta a la base de datos", ("driver",))
+
+_METRICS = (REQUESTS, LATENCY, DB_TIME, IN_FLIGHT, QUERIES)
+
+
+def render():
+    """Todas las métricas en formato de texto de Prometheus"""
+    return "\n".join(line for metric in _METRICS for line in metric.render()) + "\n"
+
+
+class _RequestTimer:
+    """Tiempo en la base acumulado por la petición en curso (mutable: lo suman también los hilos)"""
+    __slots__ = ("db_seconds",)
+
+    def __init__(self):
+        self.db_seconds = 0.0
+
+
+_current = contextvars.ContextVar("metrics_request", default=None)
+
+
+def record_query(driver, seconds):
+    """Registra una consulta y la suma al tiempo en la base de la petición en curso"""
+    QUERIES.observe(seconds, driver)
+    timer = _current.get()
+    if timer is not None:
+        timer.db_seconds += seconds
+
+
+def _route_template(scope):
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is not None:
+        # La ruta de un router incluido no lleva su prefijo (/{id} en /estudiantes/{id}):
+        # se toma de la URL, quitando tantos segmentos como tenga la plantilla
+        segmentos = scope["path"].split("/")
+        prefijo = "/".join(segmentos[:len(segmentos) - path_format.count("/")])
+        return prefijo + path_format
+    # Respuestas servidas por la caché de respuestas (no pasan por el router)
+    return scope.get("route_path", "sin_ruta")
+
+
+class MetricsMiddleware:
+    """Middleware ASGI con latencia, tiempo en la base, en curso y códigos por ruta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = _RequestTimer()
+        token = _current.set(timer)
+        status = 500
+        start = time.perf_counter()
+        IN_FLIGHT.add(1)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.add(-1)
+            _current.reset(token)
+            method, route = scope["method"], _route_template(scope)
+            REQUESTS.inc(method, route, status)
+            LATENCY.observe(elapsed, method, route)
+            DB_TIME.observe(timer.db_seconds, method, route)
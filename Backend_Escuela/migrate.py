@@ -0,0 +1,175 @@
+"""
+Migraciones versionadas del esquema escuela.
+
+Cada archivo de migrations/ se llama NNN_descripcion.sql y se aplica una sola vez,
+en orden; las aplicadas se registran en la tabla schema_migrations. Un archivo que
+empieza con "-- migrate: no-transaction" se ejecuta sentencia por sentencia fuera
+de una transacción (necesario para CREATE INDEX CONCURRENTLY).
+
+Uso:
+    python migrate.py            # aplica las migraciones pendientes
+    python migrate.py status     # muestra las aplicadas y las pendientes
+"""
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+import psycopg2
+from config import Config
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+
+# Clave del advisory lock: evita que dos procesos apliquen migraciones a la vez
+LOCK_KEY = 724_5001
+
+_NOMBRE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+_INDICE_CONCURRENTE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE
+)
+
+
+class Migration:
+    def __init__(self, path):
+        match = _NOMBRE.match(path.name)
+        self.path = path
+        self.version = int(match.group(1))
+        self.nombre = match.group(2)
+        self.sql = path.read_text(encoding="utf-8")
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+    def statements(self):
+        """Sentencias del archivo (solo para migraciones sin transacción: no admite bloques $$)"""
+        for chunk in self.sql.split(";"):
+            lines = [l for l in chunk.splitlines() if l.strip() and not l.strip().startswith("--")]
+            if lines:
+                yield "\n".join(lines)
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    migrations = [Migration(p) for p in sorted(directory.glob("*.sql")) if _NOMBRE.match(p.name)]
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise SystemExit("Hay dos migraciones con el mismo número de versión")
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            aplicada_en TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def applied_migrations(cur):
+    cur.execute("SELECT version, checksum FROM schema_migrations")
+    return {version: checksum for version, checksum in cur.fetchall()}
+
+
+def _drop_invalid_index(cur, statement):
+    # Un CREATE INDEX CONCURRENTLY interrumpido deja un índice inválido que IF NOT EXISTS
+    # no volvería a crear: se elimina antes de reintentar
+    match = _INDICE_CONCURRENTE.search(statement)
+    if not match:
+        return
+    cur.execute("""
+        SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = %s AND NOT i.indisvalid
+    """, (match.group(1),))
+    if cur.fetchone():
+        print(f"  eliminando índice inválido {match.group(1)}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+
+def apply_migration(conn, migration):
+    record = "INSERT INTO schema_migrations (version, nombre, checksum) VALUES (%s, %s, %s)"
+    values = (migration.version, migration.nombre, migration.checksum)
+    if migration.transactional:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                cur.execute(migration.sql)
+                cur.execute(record, values)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+    else:
+        with conn.cursor() as cur:
+            for statement in migration.statements():
+                _drop_invalid_index(cur, statement)
+                cur.execute(statement)
+            cur.execute(record, values)
+
+
+def migrate(dsn, directory=MIGRATIONS_DIR):
+    migrations = load_migrations(directory)
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+            ensure_table(cur)
+            applied = applied_migrations(cur)
+
+        for migration in migrations:
+            if migration.version in applied:
+                if applied[migration.version] != migration.checksum:
+                    print(f"Aviso: {migration.path.name} cambió después de aplicarse")
+                continue
+            modo = "transacción" if migration.transactional else "sin transacción"
+            print(f"Aplicando {migration.path.name} ({modo})...")
+            apply_migration(conn, migration)
+        print("Esquema al día")
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+        conn.close()
+
+
+def status(dsn, directory=MIGRATIONS_DIR):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            ensure_table(cur)
+            applied = applied_migrations(cur)
+    finally:
+        conn.close()
+    for migration in load_migrations(directory):
+        if migration.version not in applied:
+            estado = "pendiente"
+        elif applied[migration.version] != migration.checksum:
+            estado = "aplicada (modificada después)"
+        else:
+            estado = "aplicada"
+        print(f"{migration.path.name:<40} {estado}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema escuela")
+    parser.add_argument("comando", nargs="?", choices=["up", "status"], default="up")
+    parser.add_argument("--dsn", default=Config.DATABASE_URI, help="Cadena de conexión (por defecto DATABASE_URI)")
+    args = parser.parse_args(argv)
+    try:
+        if args.comando == "status":
+            status(args.dsn)
+        else:
+            migrate(args.dsn)
+    except psycopg2.Error as e:
+        print(f"Error al aplicar las migraciones: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
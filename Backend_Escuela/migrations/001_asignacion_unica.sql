@@ -0,0 +1,18 @@
+-- Un estudiante se inscribe una sola vez en cada materia
+-- (las escrituras de /asignaciones usan ON CONFLICT (estudiante_id, estudio_id)).
+-- Bases creadas antes de la restricción: se eliminan las inscripciones repetidas,
+-- conservando la más antigua de cada par.
+DELETE FROM asignacion a
+USING asignacion b
+WHERE a.estudiante_id = b.estudiante_id
+  AND a.estudio_id = b.estudio_id
+  AND a.id > b.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_asignacion_estudiante_estudio') THEN
+        ALTER TABLE asignacion
+            ADD CONSTRAINT uq_asignacion_estudiante_estudio UNIQUE (estudiante_id, estudio_id);
+    END IF;
+END
+$$;
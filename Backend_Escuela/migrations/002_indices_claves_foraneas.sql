@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- Índices para las columnas de unión de routers/asignacion.py y del login.
+-- CREATE INDEX CONCURRENTLY no bloquea las escrituras, pero no puede ejecutarse
+-- dentro de una transacción: migrate.py ejecuta cada sentencia por separado.
+--
+-- asignacion.estudiante_id no necesita un índice propio: es la primera columna
+-- de uq_asignacion_estudiante_estudio (001).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asignacion_estudio_id ON asignacion (estudio_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estudios_profesor_id ON estudios (profesor_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estudiantes_usuario_id ON estudiantes (usuario_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profesores_usuario_id ON profesores (usuario_id);
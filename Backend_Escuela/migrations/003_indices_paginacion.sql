@@ -0,0 +1,9 @@
+-- migrate: no-transaction
+-- Índices para la paginación por cursor (pagination.py): el orden es siempre
+-- (campo, id), así que cada página es un recorrido corto del índice.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estudiantes_nombre_id ON estudiantes (nombre, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estudiantes_apellido_id ON estudiantes (apellido, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profesores_nombre_id ON profesores (nombre, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profesores_apellido_id ON profesores (apellido, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profesores_especialidad_id ON profesores (especialidad, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estudios_nombre_id ON estudios (nombre, id);
@@ -0,0 +1,208 @@
+-- Roster precalculado para /asignaciones/profesor.
+--
+-- Una fila por materia con su documento JSON (materia + estudiantes inscritos), de
+-- modo que el endpoint lee las materias de un profesor con un solo recorrido del
+-- índice (profesor_id, nombre) en vez de recalcular estudios ⋈ asignacion ⋈ estudiantes.
+--
+-- Los triggers de asignacion, estudios y estudiantes son por sentencia y usan tablas
+-- de transición: una escritura masiva (p. ej. /asignaciones/batch) recalcula cada
+-- materia afectada una sola vez. Reparación: `python roster.py rebuild`.
+CREATE TABLE IF NOT EXISTS roster_profesor (
+    estudio_id INT PRIMARY KEY,
+    profesor_id INT,
+    nombre VARCHAR(100) NOT NULL,
+    documento JSON NOT NULL,
+    actualizado_en TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_roster_profesor_profesor_nombre
+    ON roster_profesor (profesor_id, nombre, estudio_id);
+
+-- Documento de una materia, con la misma forma que devolvía el endpoint
+CREATE OR REPLACE FUNCTION roster_documento(materia estudios) RETURNS JSON
+LANGUAGE sql STABLE AS $$
+    SELECT json_build_object(
+        'id', materia.id,
+        'nombre', materia.nombre,
+        'descripcion', materia.descripcion,
+        'estudiantes', COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', e.id, 'nombre', e.nombre, 'apellido', e.apellido,
+                'correo', e.correo, 'edad', e.edad,
+                'fecha_inscripcion', a.fecha_inscripcion::text
+            ) ORDER BY e.nombre)
+            FROM asignacion a
+            JOIN estudiantes e ON a.estudiante_id = e.id
+            WHERE a.estudio_id = materia.id
+        ), '[]'::json)
+    )
+$$;
+
+-- Recalcula las filas del roster de las materias indicadas
+CREATE OR REPLACE FUNCTION roster_refrescar(ids INT[]) RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF ids IS NULL OR cardinality(ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    -- Serializa los recálculos de una misma materia entre transacciones concurrentes:
+    -- la sentencia siguiente toma una instantánea nueva y ve las inscripciones que la
+    -- otra transacción acaba de confirmar. FOR NO KEY UPDATE no choca con el
+    -- FOR KEY SHARE de las claves foráneas de asignacion.
+    PERFORM 1 FROM estudios WHERE id = ANY (ids) ORDER BY id FOR NO KEY UPDATE;
+
+    DELETE FROM roster_profesor r
+    WHERE r.estudio_id = ANY (ids)
+      AND NOT EXISTS (SELECT 1 FROM estudios es WHERE es.id = r.estudio_id);
+
+    INSERT INTO roster_profesor AS r (estudio_id, profesor_id, nombre, documento)
+    SELECT es.id, es.profesor_id, es.nombre, roster_documento(es)
+    FROM estudios es
+    WHERE es.id = ANY (ids)
+    ON CONFLICT (estudio_id) DO UPDATE
+        SET profesor_id = EXCLUDED.profesor_id,
+            nombre = EXCLUDED.nombre,
+            documento = EXCLUDED.documento,
+            actualizado_en = now();
+END
+$$;
+
+-- Reconstrucción completa (reparación de consistencia)
+CREATE OR REPLACE FUNCTION roster_reconstruir() RETURNS INT
+LANGUAGE plpgsql AS $$
+DECLARE
+    filas INT;
+BEGIN
+    LOCK TABLE roster_profesor IN EXCLUSIVE MODE;
+    DELETE FROM roster_profesor;
+    INSERT INTO roster_profesor (estudio_id, profesor_id, nombre, documento)
+    SELECT es.id, es.profesor_id, es.nombre, roster_documento(es)
+    FROM estudios es;
+    GET DIAGNOSTICS filas = ROW_COUNT;
+    RETURN filas;
+END
+$$;
+
+-- Triggers de asignacion: materias de las filas nuevas y/o anteriores
+CREATE OR REPLACE FUNCTION roster_asignacion_insert() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM roster_refrescar(ARRAY(SELECT DISTINCT estudio_id FROM nuevas WHERE estudio_id IS NOT NULL));
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION roster_asignacion_update() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM roster_refrescar(ARRAY(
+        SELECT estudio_id FROM nuevas WHERE estudio_id IS NOT NULL
+        UNION
+        SELECT estudio_id FROM anteriores WHERE estudio_id IS NOT NULL
+    ));
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION roster_asignacion_delete() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM roster_refrescar(ARRAY(SELECT DISTINCT estudio_id FROM anteriores WHERE estudio_id IS NOT NULL));
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS roster_asignacion_insert ON asignacion;
+CREATE TRIGGER roster_asignacion_insert
+    AFTER INSERT ON asignacion
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_asignacion_insert();
+
+DROP TRIGGER IF EXISTS roster_asignacion_update ON asignacion;
+CREATE TRIGGER roster_asignacion_update
+    AFTER UPDATE ON asignacion
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_asignacion_update();
+
+DROP TRIGGER IF EXISTS roster_asignacion_delete ON asignacion;
+CREATE TRIGGER roster_asignacion_delete
+    AFTER DELETE ON asignacion
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_asignacion_delete();
+
+-- Triggers de estudios: la propia materia (nombre, descripción o profesor)
+CREATE OR REPLACE FUNCTION roster_estudios_insert() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM roster_refrescar(ARRAY(SELECT id FROM nuevas));
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION roster_estudios_update() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM roster_refrescar(ARRAY(
+        SELECT n.id FROM nuevas n JOIN anteriores o ON o.id = n.id
+        WHERE (n.nombre, n.descripcion, n.profesor_id) IS DISTINCT FROM (o.nombre, o.descripcion, o.profesor_id)
+        UNION
+        -- Cambios de id: la fila anterior se elimina y la nueva se calcula
+        SELECT o.id FROM anteriores o WHERE NOT EXISTS (SELECT 1 FROM nuevas n WHERE n.id = o.id)
+        UNION
+        SELECT n.id FROM nuevas n WHERE NOT EXISTS (SELECT 1 FROM anteriores o WHERE o.id = n.id)
+    ));
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION roster_estudios_delete() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM roster_profesor WHERE estudio_id IN (SELECT id FROM anteriores);
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS roster_estudios_insert ON estudios;
+CREATE TRIGGER roster_estudios_insert
+    AFTER INSERT ON estudios
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_estudios_insert();
+
+DROP TRIGGER IF EXISTS roster_estudios_update ON estudios;
+CREATE TRIGGER roster_estudios_update
+    AFTER UPDATE ON estudios
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_estudios_update();
+
+DROP TRIGGER IF EXISTS roster_estudios_delete ON estudios;
+CREATE TRIGGER roster_estudios_delete
+    AFTER DELETE ON estudios
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_estudios_delete();
+
+-- Trigger de estudiantes: materias de los estudiantes cuyos datos visibles cambiaron
+-- (el borrado se propaga con ON DELETE CASCADE y lo atiende el trigger de asignacion)
+CREATE OR REPLACE FUNCTION roster_estudiantes_update() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM roster_refrescar(ARRAY(
+        SELECT DISTINCT a.estudio_id
+        FROM nuevas n
+        JOIN anteriores o ON o.id = n.id
+        JOIN asignacion a ON a.estudiante_id = n.id
+        WHERE a.estudio_id IS NOT NULL
+          AND (n.nombre, n.apellido, n.correo, n.edad) IS DISTINCT FROM (o.nombre, o.apellido, o.correo, o.edad)
+    ));
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS roster_estudiantes_update ON estudiantes;
+CREATE TRIGGER roster_estudiantes_update
+    AFTER UPDATE ON estudiantes
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION roster_estudiantes_update();
+
+SELECT roster_reconstruir();
@@ -0,0 +1,14 @@
+-- migrate: no-transaction
+-- Búsqueda tolerante a errores de /estudiantes/buscar y /profesores/profesores/buscar
+-- (search_sql en pagination.py).
+-- Índices GIN de trigramas sobre el texto buscable de cada fila: sirven tanto para
+-- el operador de similitud por palabra (<%) como para ILIKE '%texto%'.
+--
+-- La expresión de cada índice debe ser idéntica a DOCUMENTO_ESTUDIANTES y
+-- DOCUMENTO_PROFESORES (routers/estudiante.py y routers/profesores.py) para que
+-- el planificador lo use.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_estudiantes_busqueda_trgm
+    ON estudiantes USING gin ((nombre || ' ' || apellido || ' ' || correo) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profesores_busqueda_trgm
+    ON profesores USING gin ((nombre || ' ' || apellido || ' ' || correo || ' ' || especialidad) gin_trgm_ops);
@@ -0,0 +1,58 @@
+-- Versiones de las tablas para los ETag de las listas y la caché de respuestas.
+--
+-- Los contadores viven en la base para que todos los procesos de la API (uvicorn
+-- --workers N) y los que escriben fuera de ella (generate_data.py, SQL directo)
+-- compartan la misma versión. Triggers por sentencia: una escritura que cambia al
+-- menos una fila incrementa la versión de su tabla y avisa con NOTIFY en el canal
+-- table_versions ('tabla:version'); el aviso se entrega al confirmar la transacción.
+-- Cada proceso lo escucha en version_listener.py.
+--
+-- Las escrituras concurrentes sobre una misma tabla se serializan en su fila de
+-- table_versions hasta el commit (una fila por tabla, sin otra contención).
+CREATE TABLE IF NOT EXISTS table_versions (
+    tabla TEXT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION table_versions_bump() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    nueva BIGINT;
+BEGIN
+    -- Sentencias que no cambiaron filas (p. ej. un UPDATE de un id inexistente)
+    IF TG_OP <> 'TRUNCATE' AND NOT EXISTS (SELECT 1 FROM filas) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO table_versions AS v (tabla, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (tabla) DO UPDATE SET version = v.version + 1
+    RETURNING version INTO nueva;
+    PERFORM pg_notify('table_versions', TG_TABLE_NAME || ':' || nueva);
+    RETURN NULL;
+END
+$$;
+
+-- Tablas que leen las listas con ETag (responses.etag_tables) y la caché de respuestas
+DO $$
+DECLARE
+    tabla TEXT;
+BEGIN
+    FOREACH tabla IN ARRAY ARRAY['estudiantes', 'profesores', 'estudios', 'asignacion'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS table_versions_insert ON %I', tabla);
+        EXECUTE format('CREATE TRIGGER table_versions_insert AFTER INSERT ON %I '
+                       'REFERENCING NEW TABLE AS filas '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION table_versions_bump()', tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS table_versions_update ON %I', tabla);
+        EXECUTE format('CREATE TRIGGER table_versions_update AFTER UPDATE ON %I '
+                       'REFERENCING NEW TABLE AS filas '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION table_versions_bump()', tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS table_versions_delete ON %I', tabla);
+        EXECUTE format('CREATE TRIGGER table_versions_delete AFTER DELETE ON %I '
+                       'REFERENCING OLD TABLE AS filas '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION table_versions_bump()', tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS table_versions_truncate ON %I', tabla);
+        EXECUTE format('CREATE TRIGGER table_versions_truncate AFTER TRUNCATE ON %I '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION table_versions_bump()', tabla);
+    END LOOP;
+END
+$$;
@@ -1,3 +1,5 @@
+from datetime import date
+from typing import List, Optional
 from pydantic import BaseModel, validator
 
 
@@ -6,4 +8,17 @@ from pydantic import BaseModel, validator
 class Asignacion(BaseModel):
     estudiante_id: int
     estudio_id: int
-    fecha_inscripcion: str
\ No newline at end of file
+    fecha_inscripcion: Optional[date] = None  # por defecto, la fecha actual
+
+# Inscripción en lote: cada estudiante de la lista en cada materia de la lista
+class AsignacionLote(BaseModel):
+    estudiante_ids: List[int]
+    estudio_ids: List[int]
+    fecha_inscripcion: Optional[date] = None  # por defecto, la fecha actual
+
+    @validator('estudiante_ids', 'estudio_ids')
+    def validar_ids(cls, v):
+        if not v:
+            raise ValueError('La lista no puede estar vacía')
+        # Quitar repetidos manteniendo el orden
+        return list(dict.fromkeys(v))
@@ -1,10 +1,22 @@
+from collections import Counter
+from typing import List, Optional
 from pydantic import BaseModel, validator
+
+# Roles de la tabla roles
+ROL_PROFESOR = 1
+ROL_ESTUDIANTE = 2
+ROL_ADMIN = 3
+
 class Usuario(BaseModel):
     nombre: str
     apellido: str
     correo: str
     contrasena: str
     rol_id: int  # Cambiar de rol a rol_id
+    # Datos del perfil vinculado: edad y dirección del estudiante, especialidad del profesor
+    edad: Optional[int] = None
+    direccion: Optional[str] = None
+    especialidad: Optional[str] = None
 
     @validator('correo')
     def validar_correo(cls, v):
@@ -17,3 +29,28 @@ class Usuario(BaseModel):
         if len(v) < 6:
             raise ValueError('La contraseña debe tener al menos 6 caracteres')
         return v
+
+    @validator('rol_id')
+    def validar_rol(cls, v):
+        if v not in (ROL_PROFESOR, ROL_ESTUDIANTE, ROL_ADMIN):
+            raise ValueError('El rol debe ser 1 (Profesor), 2 (Estudiante) o 3 (Admin)')
+        return v
+
+    @validator('especialidad', always=True)
+    def validar_especialidad(cls, v, values):
+        if values.get('rol_id') == ROL_PROFESOR and not v:
+            raise ValueError('La especialidad es obligatoria para los profesores')
+        return v
+
+# Registro en lote: una lista de clase completa en una sola petición
+class UsuarioLote(BaseModel):
+    usuarios: List[Usuario]
+
+    @validator('usuarios')
+    def validar_usuarios(cls, v):
+        if not v:
+            raise ValueError('La lista no puede estar vacía')
+        repetidos = sorted(c for c, n in Counter(u.correo for u in v).items() if n > 1)
+        if repetidos:
+            raise ValueError(f"Correos repetidos en la lista: {', '.join(repetidos)}")
+        return v
@@ -0,0 +1,216 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Query
+from config import Config
+
+# Cabecera con el cursor de la página siguiente (el cuerpo sigue siendo una lista)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def cursor_int(value):
+    """Valor entero de un cursor (ids); ValueError si el cursor trae otra cosa"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Se esperaba un entero: {value!r}")
+    return value
+
+
+def cursor_text(value):
+    """Valor de texto de un cursor (puede ser NULL); ValueError si el cursor trae otra cosa"""
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"Se esperaba texto: {value!r}")
+    return value
+
+
+@dataclass(frozen=True)
+class SortField:
+    """Columna por la que se puede ordenar: expresión SQL, clave en la fila y conversión del cursor"""
+    expr: str
+    key: str
+    parse: Callable = lambda value: value
+
+
+class QueryBuilder:
+    """
+    Acumula condiciones WHERE y sus parámetros posicionales.
+
+    `paramstyle` es "format" (%s, psycopg2) o "numeric" ($1, asyncpg), de modo que
+    los routers síncronos y asíncronos comparten la misma lógica.
+    """
+
+    def __init__(self, paramstyle="format"):
+        self.paramstyle = paramstyle
+        self.params = []
+        self.conditions = []
+
+    def param(self, value):
+        self.params.append(value)
+        return "%s" if self.paramstyle == "format" else f"${len(self.params)}"
+
+    def where(self, clause, *values):
+        """Agrega una condición; cada `{}` de `clause` se reemplaza por el parámetro correspondiente"""
+        self.conditions.append(clause.format(*(self.param(v) for v in values)))
+
+    def where_if(self, value, clause):
+        """Agrega la condición solo si el filtro fue enviado"""
+        if value is not None:
+            self.where(clause, value)
+
+    def where_sql(self):
+        return f" WHERE {' AND '.join(self.conditions)}" if self.conditions else ""
+
+
+@dataclass
+class PageParams:
+    """Parámetros comunes de paginación: limit, cursor y sort"""
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    sort: Optional[str] = None
+
+    @property
+    def paginated(self):
+        return self.limit is not None or self.cursor is not None
+
+
+def page_params(
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (sin limit se devuelven todos los registros)"),
+    cursor: Optional[str] = Query(None, description=f"Cursor de la página siguiente (cabecera {NEXT_CURSOR_HEADER})"),
+    sort: Optional[str] = Query(None, description="Campo de orden; prefijo '-' para orden descendente"),
+):
+    """Dependencia con los parámetros de paginación de los endpoints de listas"""
+    if limit is not None:
+        limit = min(limit, Config.PAGE_MAX_LIMIT)
+    elif cursor is not None:
+        limit = Config.PAGE_DEFAULT_LIMIT
+    return PageParams(limit=limit, cursor=cursor, sort=sort)
+
+
+def like_prefix(value):
+    """Patrón LIKE 'empieza por' con los comodines del usuario escapados (None si no hay filtro)"""
+    if value is None:
+        return None
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def like_contains(value):
+    """Patrón LIKE 'contiene' con los comodines del usuario escapados"""
+    return "%" + like_prefix(value)
+
+
+@dataclass
+class SearchParams:
+    """Parámetros de los endpoints de búsqueda: texto y cantidad de resultados"""
+    q: str
+    limit: int
+
+
+def search_params(
+    q: str = Query(..., min_length=3, max_length=100,
+                   description="Texto a buscar (mínimo 3 caracteres: los índices de trigramas no sirven con menos)"),
+    limit: Optional[int] = Query(None, ge=1, description="Cantidad máxima de resultados"),
+):
+    """Dependencia con los parámetros de búsqueda"""
+    limit = min(limit or Config.SEARCH_DEFAULT_LIMIT, Config.SEARCH_MAX_LIMIT)
+    return SearchParams(q=q.strip(), limit=limit)
+
+
+def search_sql(qb, table, columns, document, search):
+    """
+    Búsqueda tolerante a errores sobre la expresión `document` de `table`.
+
+    Coinciden las filas que contienen el texto (ILIKE) o que tienen una palabra
+    parecida (operador <% de pg_trgm, umbral pg_trgm.word_similarity_threshold);
+    se ordenan por similitud. `document` debe ser idéntico a la expresión del
+    índice GIN de trigramas (migrations/005_busqueda_trigram.sql) para que se use.
+    """
+    similitud = f"word_similarity({qb.param(search.q)}, {document})"
+    # psycopg2 interpreta '%' en el texto de la consulta: el operador se escribe '<%%'
+    operador = "<%%" if qb.paramstyle == "format" else "<%"
+    qb.where(f"({document} ILIKE {{}} OR {{}} {operador} {document})", like_contains(search.q), search.q)
+    return (f"SELECT {columns}, {similitud} AS similitud FROM {table}{qb.where_sql()}"
+            f" ORDER BY similitud DESC, id LIMIT {qb.param(search.limit)}")
+
+
+def _to_json(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_cursor(sort, values):
+    raw = json.dumps({"s": sort, "v": [_to_json(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        values = data["v"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if data.get("s") != sort:
+        raise HTTPException(status_code=400, detail="El cursor no corresponde al orden solicitado")
+    return values
+
+
+def _parse_sort(sort, fields, default):
+    sort = sort or default
+    name = sort.lstrip("-")
+    if name not in fields:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Orden inválido: {name}. Opciones: {', '.join(fields)}",
+        )
+    return sort, name, sort.startswith("-")
+
+
+def order_and_limit(qb, page, fields, default_sort="id", legacy_order=""):
+    """
+    Agrega la condición del cursor a `qb` y devuelve el ORDER BY / LIMIT.
+
+    El orden es siempre estable: (campo, id), así que el cursor de la última fila
+    indica exactamente dónde continuar sin OFFSET. Sin limit ni sort se mantiene
+    el orden original del endpoint (`legacy_order`).
+    """
+    if not page.paginated and page.sort is None:
+        return legacy_order
+    sort, name, desc = _parse_sort(page.sort, fields, default_sort)
+    field, pk = fields[name], fields["id"]
+    direction, op = ("DESC", "<") if desc else ("ASC", ">")
+
+    if page.cursor is not None:
+        values = decode_cursor(page.cursor, sort)
+        if not isinstance(values, list) or len(values) != (1 if name == "id" else 2):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        # Los valores del cursor llegan del cliente: se validan antes de enviarlos a la base
+        try:
+            parsed = [pk.parse(values[0])] if name == "id" else [field.parse(values[0]), pk.parse(values[1])]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        if name == "id":
+            qb.where(f"{pk.expr} {op} {{}}", *parsed)
+        else:
+            qb.where(f"({field.expr}, {pk.expr}) {op} ({{}}, {{}})", *parsed)
+
+    order = f" ORDER BY {pk.expr} {direction}" if name == "id" else f" ORDER BY {field.expr} {direction}, {pk.expr} {direction}"
+    if page.limit is not None:
+        # Una fila extra indica si existe una página siguiente
+        order += f" LIMIT {int(page.limit) + 1}"
+    return order
+
+
+def split_page(rows, page, fields, default_sort="id"):
+    """Recorta la fila extra y devuelve (filas, cursor siguiente o None)"""
+    if page.limit is None or len(rows) <= page.limit:
+        return rows, None
+    rows = rows[:page.limit]
+    sort, name, _ = _parse_sort(page.sort, fields, default_sort)
+    last = rows[-1]
+    keys = [fields["id"].key] if name == "id" else [fields[name].key, fields["id"].key]
+    return rows, encode_cursor(sort, [last[k] for k in keys])
+
+
+def set_next_cursor(response, cursor):
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,129 @@
+"""
+Traza de las consultas SQL de cada petición.
+
+Los cursores de psycopg2 (db.TracedCursor) y las conexiones de asyncpg
+(db_async.TracedConnection) llaman a `record` por cada sentencia; la traza de la
+petición en curso (abierta por QueryTraceMiddleware) acumula:
+
+- el número de consultas y el tiempo total en la base (también usado por /metrics)
+- con DEBUG, cada sentencia con su duración y filas afectadas, y las cabeceras
+  X-Query-Count / X-Query-Time en la respuesta
+
+Las consultas que superan SLOW_QUERY_MS se registran en el log `query_trace` con la
+sentencia y los tipos de sus parámetros, nunca sus valores (contraseñas, correos).
+
+Para fijar un presupuesto de consultas fuera de una petición (scripts, pruebas):
+
+    with trace_queries() as trace:
+        ...
+    assert trace.count <= 2, trace.statements
+"""
+import contextvars
+import logging
+from contextlib import contextmanager
+
+from config import Config
+from metrics import record_query
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_TIME_HEADER = "X-Query-Time"  # milisegundos
+
+
+class QueryTrace:
+    """Consultas de una petición (mutable: la comparten los hilos del threadpool)"""
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        # (sentencia, segundos, filas) de cada consulta, solo si se piden
+        self.statements = [] if keep_statements else None
+
+
+_current = contextvars.ContextVar("query_trace", default=None)
+
+
+def current_trace():
+    """Traza de la petición en curso (None fuera de una petición)"""
+    return _current.get()
+
+
+@contextmanager
+def trace_queries(keep_statements=True):
+    """Abre una traza propia y la devuelve al salir con las consultas ejecutadas"""
+    trace = QueryTrace(keep_statements)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def redact(params):
+    """Tipos de los parámetros en lugar de sus valores"""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+
+def record(driver, statement, params, seconds, rows=None):
+    """
+    Registra una sentencia ejecutada.
+
+    @param statement: texto de la sentencia (o una función que lo devuelve, para no
+        armarlo si no se usa)
+    @param rows: filas afectadas o devueltas (None si el driver no lo informa)
+    """
+    record_query(driver, seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.count += 1
+        trace.seconds += seconds
+    slow = seconds * 1000 >= Config.SLOW_QUERY_MS
+    if not slow and (trace is None or trace.statements is None):
+        return
+    text = statement() if callable(statement) else statement
+    text = " ".join(text.split())
+    if trace is not None and trace.statements is not None:
+        trace.statements.append((text, seconds, rows))
+    if slow:
+        logger.warning("Consulta lenta (%s, %.1f ms, filas: %s): %s -- parámetros: %s",
+                       driver, seconds * 1000, "?" if rows is None else rows, text, redact(params))
+
+
+class QueryTraceMiddleware:
+    """Middleware ASGI que abre la traza de cada petición y, con DEBUG, añade sus cabeceras"""
+
+    def __init__(self, app, debug=False):
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = QueryTrace(keep_statements=self.debug)
+        token = _current.set(trace)
+
+        async def send_wrapper(message):
+            if self.debug and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode("latin-1"), str(trace.count).encode("latin-1")))
+                headers.append((QUERY_TIME_HEADER.lower().encode("latin-1"), f"{trace.seconds * 1000:.2f}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if self.debug and trace.statements:
+                logger.debug("%s %s: %d consultas, %.2f ms\n%s", scope["method"], scope["path"],
+                             trace.count, trace.seconds * 1000,
+                             "\n".join(f"  {s * 1000:7.2f} ms  filas: {'?' if r is None else r}  {q}"
+                                       for q, s, r in trace.statements))
@@ -0,0 +1,168 @@
+"""
+Caché de respuestas HTTP para los GET de lectura frecuente.
+
+Cada ruta cacheada declara su TTL y las tablas que lee (CachePolicy). La clave
+incluye la ruta, la query string, el rol del token y el que resuelve la
+autenticación (y el usuario en las rutas personales, como /asignaciones/estudiante)
+y las versiones de esas tablas
+(cache.table_versions), así que una escritura confirmada deja de servir las
+respuestas anteriores de inmediato; además, las entradas que dependen de la tabla
+modificada se eliminan en el momento para liberar espacio.
+
+Solo se guardan respuestas 200 de hasta RESPONSE_CACHE_MAX_BYTES; al superar
+RESPONSE_CACHE_SIZE entradas se descarta la usada hace más tiempo (LRU).
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from jose import JWTError
+from starlette.datastructures import Headers
+from cache import TTLCache, table_versions
+from config import Config
+from responses import etag_matches
+from security.auth import user_cache, user_from_claims
+from security.tokens import decode_access_token, is_revoked
+
+CACHE_HEADER = "X-Cache"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Cómo se cachea una ruta: tablas que lee, TTL y si la respuesta es personal"""
+    tables: tuple
+    ttl: Optional[float] = None  # por defecto RESPONSE_CACHE_TTL
+    personal: bool = False  # la clave incluye al usuario, no solo su rol
+
+
+class _Entry:
+    __slots__ = ("tables", "status", "headers", "body", "etag")
+
+    def __init__(self, tables, status, headers, body):
+        self.tables = tables
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = Headers(raw=headers).get("etag")
+
+
+response_cache = TTLCache(maxsize=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+
+
+def _invalidate(tables):
+    changed = set(tables)
+    response_cache.discard_where(lambda entry: not changed.isdisjoint(entry.tables))
+
+
+table_versions.subscribe(_invalidate)
+
+
+def _resolved_role(claims):
+    """
+    Rol con el que la autenticación (get_current_user) resuelve al usuario: el de los
+    claims en los tokens sin estado y, en los demás, el de la caché de usuarios, que
+    refleja la base de datos y no el rol con el que se emitió el token.
+    None si el usuario todavía no se consultó.
+    """
+    user = user_from_claims(claims) or user_cache.get(claims["sub"])
+    return None if user is None else user["rol_id"]
+
+
+def _identity(headers, policy):
+    """
+    (rol del token, rol resuelto, usuario) de la petición; None si no se puede cachear
+    (token inválido o revocado: el endpoint responderá el error correspondiente; o
+    usuario sin resolver: el endpoint lo consulta y la siguiente petición ya se cachea).
+    """
+    authorization = headers.get("authorization")
+    if not authorization:
+        return None if policy.personal else ("anonimo", None, None)
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        claims = decode_access_token(token)
+    except JWTError:
+        return None
+    if claims.get("sub") is None or is_revoked(claims):
+        return None
+    rol = _resolved_role(claims)
+    if rol is None:
+        return None
+    return claims.get("rol_id"), rol, claims["sub"] if policy.personal else None
+
+
+class ResponseCacheMiddleware:
+    """Middleware ASGI: responde desde la caché o guarda la respuesta del endpoint"""
+
+    def __init__(self, app, policies):
+        self.app = app
+        self.policies = policies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.policies:
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policies[scope["path"]]
+        headers = Headers(scope=scope)
+        identity = _identity(headers, policy)
+        if identity is None:
+            await self.app(scope, receive, send)
+            return
+
+        versions = table_versions.etag(*policy.tables)
+        if versions is None:
+            # Versión de las tablas desconocida por un momento (ver cache.TableVersions)
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"], *identity, versions)
+        entry = response_cache.get(key)
+        if entry is not None:
+            # Sin pasar por el router: la ruta para las métricas es la de la política
+            scope["route_path"] = scope["path"]
+            await self._send_cached(entry, headers, send)
+            return
+
+        await self._call_and_store(scope, receive, send, key, policy)
+
+    async def _send_cached(self, entry, headers, send):
+        if entry.etag and etag_matches(headers.get("if-none-match"), entry.etag):
+            raw = [(b"etag", entry.etag.encode("latin-1")), (b"cache-control", b"no-cache")]
+            await send({"type": "http.response.start", "status": 304, "headers": raw + [(b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + [(b"x-cache", b"HIT")]})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    async def _call_and_store(self, scope, receive, send, key, policy):
+        start = None
+        chunks = []
+        size = 0
+        cacheable = True
+
+        async def send_wrapper(message):
+            nonlocal start, size, cacheable
+            if message["type"] == "http.response.start":
+                cacheable = message["status"] == 200
+                start = message
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and cacheable:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > Config.RESPONSE_CACHE_MAX_BYTES:
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+                    if not message.get("more_body", False):
+                        headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"set-cookie"]
+                        entry = _Entry(policy.tables, start["status"], headers, b"".join(chunks))
+                        response_cache.set(key, entry, ttl=policy.ttl)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def response_cache_stats():
+    return response_cache.stats()
@@ -0,0 +1,96 @@
+"""
+Respuestas JSON rápidas.
+
+FastJSONResponse serializa con orjson (si está instalado) y es la clase de respuesta
+por defecto de la app. Los endpoints de listas devuelven las filas de la base con
+json_rows: la respuesta se construye directamente, sin copiar cada fila a un dict
+nuevo ni pasar por jsonable_encoder / response_model, ya que los datos vienen de
+nuestras propias tablas y no necesitan validarse otra vez.
+
+Las listas llevan además un ETag fuerte armado con las versiones de las tablas que
+leen (cache.table_versions); con If-None-Match vigente se responde 304 sin consultar
+la base.
+"""
+import json
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from cache import table_versions
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+def _default(value):
+    # asyncpg.Record y otros mapeos de solo lectura
+    if hasattr(value, "items"):
+        return dict(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(content):
+    """Serializa a bytes JSON (orjson o, en su defecto, json de la biblioteca estándar)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+
+def json_rows(rows, response=None):
+    """
+    Respuesta con las filas tal como salen de la base (RealDictRow o asyncpg.Record).
+
+    `response` es la Response inyectada en el endpoint: sus cabeceras (p. ej.
+    X-Next-Cursor) se copian, porque FastAPI no las combina cuando el endpoint
+    devuelve su propia Response.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(rows, headers=headers)
+
+
+def json_response(documento):
+    """Respuesta con JSON ya generado (p. ej. por Postgres), sin volver a serializarlo"""
+    return Response(content=documento, media_type="application/json")
+
+
+def etag_matches(if_none_match, etag):
+    """Comparación débil de If-None-Match (lista separada por comas o "*")"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def check_etag(request, response, *tables):
+    """
+    GET condicional para una respuesta que depende de `tables`: responde 304 si el
+    cliente ya tiene la versión vigente; si no, deja el ETag en `response`.
+    Sin versión conocida (escritura reciente aún no leída de la base) no hay ETag.
+    """
+    etag = table_versions.etag(*tables)
+    if etag is None:
+        response.headers["Cache-Control"] = "no-cache"
+        return
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    # El navegador guarda la lista pero la revalida siempre con If-None-Match
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def etag_tables(*tables):
+    """
+    Dependencia de ruta con check_etag. Declarada en `dependencies=[...]` se
+    resuelve antes que get_db, así que un 304 no usa la base de datos.
+    """
+    def dependency(request: Request, response: Response):
+        check_etag(request, response, *tables)
+    return dependency
@@ -0,0 +1,82 @@
+"""
+Mantenimiento de roster_profesor (migrations/004_roster_profesor.sql).
+
+Los triggers mantienen el roster al día; este comando sirve para verificarlo y
+repararlo si alguna escritura lo esquivó (p. ej. un TRUNCATE o una carga hecha con
+los triggers desactivados).
+
+Uso:
+    python roster.py check      # lista las materias cuyo roster no coincide (código 1 si hay)
+    python roster.py rebuild    # reconstruye el roster completo
+"""
+import argparse
+import sys
+
+import psycopg2
+from config import Config
+
+# Materias cuyo documento guardado difiere del calculado desde las tablas
+SQL_DIFERENCIAS = """
+    SELECT COALESCE(es.id, r.estudio_id) AS estudio_id,
+           CASE WHEN r.estudio_id IS NULL THEN 'falta en el roster'
+                WHEN es.id IS NULL THEN 'la materia ya no existe'
+                ELSE 'desactualizada' END AS problema
+    FROM estudios es
+    FULL JOIN roster_profesor r ON r.estudio_id = es.id
+    WHERE r.estudio_id IS NULL
+       OR es.id IS NULL
+       OR r.profesor_id IS DISTINCT FROM es.profesor_id
+       OR r.nombre IS DISTINCT FROM es.nombre
+       OR r.documento::text IS DISTINCT FROM roster_documento(es)::text
+    ORDER BY 1
+"""
+
+
+def check(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SQL_DIFERENCIAS)
+            diferencias = cur.fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+    for estudio_id, problema in diferencias:
+        print(f"materia {estudio_id}: {problema}")
+    return diferencias
+
+
+def rebuild(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT roster_reconstruir()")
+            filas = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificar o reconstruir roster_profesor")
+    parser.add_argument("comando", choices=["check", "rebuild"])
+    parser.add_argument("--dsn", default=Config.DATABASE_URI, help="Cadena de conexión (por defecto DATABASE_URI)")
+    args = parser.parse_args(argv)
+    try:
+        if args.comando == "rebuild":
+            print(f"Roster reconstruido: {rebuild(args.dsn)} materias")
+            return 0
+        diferencias = check(args.dsn)
+    except psycopg2.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if diferencias:
+        print(f"\n{len(diferencias)} materia(s) con el roster inconsistente: ejecutar `python roster.py rebuild`")
+        return 1
+    print("Roster consistente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
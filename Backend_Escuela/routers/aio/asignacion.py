@@ -0,0 +1,233 @@
+# routers/aio/asignacion.py
+# Versión asíncrona (asyncpg) de routers/asignacion.py, activa con DB_MODE=async
+from datetime import date
+import asyncpg
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from config import Config
+from db_async import get_async_db, async_connection
+from security.auth import get_token_claims
+from pagination import QueryBuilder, PageParams, page_params, order_and_limit, split_page, set_next_cursor
+from models.asignacion import Asignacion, AsignacionLote
+from routers.asignacion import (ORDEN_ASIGNACIONES, COLUMNAS_ASIGNACIONES, SELECT_ASIGNACIONES, SQL_ASIGNACION_LOTE,
+                                SQL_ASIGNACIONES_ESTUDIANTE, SQL_ASIGNACIONES_PROFESOR, FILTRO_POR_CORREO, FILTRO_POR_ID,
+                                etag_asignaciones, filtros_asignaciones, formatear_asignacion, resumen_lote, validar_tamano_lote)
+from streaming import csv_header, csv_batch, ndjson_batch, export_response
+from responses import json_response, json_rows
+from cache import table_versions
+
+# Crear router para las rutas de asignación
+router = APIRouter(tags=["asignaciones"])
+
+@router.get("/estudiante")
+async def get_asignacion_estudiante(user_data: dict = Depends(get_token_claims), conn=Depends(get_async_db)):
+    """
+    Endpoint para obtener las asignaciones de un estudiante
+    Solo accesible para usuarios con rol de Estudiante
+    """
+    # Verificar que el usuario sea un estudiante
+    if user_data.get("rol_id") != 2:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para estudiantes.")
+
+    # Token sin estado: el estudiante vinculado ya viene en los claims
+    if user_data.get("estudiante_id") is not None:
+        filtro, valor = FILTRO_POR_ID, user_data["estudiante_id"]
+    else:
+        filtro, valor = FILTRO_POR_CORREO, user_data["sub"]
+
+    # Estudiante y asignaciones en una sola consulta
+    documento = await conn.fetchval(SQL_ASIGNACIONES_ESTUDIANTE.format(filtro=filtro.format("$1")), valor)
+    if documento is None:
+        raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+    return json_response(documento)
+
+@router.get("/profesor")
+async def get_asignacion_profesor(user_data: dict = Depends(get_token_claims), conn=Depends(get_async_db)):
+    """
+    Endpoint para obtener las materias y estudiantes de un profesor
+    Solo accesible para usuarios con rol de Profesor
+    """
+    # Verificar que el usuario sea un profesor
+    if user_data.get("rol_id") != 1:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para profesores.")
+
+    # Token sin estado: el profesor vinculado ya viene en los claims
+    if user_data.get("profesor_id") is not None:
+        filtro, valor = FILTRO_POR_ID, user_data["profesor_id"]
+    else:
+        filtro, valor = FILTRO_POR_CORREO, user_data["sub"]
+
+    # Profesor, materias y estudiantes en una sola consulta
+    documento = await conn.fetchval(SQL_ASIGNACIONES_PROFESOR.format(filtro=filtro.format("$1")), valor)
+    if documento is None:
+        raise HTTPException(status_code=404, detail="Profesor no encontrado")
+    return json_response(documento)
+
+@router.get("/all", dependencies=[Depends(etag_asignaciones)])
+async def get_asignaciones(
+    response: Response,
+    estudiante_id: Optional[int] = None,
+    estudio_id: Optional[int] = None,
+    profesor_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    page: PageParams = Depends(page_params),
+    user_data: dict = Depends(get_token_claims),
+    conn=Depends(get_async_db),
+):
+    """
+    Endpoint para obtener todas las asignaciones (solo para administradores)
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todas, como antes)
+    qb = QueryBuilder(paramstyle="numeric")
+    filtros_asignaciones(qb, estudiante_id, estudio_id, profesor_id, fecha_desde, fecha_hasta)
+    order = order_and_limit(qb, page, ORDEN_ASIGNACIONES, legacy_order=" ORDER BY e.nombre, es.nombre")
+
+    asignaciones = await conn.fetch(SELECT_ASIGNACIONES + qb.where_sql() + order, *qb.params)
+    asignaciones, next_cursor = split_page(asignaciones, page, ORDEN_ASIGNACIONES)
+    set_next_cursor(response, next_cursor)
+
+    return json_rows([formatear_asignacion(a) for a in asignaciones], response)
+
+# Exportar las asignaciones en streaming (NDJSON o CSV)
+@router.get("/export")
+async def export_asignaciones(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    estudiante_id: Optional[int] = None,
+    estudio_id: Optional[int] = None,
+    profesor_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    sort: Optional[str] = None,
+    user_data: dict = Depends(get_token_claims),
+):
+    """
+    Endpoint para exportar todas las asignaciones (solo para administradores)
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+
+    qb = QueryBuilder(paramstyle="numeric")
+    filtros_asignaciones(qb, estudiante_id, estudio_id, profesor_id, fecha_desde, fecha_hasta)
+    order = order_and_limit(qb, PageParams(sort=sort), ORDEN_ASIGNACIONES, legacy_order=" ORDER BY a.id")
+    sql = SELECT_ASIGNACIONES + qb.where_sql() + order
+
+    async def generar():
+        # La conexión se toma del pool dentro del generador: debe vivir lo que dure el streaming
+        async with async_connection() as conn:
+            async with conn.transaction(readonly=True):
+                cursor = await conn.cursor(sql, *qb.params)
+                if format == "csv":
+                    yield csv_header(COLUMNAS_ASIGNACIONES)
+                while True:
+                    rows = await cursor.fetch(Config.EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    if format == "csv":
+                        yield csv_batch(rows, COLUMNAS_ASIGNACIONES)
+                    else:
+                        yield ndjson_batch(rows, formatear_asignacion)
+
+    return export_response(generar(), format, "asignaciones")
+
+# Endpoints adicionales para CRUD de asignaciones (solo para administradores)
+@router.post("/create")
+async def create_asignacion(
+    estudiante_id: int,
+    estudio_id: int,
+    fecha_inscripcion: Optional[date] = None,
+    user_data: dict = Depends(get_token_claims),
+    conn=Depends(get_async_db),
+):
+    """
+    Endpoint para crear una nueva asignación (solo para administradores)
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+
+    try:
+        asignacion = await conn.fetchrow(
+            """
+            INSERT INTO asignacion (estudiante_id, estudio_id, fecha_inscripcion)
+            VALUES ($1, $2, COALESCE($3::date, CURRENT_DATE))
+            ON CONFLICT (estudiante_id, estudio_id) DO NOTHING
+            RETURNING id, estudiante_id, estudio_id, fecha_inscripcion
+            """,
+            estudiante_id, estudio_id, fecha_inscripcion,
+        )
+    except asyncpg.ForeignKeyViolationError:
+        raise HTTPException(status_code=404, detail="Estudiante o materia no encontrados")
+
+    if asignacion is None:
+        raise HTTPException(status_code=400, detail="El estudiante ya está inscrito en esta materia")
+    table_versions.bump("asignacion")
+    return {"message": "Asignación creada exitosamente", "asignacion": dict(asignacion)}
+
+@router.post("/batch")
+async def create_asignaciones_lote(lote: AsignacionLote, user_data: dict = Depends(get_token_claims), conn=Depends(get_async_db)):
+    """
+    Endpoint para inscribir varios estudiantes en varias materias (solo para administradores)
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+    validar_tamano_lote(lote)
+
+    fila = await conn.fetchrow(
+        SQL_ASIGNACION_LOTE.format("$1", "$2", "$3"),
+        lote.estudiante_ids, lote.estudio_ids, lote.fecha_inscripcion,
+    )
+    if fila["insertadas"]:
+        table_versions.bump("asignacion")
+    return resumen_lote(lote, fila)
+
+@router.put("/update/{id}")
+async def update_asignacion(id: int, asignacion: Asignacion, user_data: dict = Depends(get_token_claims), conn=Depends(get_async_db)):
+    """
+    Endpoint para actualizar una asignación (solo para administradores)
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+
+    try:
+        actualizada = await conn.fetchrow(
+            """
+            UPDATE asignacion
+            SET estudiante_id = $1, estudio_id = $2,
+                fecha_inscripcion = COALESCE($3::date, fecha_inscripcion)
+            WHERE id = $4
+            RETURNING id, estudiante_id, estudio_id, fecha_inscripcion
+            """,
+            asignacion.estudiante_id, asignacion.estudio_id, asignacion.fecha_inscripcion, id,
+        )
+    except asyncpg.UniqueViolationError:
+        raise HTTPException(status_code=400, detail="El estudiante ya está inscrito en esta materia")
+    except asyncpg.ForeignKeyViolationError:
+        raise HTTPException(status_code=404, detail="Estudiante o materia no encontrados")
+
+    if actualizada is None:
+        raise HTTPException(status_code=404, detail="Asignación no encontrada")
+    table_versions.bump("asignacion")
+    return {"message": "Asignación actualizada exitosamente", "asignacion": dict(actualizada)}
+
+@router.delete("/delete/{id}")
+async def delete_asignacion(id: int, user_data: dict = Depends(get_token_claims), conn=Depends(get_async_db)):
+    """
+    Endpoint para eliminar una asignación (solo para administradores)
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+
+    eliminada = await conn.fetchval('DELETE FROM asignacion WHERE id = $1 RETURNING id', id)
+    if eliminada is None:
+        raise HTTPException(status_code=404, detail="Asignación no encontrada")
+    table_versions.bump("asignacion")
+    return {"message": "Asignación eliminada exitosamente"}
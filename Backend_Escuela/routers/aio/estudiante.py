@@ -0,0 +1,186 @@
+# routers/aio/estudiante.py
+# Versión asíncrona (asyncpg) de routers/estudiante.py, activa con DB_MODE=async
+import asyncpg
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from config import Config
+from models.estudiante import Estudiante
+from db_async import get_async_db
+from security.auth_async import verificar_rol
+from bulk_import import detect_format, iter_records, validate_batches, ImportReport
+from pagination import (QueryBuilder, PageParams, page_params, order_and_limit, split_page, set_next_cursor,
+                        SearchParams, search_params, search_sql)
+from responses import json_rows, etag_tables
+from cache import table_versions
+from routers.estudiante import (SELECT_ESTUDIANTES, ORDEN_ESTUDIANTES, filtros_estudiantes, CREAR_TABLA_IMPORTACION,
+                                COLUMNAS_IMPORTACION, DESCARTAR_IMPORTACION_LARGOS, INSERTAR_IMPORTACION,
+                                filas_importacion, separar_existentes, rechazar_no_insertados,
+                                DOCUMENTO_ESTUDIANTES, COLUMNAS_BUSQUEDA_ESTUDIANTES)
+
+router = APIRouter()
+
+# Ruta para crear un nuevo estudiante
+@router.post("/create/", response_model=Estudiante)
+async def create_estudiante(estudiante: Estudiante, conn=Depends(get_async_db)):
+    try:
+        # Insertar el nuevo estudiante; si el correo ya existe no se inserta nada
+        new_estudiante_data = await conn.fetchrow(
+            'INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion) VALUES ($1, $2, $3, $4, $5) ON CONFLICT (correo) DO NOTHING RETURNING id, nombre, apellido, correo, edad, direccion',
+            estudiante.nombre, estudiante.apellido, estudiante.correo, estudiante.edad, estudiante.direccion
+        )
+        if new_estudiante_data is None:
+            raise HTTPException(status_code=400, detail="Ya existe un estudiante con este correo")
+        table_versions.bump("estudiantes")
+
+        return Estudiante(**dict(new_estudiante_data))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al crear el estudiante: {str(e)}")
+
+# Ruta para importar estudiantes de forma masiva (CSV con encabezado o JSON por línea)
+@router.post("/import/", dependencies=[Depends(verificar_rol(3))])
+async def import_estudiantes(
+    file: UploadFile = File(...),
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    dry_run: bool = False,
+    conn=Depends(get_async_db),
+):
+    fmt = detect_format(file, formato)
+    report = ImportReport(max_errors=Config.IMPORT_MAX_ERRORS, dry_run=dry_run)
+    staged = {}  # correo -> línea de las filas cargadas en la tabla temporal
+    lotes = validate_batches(iter_records(file.file, fmt), Estudiante, Config.IMPORT_BATCH_SIZE, unique_field="correo")
+    try:
+        async with conn.transaction():
+            await conn.execute(CREAR_TABLA_IMPORTACION)
+            while True:
+                # Leer y validar cada lote en el threadpool para no bloquear el event loop
+                lote = await run_in_threadpool(next, lotes, None)
+                if lote is None:
+                    break
+                validos, errores = lote
+                report.add_errors(errores)
+                if not validos:
+                    continue
+
+                # Correos ya registrados: una consulta por lote
+                rows = await conn.fetch('SELECT correo FROM estudiantes WHERE correo = ANY($1::text[])', [e.correo for _, e in validos])
+                nuevos = separar_existentes(validos, {row['correo'] for row in rows}, report)
+
+                await conn.copy_records_to_table(
+                    "estudiantes_import", records=filas_importacion(nuevos), columns=COLUMNAS_IMPORTACION
+                )
+                staged.update((e.correo, linea) for linea, e in nuevos)
+
+            largos = await conn.fetch(DESCARTAR_IMPORTACION_LARGOS)
+            report.reject([{"linea": row['linea'], "correo": row['correo'], "error": "Algún campo supera el largo permitido"} for row in largos])
+            for row in largos:
+                staged.pop(row['correo'], None)
+
+            if not dry_run and staged:
+                insertados = {row['correo'] for row in await conn.fetch(INSERTAR_IMPORTACION)}
+                report.insertados = len(insertados)
+                rechazar_no_insertados(staged, insertados, report)
+
+        if report.insertados:
+            table_versions.bump("estudiantes")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al importar los estudiantes: {str(e)}")
+
+    return report.to_dict()
+
+# Ruta para obtener todos los estudiantes
+@router.get("/estudiante_view", dependencies=[Depends(etag_tables("estudiantes"))])
+async def get_estudiantes(
+    response: Response,
+    nombre: Optional[str] = None,
+    apellido: Optional[str] = None,
+    correo: Optional[str] = None,
+    edad_min: Optional[int] = None,
+    edad_max: Optional[int] = None,
+    page: PageParams = Depends(page_params),
+    conn=Depends(get_async_db),
+):
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todos, como antes)
+    qb = QueryBuilder(paramstyle="numeric")
+    filtros_estudiantes(qb, nombre, apellido, correo, edad_min, edad_max)
+    order = order_and_limit(qb, page, ORDEN_ESTUDIANTES, legacy_order=" ORDER BY id")
+    try:
+        rows = await conn.fetch(SELECT_ESTUDIANTES + qb.where_sql() + order, *qb.params)
+        rows, next_cursor = split_page(rows, page, ORDEN_ESTUDIANTES)
+        set_next_cursor(response, next_cursor)
+        return json_rows(rows, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener los estudiantes: {str(e)}")
+
+# Ruta para buscar estudiantes por nombre, apellido o correo (tolera errores de tipeo)
+@router.get("/buscar", dependencies=[Depends(etag_tables("estudiantes"))])
+async def buscar_estudiantes(response: Response, search: SearchParams = Depends(search_params), conn=Depends(get_async_db)):
+    qb = QueryBuilder(paramstyle="numeric")
+    sql = search_sql(qb, "estudiantes", COLUMNAS_BUSQUEDA_ESTUDIANTES, DOCUMENTO_ESTUDIANTES, search)
+    try:
+        return json_rows(await conn.fetch(sql, *qb.params), response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar estudiantes: {str(e)}")
+
+# Ruta para obtener un estudiante por ID
+@router.get("/{id}", response_model=Estudiante)
+async def get_estudiante(id: int, conn=Depends(get_async_db)):
+    try:
+        estudiante_data = await conn.fetchrow(SELECT_ESTUDIANTES + ' WHERE id = $1', id)
+
+        if estudiante_data is None:
+            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+
+        return Estudiante(**dict(estudiante_data))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener el estudiante: {str(e)}")
+
+# Ruta para actualizar la información de un estudiante por su ID
+@router.put("/update/{id}", response_model=Estudiante)
+async def update_estudiante(id: int, estudiante: Estudiante, conn=Depends(get_async_db)):
+    try:
+        # Actualizar el estudiante: sin fila devuelta no existe, y el índice único
+        # de correo rechaza el correo de otro estudiante
+        updated_estudiante_data = await conn.fetchrow(
+            'UPDATE estudiantes SET nombre = $1, apellido = $2, correo = $3, edad = $4, direccion = $5 WHERE id = $6 RETURNING id, nombre, apellido, correo, edad, direccion',
+            estudiante.nombre, estudiante.apellido, estudiante.correo, estudiante.edad, estudiante.direccion, id
+        )
+        if updated_estudiante_data is None:
+            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+        table_versions.bump("estudiantes")
+
+        return Estudiante(**dict(updated_estudiante_data))
+
+    except HTTPException:
+        raise
+    except asyncpg.UniqueViolationError:
+        raise HTTPException(status_code=400, detail="Ya existe otro estudiante con este correo")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar el estudiante: {str(e)}")
+
+# Ruta para eliminar un estudiante por su ID
+@router.delete("/delete/{id}")
+async def delete_estudiante(id: int, conn=Depends(get_async_db)):
+    try:
+        # Eliminar el estudiante (sin fila devuelta no existía)
+        deleted = await conn.fetchval('DELETE FROM estudiantes WHERE id = $1 RETURNING id', id)
+        if deleted is None:
+            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+        # Sus asignaciones se eliminan en cascada
+        table_versions.bump("estudiantes", "asignacion")
+
+        return {"message": "Estudiante eliminado exitosamente", "id": id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al eliminar el estudiante: {str(e)}")
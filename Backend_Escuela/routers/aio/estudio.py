@@ -0,0 +1,76 @@
+# routers/aio/estudio.py
+# Versión asíncrona (asyncpg) de routers/estudio.py, activa con DB_MODE=async
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from db_async import get_async_db
+from models.estudio import Estudio
+from pagination import QueryBuilder, PageParams, page_params, order_and_limit, split_page, set_next_cursor
+from responses import json_rows, etag_tables
+from cache import table_versions
+from routers.estudio import SELECT_ESTUDIOS, ORDEN_ESTUDIOS, filtros_estudios
+
+router = APIRouter()
+
+# Ruta para crear un nuevo estudio
+@router.post("/estudios_create/")
+async def create_estudio(estudio: Estudio, conn=Depends(get_async_db)):
+    try:
+        new_estudio = await conn.fetchrow('INSERT INTO estudios (nombre, descripcion, profesor_id) VALUES ($1, $2, $3) RETURNING *',
+                                          estudio.nombre, estudio.descripcion, estudio.profesor_id)
+        table_versions.bump("estudios")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al crear el estudio: {e}")
+    return dict(new_estudio)
+
+# Ruta para obtener todos los estudios
+@router.get("/estudios_get/", dependencies=[Depends(etag_tables("estudios"))])
+async def get_estudios(
+    response: Response,
+    nombre: Optional[str] = None,
+    profesor_id: Optional[int] = None,
+    page: PageParams = Depends(page_params),
+    conn=Depends(get_async_db),
+):
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todos, como antes)
+    qb = QueryBuilder(paramstyle="numeric")
+    filtros_estudios(qb, nombre, profesor_id)
+    order = order_and_limit(qb, page, ORDEN_ESTUDIOS)
+    try:
+        estudios = await conn.fetch(SELECT_ESTUDIOS + qb.where_sql() + order, *qb.params)
+        estudios, next_cursor = split_page(estudios, page, ORDEN_ESTUDIOS)
+        set_next_cursor(response, next_cursor)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener los estudios: {e}")
+    return json_rows(estudios, response)
+
+# Ruta para actualizar la información de un estudio por su ID
+@router.put("/estudios_update/{id}")
+async def update_estudio(id: int, estudio: Estudio, conn=Depends(get_async_db)):
+    try:
+        updated_estudio = await conn.fetchrow('UPDATE estudios SET nombre = $1, descripcion = $2, profesor_id = $3 WHERE id = $4 RETURNING *',
+                                              estudio.nombre, estudio.descripcion, estudio.profesor_id, id)
+        if updated_estudio is None:
+            raise HTTPException(status_code=404, detail="Estudio no encontrado")
+        table_versions.bump("estudios")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar el estudio: {e}")
+    return dict(updated_estudio)
+
+# Ruta para eliminar un estudio por su ID
+@router.delete("/estudios_delete/{id}")
+async def delete_estudio(id: int, conn=Depends(get_async_db)):
+    try:
+        deleted_estudio = await conn.fetchrow('DELETE FROM estudios WHERE id = $1 RETURNING *', id)
+        if deleted_estudio is None:
+            raise HTTPException(status_code=404, detail="Estudio no encontrado")
+        # Sus asignaciones se eliminan en cascada
+        table_versions.bump("estudios", "asignacion")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al eliminar el estudio: {e}")
+    return {"message": "Estudio eliminado"}
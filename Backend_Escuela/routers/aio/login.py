@@ -0,0 +1,60 @@
+# routers/aio/login.py
+# Versión asíncrona (asyncpg) de routers/login.py, activa con DB_MODE=async
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+import logging
+from security.passwords import verify_password_async, rehash_if_needed_async
+from security.tokens import create_login_token
+from db_async import get_async_db
+from security.auth import SQL_BUSCAR_USUARIO
+
+router = APIRouter()
+
+# Ruta para iniciar sesión y obtener el token JWT
+@router.post("/")
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), conn=Depends(get_async_db)):
+    try:
+        # Consultar el usuario y su rol
+        user = await conn.fetchrow(SQL_BUSCAR_USUARIO.format("$1"), form_data.username)
+
+        # Verificar si se encontró al usuario
+        if not user:
+            raise HTTPException(
+                status_code=400, detail="Nombre de usuario o contraseña incorrectos"
+            )
+
+        # Verificar contraseña (en el pool de procesos, sin bloquear el event loop)
+        if not await verify_password_async(form_data.password, user["contrasena"]):
+            raise HTTPException(status_code=400, detail=" contraseña incorrecta")
+
+        # Regenerar el hash si se creó con otro esquema o costo (no impide el inicio de sesión)
+        try:
+            new_hash = await rehash_if_needed_async(form_data.password, user["contrasena"])
+            if new_hash:
+                await conn.execute("UPDATE usuarios SET contrasena = $1 WHERE id = $2", new_hash, user["id"])
+        except Exception as e:
+            logging.warning(f"No se pudo actualizar el hash del usuario {user['id']}: {e}")
+
+        # Crear token JWT (con el perfil embebido si AUTH_STATELESS está activo)
+        token = create_login_token(user)
+
+        # Preparar respuesta con información del usuario
+        user_info = {
+            "id": user["id"],
+            "nombre": user["nombre"],
+            "apellido": user["apellido"],
+            "correo": user["correo"],
+            "rol_id": user["rol_id"],
+            "rol_nombre": user["rol_nombre"]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al iniciar sesión: {e}")
+
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "user": user_info
+    }
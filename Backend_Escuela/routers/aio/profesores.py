@@ -0,0 +1,112 @@
+# routers/aio/profesores.py
+# Versión asíncrona (asyncpg) de routers/profesores.py, activa con DB_MODE=async
+import asyncpg
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from db_async import get_async_db
+from models.profesores import Profesor
+from pagination import (QueryBuilder, PageParams, page_params, order_and_limit, split_page, set_next_cursor,
+                        SearchParams, search_params, search_sql)
+from responses import json_rows, etag_tables
+from cache import table_versions
+from routers.profesores import (SELECT_PROFESORES, ORDEN_PROFESORES, filtros_profesores, DOCUMENTO_PROFESORES,
+                                COLUMNAS_BUSQUEDA_PROFESORES)
+
+router = APIRouter()
+
+# Endpoint para listar profesores
+@router.get("/profesores/list", dependencies=[Depends(etag_tables("profesores"))])
+async def listar_profesores(conn=Depends(get_async_db)):
+    rows = await conn.fetch('SELECT id, nombre, apellido FROM profesores')
+    return [dict(row) for row in rows]
+
+# Ruta para crear un nuevo profesor
+@router.post("/profesores_create/", response_model=Profesor)
+async def create_profesor(profesor: Profesor, conn=Depends(get_async_db)):
+    try:
+        # Insertar nuevo profesor en la base de datos; si el correo ya existe no se inserta nada
+        new_profesor_data = await conn.fetchrow(
+            'INSERT INTO profesores (nombre, apellido, correo, especialidad, usuario_id) VALUES ($1, $2, $3, $4, $5) ON CONFLICT (correo) DO NOTHING RETURNING id, nombre, apellido, correo, especialidad, usuario_id',
+            profesor.nombre, profesor.apellido, profesor.correo, profesor.especialidad, profesor.usuario_id
+        )
+        if new_profesor_data is None:
+            raise HTTPException(status_code=400, detail="El correo ya está registrado")
+        table_versions.bump("profesores")
+
+        return Profesor(**dict(new_profesor_data))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al crear el profesor: {e}")
+
+# Ruta para obtener todos los profesores
+@router.get("/profesores_get/", dependencies=[Depends(etag_tables("profesores"))])
+async def get_profesores(
+    response: Response,
+    nombre: Optional[str] = None,
+    apellido: Optional[str] = None,
+    especialidad: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+    conn=Depends(get_async_db),
+):
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todos, como antes)
+    qb = QueryBuilder(paramstyle="numeric")
+    filtros_profesores(qb, nombre, apellido, especialidad)
+    order = order_and_limit(qb, page, ORDEN_PROFESORES, legacy_order=" ORDER BY id")
+    try:
+        rows = await conn.fetch(SELECT_PROFESORES + qb.where_sql() + order, *qb.params)
+        rows, next_cursor = split_page(rows, page, ORDEN_PROFESORES)
+        set_next_cursor(response, next_cursor)
+        return json_rows(rows, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener los profesores: {e}")
+
+# Ruta para buscar profesores por nombre, apellido, correo o especialidad (tolera errores de tipeo)
+@router.get("/profesores/buscar", dependencies=[Depends(etag_tables("profesores"))])
+async def buscar_profesores(response: Response, search: SearchParams = Depends(search_params), conn=Depends(get_async_db)):
+    qb = QueryBuilder(paramstyle="numeric")
+    sql = search_sql(qb, "profesores", COLUMNAS_BUSQUEDA_PROFESORES, DOCUMENTO_PROFESORES, search)
+    try:
+        return json_rows(await conn.fetch(sql, *qb.params), response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar profesores: {e}")
+
+# Ruta para actualizar la información de un profesor por su ID
+@router.put("/profesores_update/{id}", response_model=Profesor)
+async def update_profesor(id: int, profesor: Profesor, conn=Depends(get_async_db)):
+    try:
+        # Actualizar el profesor: sin fila devuelta no existe, y el índice único
+        # de correo rechaza el correo de otro profesor
+        updated_profesor_data = await conn.fetchrow(
+            'UPDATE profesores SET nombre = $1, apellido = $2, correo = $3, especialidad = $4, usuario_id = $5 WHERE id = $6 RETURNING id, nombre, apellido, correo, especialidad, usuario_id',
+            profesor.nombre, profesor.apellido, profesor.correo, profesor.especialidad, profesor.usuario_id, id
+        )
+        if updated_profesor_data is None:
+            raise HTTPException(status_code=404, detail="Profesor no encontrado")
+        table_versions.bump("profesores")
+
+        return Profesor(**dict(updated_profesor_data))
+
+    except HTTPException:
+        raise
+    except asyncpg.UniqueViolationError:
+        raise HTTPException(status_code=400, detail="Ya existe otro profesor con este correo")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar el profesor: {e}")
+
+# Ruta para eliminar un profesor por su ID
+@router.delete("/profesores_delete/{id}")
+async def delete_profesor(id: int, conn=Depends(get_async_db)):
+    try:
+        deleted_profesor = await conn.fetchrow('DELETE FROM profesores WHERE id = $1 RETURNING *', id)
+        if deleted_profesor is None:
+            raise HTTPException(status_code=404, detail="Profesor no encontrado")
+        # Sus materias quedan sin profesor (ON DELETE SET NULL)
+        table_versions.bump("profesores", "estudios")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al eliminar el profesor: {e}")
+
+    return {"message": "Profesor eliminado"}
@@ -0,0 +1,84 @@
+# routers/aio/user.py
+# Versión asíncrona (asyncpg) de routers/user.py, activa con DB_MODE=async
+from fastapi import APIRouter, Depends, HTTPException
+from db_async import get_async_db
+from security.auth_async import get_current_user, verificar_rol
+from security.auth import get_token_claims, invalidar_usuario
+from security.tokens import revoke_token
+from models.user import User, UserUpdate, UserProfile
+from routers.user import SQL_PERFIL
+
+router = APIRouter()
+
+# Ruta para obtener información del usuario actual
+@router.get("/me")
+async def read_users_me(current_user: dict = Depends(get_current_user)):
+    return current_user
+
+# Endpoint para obtener perfil del usuario actual
+@router.get("/profile")
+async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
+    return {
+        "id": current_user["id"],
+        "nombre": current_user["nombre"],
+        "apellido": current_user["apellido"],
+        "correo": current_user["correo"],
+        "rol_id": current_user["rol_id"],
+        "rol_nombre": current_user["rol_nombre"]
+    }
+
+# Endpoint para obtener perfil de usuario por id
+@router.get("/usuarios/perfil/{id}", response_model=User)
+async def get_user_profile(id: int, conn=Depends(get_async_db)):
+    user_data = await conn.fetchrow("SELECT id, nombre, apellido, correo FROM usuarios WHERE id = $1", id)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return User(**dict(user_data))
+
+# Endpoint para actualizar perfil de usuario
+@router.put("/usuarios/perfil/{id}", response_model=User)
+async def update_user_profile(id: int, user_update: UserUpdate, conn=Depends(get_async_db)):
+    updated_user = await conn.fetchrow(
+        "UPDATE usuarios SET nombre = $1, apellido = $2, correo = $3 WHERE id = $4 RETURNING id, nombre, apellido, correo",
+        user_update.nombre, user_update.apellido, user_update.correo, id
+    )
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    # El correo o el nombre cambiaron: descartar el usuario en caché
+    invalidar_usuario(user_id=id)
+    return User(**dict(updated_user))
+
+# Ruta solo accesible para administradores (rol_id = 1)
+@router.get("/usuarios/admin")
+async def read_admin_data(current_user: dict = Depends(verificar_rol(1))):
+    return {"message": "Datos de administrador", "usuario": current_user}
+
+# Ruta solo accesible para profesores (rol_id = 2)
+@router.get("/profesores/list")
+async def read_profesor_data(current_user: dict = Depends(verificar_rol(2))):
+    return {"message": "Datos de profesor", "usuario": current_user}
+
+# Ruta solo accesible para estudiantes (rol_id = 3)
+@router.get("/estudiantes/{id}")
+async def read_estudiante_data(current_user: dict = Depends(verificar_rol(3))):
+    return {"message": "Datos de estudiante", "usuario": current_user}
+
+# Endpoint para obtener el perfil del usuario autenticado usando JWT
+@router.get("/perfil/", response_model=UserProfile)
+async def get_user_profile_jwt(claims: dict = Depends(get_token_claims), conn=Depends(get_async_db)):
+    try:
+        # El "sub" del token es el correo del usuario
+        user = await conn.fetchrow(SQL_PERFIL.format("$1"), claims["sub"])
+        if not user:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        return UserProfile(**dict(user))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Cerrar sesión: revocar el token actual (tokens sin estado con jti)
+@router.post("/logout/")
+async def logout(claims: dict = Depends(get_token_claims)):
+    revocado = revoke_token(claims)
+    return {"message": "Sesión cerrada", "revocado": revocado}
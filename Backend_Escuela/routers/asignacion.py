@@ -1,344 +1,506 @@
 # Importaciones necesarias para FastAPI y manejo de base de datos
-from fastapi import APIRouter, HTTPException, Request
-from db import get_db_connection
-from jose import jwt, JWTError
-from config import Config  # Importar la clase Config
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from psycopg2 import errors
+from config import Config
+from db import get_db, pool
+from models.asignacion import Asignacion, AsignacionLote
+from security.auth import get_token_claims
+from pagination import (QueryBuilder, SortField, cursor_int, cursor_text, PageParams, page_params,
+                        order_and_limit, split_page, set_next_cursor)
+from streaming import csv_header, csv_batch, ndjson_batch, export_response
+from responses import json_response, json_rows, check_etag
+from cache import table_versions
 
 # Crear router para las rutas de asignación
 router = APIRouter(tags=["asignaciones"])
 
-# Usar las configuraciones de la clase Config
-SECRET_KEY = Config.SECRET_KEY
-ALGORITHM = Config.ALGORITHM
+# Respuestas de /estudiante y /profesor armadas en Postgres con json_build_object/json_agg:
+# la consulta devuelve el documento completo como texto y se envía tal cual, sin
+# construir un dict por fila en Python. {filtro} identifica al estudiante/profesor.
+SQL_ASIGNACIONES_ESTUDIANTE = """
+    SELECT json_build_object(
+        'estudiante', json_build_object('id', e.id, 'nombre', e.nombre, 'apellido', e.apellido),
+        'asignaciones', COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', a.id,
+                'fecha_inscripcion', a.fecha_inscripcion::text,
+                'materia', json_build_object('nombre', es.nombre, 'descripcion', es.descripcion),
+                'profesor', json_build_object(
+                    'nombre', p.nombre, 'apellido', p.apellido,
+                    'correo', p.correo, 'especialidad', p.especialidad
+                )
+            ) ORDER BY es.nombre)
+            FROM asignacion a
+            JOIN estudios es ON a.estudio_id = es.id
+            JOIN profesores p ON es.profesor_id = p.id
+            WHERE a.estudiante_id = e.id
+        ), '[]'::json)
+    )::text AS documento
+    FROM estudiantes e
+    WHERE {filtro}
+"""
 
-def decode_token(request: Request):
-    """
-    Función para decodificar el token JWT y extraer información del usuario
-    @param request: Objeto Request de FastAPI
-    @return: Diccionario con información del usuario (correo, rol, rol_id)
-    @raises HTTPException: Si el token es inválido o no se puede decodificar
-    """
-    # Obtener el token del header Authorization
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token de acceso requerido")
-    
-    # Extraer el token (remover "Bearer ")
-    token = auth_header.split(" ")[1]
-    
-    try:
-        # Decodificar el token JWT
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        correo = payload.get("sub")
-        rol = payload.get("rol")
-        rol_id = payload.get("rol_id")
-        
-        if correo is None:
-            raise HTTPException(status_code=401, detail="Token inválido")
-        
-        return {"correo": correo, "rol": rol, "rol_id": rol_id}
-        
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token inválido")
+# Las materias salen de roster_profesor (migrations/004_roster_profesor.sql): el documento
+# de cada materia lo mantienen los triggers, así que solo se recorre el índice del profesor
+SQL_ASIGNACIONES_PROFESOR = """
+    SELECT json_build_object(
+        'profesor', json_build_object(
+            'id', p.id, 'nombre', p.nombre, 'apellido', p.apellido, 'especialidad', p.especialidad
+        ),
+        'materias', COALESCE((
+            SELECT json_agg(r.documento ORDER BY r.nombre, r.estudio_id)
+            FROM roster_profesor r
+            WHERE r.profesor_id = p.id
+        ), '[]'::json)
+    )::text AS documento
+    FROM profesores p
+    WHERE {filtro}
+"""
+
+# Filtros para ubicar al estudiante/profesor por el correo del usuario o por su id (token sin estado)
+FILTRO_POR_CORREO = "usuario_id = (SELECT id FROM usuarios WHERE correo = {0})"
+FILTRO_POR_ID = "id = {0}"
 
 @router.get("/estudiante")
-def get_asignacion_estudiante(request: Request):
+def get_asignacion_estudiante(user_data: dict = Depends(get_token_claims), conn=Depends(get_db)):
     """
     Endpoint para obtener las asignaciones de un estudiante
     Solo accesible para usuarios con rol de Estudiante
     
-    @param request: Objeto Request de FastAPI
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
     @return: Diccionario con información del estudiante y sus asignaciones
     @raises HTTPException: Si el usuario no es estudiante o no se encuentra
     """
-    # Decodificar token y verificar que sea un estudiante
-    user_data = decode_token(request)
-    correo = user_data["correo"]
-    rol_id = user_data["rol_id"]
+    correo = user_data["sub"]
+    rol_id = user_data.get("rol_id")
     
     # Verificar que el usuario sea un estudiante
     if rol_id != 2:
         raise HTTPException(status_code=403, detail="Acceso denegado. Solo para estudiantes.")
     
-    # Conectar a la base de datos
-    conn = get_db_connection()
+    # Token sin estado: el estudiante vinculado ya viene en los claims
+    if user_data.get("estudiante_id") is not None:
+        filtro, valor = FILTRO_POR_ID, user_data["estudiante_id"]
+    else:
+        filtro, valor = FILTRO_POR_CORREO, correo
+
+    # Usar la conexión prestada por el pool
     cur = conn.cursor()
     
     try:
-        # Buscar el estudiante por su correo
-        cur.execute("""
-            SELECT e.id, e.nombre, e.apellido
-            FROM estudiantes e
-            JOIN usuarios u ON e.usuario_id = u.id
-            WHERE u.correo = %s
-        """, (correo,))
-        estudiante = cur.fetchone()
-        
-        # Verificar que el estudiante existe
-        if not estudiante:
-            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
-        
-        # Obtener todas las asignaciones del estudiante con información detallada
-        cur.execute("""
-            SELECT
-                a.id, a.fecha_inscripcion,
-                es.nombre AS materia_nombre, es.descripcion AS materia_descripcion,
-                p.nombre AS profesor_nombre, p.apellido AS profesor_apellido,
-                p.correo AS profesor_correo, p.especialidad AS profesor_especialidad
-            FROM asignacion a
-            JOIN estudios es ON a.estudio_id = es.id
-            JOIN profesores p ON es.profesor_id = p.id
-            WHERE a.estudiante_id = %s
-            ORDER BY es.nombre
-        """, (estudiante["id"],))
-        asignaciones = cur.fetchall()
-        
-        # Formatear la respuesta
-        return {
-            "estudiante": {
-                "id": estudiante["id"], 
-                "nombre": estudiante["nombre"], 
-                "apellido": estudiante["apellido"]
-            },
-            "asignaciones": [
-                {
-                    "id": a["id"], 
-                    "fecha_inscripcion": str(a["fecha_inscripcion"]),
-                    "materia": {
-                        "nombre": a["materia_nombre"], 
-                        "descripcion": a["materia_descripcion"]
-                    },
-                    "profesor": {
-                        "nombre": a["profesor_nombre"], 
-                        "apellido": a["profesor_apellido"], 
-                        "correo": a["profesor_correo"], 
-                        "especialidad": a["profesor_especialidad"]
-                    }
-                }
-                for a in asignaciones
-            ]
-        }
-        
+        # Estudiante y asignaciones en una sola consulta
+        cur.execute(SQL_ASIGNACIONES_ESTUDIANTE.format(filtro=filtro.format("%s")), (valor,))
+        row = cur.fetchone()
     finally:
-        # Cerrar conexiones de base de datos
+        # Cerrar el cursor (la conexión vuelve al pool)
         cur.close()
-        conn.close()
+
+    # Verificar que el estudiante existe
+    if not row:
+        raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+    return json_response(row["documento"])
 
 @router.get("/profesor")
-def get_asignacion_profesor(request: Request):
+def get_asignacion_profesor(user_data: dict = Depends(get_token_claims), conn=Depends(get_db)):
     """
     Endpoint para obtener las materias y estudiantes de un profesor
     Solo accesible para usuarios con rol de Profesor
     
-    @param request: Objeto Request de FastAPI
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
     @return: Diccionario con información del profesor y sus materias/estudiantes
     @raises HTTPException: Si el usuario no es profesor o no se encuentra
     """
-    # Decodificar token y verificar que sea un profesor
-    user_data = decode_token(request)
-    correo = user_data["correo"]
-    rol_id = user_data["rol_id"]
+    correo = user_data["sub"]
+    rol_id = user_data.get("rol_id")
     
     # Verificar que el usuario sea un profesor
     if rol_id != 1:
         raise HTTPException(status_code=403, detail="Acceso denegado. Solo para profesores.")
     
-    # Conectar a la base de datos
-    conn = get_db_connection()
+    # Token sin estado: el profesor vinculado ya viene en los claims
+    if user_data.get("profesor_id") is not None:
+        filtro, valor = FILTRO_POR_ID, user_data["profesor_id"]
+    else:
+        filtro, valor = FILTRO_POR_CORREO, correo
+
+    # Usar la conexión prestada por el pool
     cur = conn.cursor()
     
     try:
-        # Buscar el profesor por su correo
-        cur.execute("""
-            SELECT p.id, p.nombre, p.apellido, p.especialidad
-            FROM profesores p
-            JOIN usuarios u ON p.usuario_id = u.id
-            WHERE u.correo = %s
-        """, (correo,))
-        profesor = cur.fetchone()
-        
-        # Verificar que el profesor existe
-        if not profesor:
-            raise HTTPException(status_code=404, detail="Profesor no encontrado")
-        
-        # Obtener todas las materias del profesor y sus estudiantes
-        cur.execute("""
-            SELECT
-                es.id AS materia_id, es.nombre AS materia_nombre, es.descripcion AS materia_descripcion,
-                a.fecha_inscripcion,
-                e.id AS estudiante_id, e.nombre AS estudiante_nombre, e.apellido AS estudiante_apellido,
-                e.correo AS estudiante_correo, e.edad AS estudiante_edad
-            FROM estudios es
-            LEFT JOIN asignacion a ON es.id = a.estudio_id
-            LEFT JOIN estudiantes e ON a.estudiante_id = e.id
-            WHERE es.profesor_id = %s
-            ORDER BY es.nombre, e.nombre
-        """, (profesor["id"],))
-        materias_estudiantes = cur.fetchall()
-        
-        # Organizar los datos por materia
-        materias = {}
-        for row in materias_estudiantes:
-            materia_id = row["materia_id"]
-            
-            # Si la materia no existe en el diccionario, crearla
-            if materia_id not in materias:
-                materias[materia_id] = {
-                    "id": materia_id,
-                    "nombre": row["materia_nombre"],
-                    "descripcion": row["materia_descripcion"],
-                    "estudiantes": []
-                }
-            
-            # Agregar estudiante si existe (puede ser None si no hay estudiantes)
-            if row["estudiante_id"]:
-                materias[materia_id]["estudiantes"].append({
-                    "id": row["estudiante_id"],
-                    "nombre": row["estudiante_nombre"],
-                    "apellido": row["estudiante_apellido"],
-                    "correo": row["estudiante_correo"],
-                    "edad": row["estudiante_edad"],
-                    "fecha_inscripcion": str(row["fecha_inscripcion"])
-                })
-        
-        # Formatear la respuesta
-        return {
-            "profesor": {
-                "id": profesor["id"], 
-                "nombre": profesor["nombre"], 
-                "apellido": profesor["apellido"], 
-                "especialidad": profesor["especialidad"]
-            },
-            "materias": list(materias.values())
-        }
-        
+        # Profesor, materias y estudiantes en una sola consulta
+        cur.execute(SQL_ASIGNACIONES_PROFESOR.format(filtro=filtro.format("%s")), (valor,))
+        row = cur.fetchone()
     finally:
-        # Cerrar conexiones de base de datos
+        # Cerrar el cursor (la conexión vuelve al pool)
         cur.close()
-        conn.close()
 
-@router.get("/all")
-def get_asignaciones(request: Request):
+    # Verificar que el profesor existe
+    if not row:
+        raise HTTPException(status_code=404, detail="Profesor no encontrado")
+    return json_response(row["documento"])
+
+# Consulta de asignaciones con estudiante, materia y profesor (/all y /export)
+SELECT_ASIGNACIONES = """
+    SELECT
+        a.id, a.fecha_inscripcion,
+        e.nombre AS estudiante_nombre, e.apellido AS estudiante_apellido,
+        e.correo AS estudiante_correo, e.edad AS estudiante_edad,
+        es.nombre AS materia_nombre, es.descripcion AS materia_descripcion,
+        p.nombre AS profesor_nombre, p.apellido AS profesor_apellido,
+        p.correo AS profesor_correo, p.especialidad AS profesor_especialidad
+    FROM asignacion a
+    JOIN estudiantes e ON a.estudiante_id = e.id
+    JOIN estudios es ON a.estudio_id = es.id
+    JOIN profesores p ON es.profesor_id = p.id
+"""
+
+# Columnas del CSV exportado (en el orden de SELECT_ASIGNACIONES)
+COLUMNAS_ASIGNACIONES = [
+    "id", "fecha_inscripcion",
+    "estudiante_nombre", "estudiante_apellido", "estudiante_correo", "estudiante_edad",
+    "materia_nombre", "materia_descripcion",
+    "profesor_nombre", "profesor_apellido", "profesor_correo", "profesor_especialidad",
+]
+
+# Formato anidado de una asignación en las respuestas JSON
+def formatear_asignacion(a):
+    return {
+        "id": a["id"],
+        "fecha_inscripcion": str(a["fecha_inscripcion"]),
+        "estudiante": {
+            "nombre": a["estudiante_nombre"],
+            "apellido": a["estudiante_apellido"],
+            "correo": a["estudiante_correo"],
+            "edad": a["estudiante_edad"]
+        },
+        "materia": {
+            "nombre": a["materia_nombre"],
+            "descripcion": a["materia_descripcion"]
+        },
+        "profesor": {
+            "nombre": a["profesor_nombre"],
+            "apellido": a["profesor_apellido"],
+            "correo": a["profesor_correo"],
+            "especialidad": a["profesor_especialidad"]
+        }
+    }
+
+# Campos por los que se puede ordenar la lista de asignaciones
+ORDEN_ASIGNACIONES = {
+    "id": SortField("a.id", "id", cursor_int),
+    "estudiante": SortField("e.nombre", "estudiante_nombre", cursor_text),
+    "materia": SortField("es.nombre", "materia_nombre", cursor_text),
+    "profesor": SortField("p.nombre", "profesor_nombre", cursor_text),
+}
+
+# Filtros de la lista de asignaciones (compartidos con routers/aio/asignacion.py)
+def filtros_asignaciones(qb, estudiante_id=None, estudio_id=None, profesor_id=None, fecha_desde=None, fecha_hasta=None):
+    qb.where_if(estudiante_id, "a.estudiante_id = {}")
+    qb.where_if(estudio_id, "a.estudio_id = {}")
+    qb.where_if(profesor_id, "es.profesor_id = {}")
+    qb.where_if(fecha_desde, "a.fecha_inscripcion >= {}")
+    qb.where_if(fecha_hasta, "a.fecha_inscripcion <= {}")
+
+# Tablas que lee la lista de asignaciones (su ETag cambia con cualquiera de ellas)
+TABLAS_ASIGNACIONES = ("asignacion", "estudiantes", "estudios", "profesores")
+
+def etag_asignaciones(request: Request, response: Response, user_data: dict = Depends(get_token_claims)):
+    """ETag de /all; solo para administradores, así nadie más recibe un 304 de la lista"""
+    if user_data.get("rol_id") == 3:
+        check_etag(request, response, *TABLAS_ASIGNACIONES)
+
+@router.get("/all", dependencies=[Depends(etag_asignaciones)])
+def get_asignaciones(
+    response: Response,
+    estudiante_id: Optional[int] = None,
+    estudio_id: Optional[int] = None,
+    profesor_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    page: PageParams = Depends(page_params),
+    user_data: dict = Depends(get_token_claims),
+    conn=Depends(get_db),
+):
     """
     Endpoint para obtener todas las asignaciones (solo para administradores)
     Muestra todas las asignaciones con información detallada de estudiantes, materias y profesores
     
-    @param request: Objeto Request de FastAPI
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
+    @param page: limit/cursor/sort opcionales; el cursor siguiente va en la cabecera X-Next-Cursor
     @return: Lista de todas las asignaciones con información completa
     @raises HTTPException: Si el usuario no es administrador
     """
-    # Decodificar token y verificar que sea un administrador
-    user_data = decode_token(request)
-    rol_id = user_data["rol_id"]
+    rol_id = user_data.get("rol_id")
     
     # Verificar que el usuario sea un administrador
     if rol_id != 3:
         raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
     
-    # Conectar a la base de datos
-    conn = get_db_connection()
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todas, como antes)
+    qb = QueryBuilder()
+    filtros_asignaciones(qb, estudiante_id, estudio_id, profesor_id, fecha_desde, fecha_hasta)
+    order = order_and_limit(qb, page, ORDEN_ASIGNACIONES, legacy_order=" ORDER BY e.nombre, es.nombre")
+
+    # Usar la conexión prestada por el pool
     cur = conn.cursor()
     
     try:
         # Obtener todas las asignaciones con información completa
-        cur.execute("""
-            SELECT
-                a.id, a.fecha_inscripcion,
-                e.nombre AS estudiante_nombre, e.apellido AS estudiante_apellido,
-                e.correo AS estudiante_correo, e.edad AS estudiante_edad,
-                es.nombre AS materia_nombre, es.descripcion AS materia_descripcion,
-                p.nombre AS profesor_nombre, p.apellido AS profesor_apellido,
-                p.correo AS profesor_correo, p.especialidad AS profesor_especialidad
-            FROM asignacion a
-            JOIN estudiantes e ON a.estudiante_id = e.id
-            JOIN estudios es ON a.estudio_id = es.id
-            JOIN profesores p ON es.profesor_id = p.id
-            ORDER BY e.nombre, es.nombre
-        """)
-        asignaciones = cur.fetchall()
+        cur.execute(SELECT_ASIGNACIONES + qb.where_sql() + order, qb.params)
+        asignaciones, next_cursor = split_page(cur.fetchall(), page, ORDEN_ASIGNACIONES)
+        set_next_cursor(response, next_cursor)
         
         # Formatear la respuesta
-        return [
-            {
-                "id": a["id"],
-                "fecha_inscripcion": str(a["fecha_inscripcion"]),
-                "estudiante": {
-                    "nombre": a["estudiante_nombre"],
-                    "apellido": a["estudiante_apellido"],
-                    "correo": a["estudiante_correo"],
-                    "edad": a["estudiante_edad"]
-                },
-                "materia": {
-                    "nombre": a["materia_nombre"],
-                    "descripcion": a["materia_descripcion"]
-                },
-                "profesor": {
-                    "nombre": a["profesor_nombre"],
-                    "apellido": a["profesor_apellido"],
-                    "correo": a["profesor_correo"],
-                    "especialidad": a["profesor_especialidad"]
-                }
-            }
-            for a in asignaciones
-        ]
+        return json_rows([formatear_asignacion(a) for a in asignaciones], response)
         
     finally:
-        # Cerrar conexiones de base de datos
+        # Cerrar el cursor (la conexión vuelve al pool)
         cur.close()
-        conn.close()
+
+# Exportar las asignaciones en streaming (NDJSON o CSV)
+@router.get("/export")
+def export_asignaciones(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    estudiante_id: Optional[int] = None,
+    estudio_id: Optional[int] = None,
+    profesor_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    sort: Optional[str] = None,
+    user_data: dict = Depends(get_token_claims),
+):
+    """
+    Endpoint para exportar todas las asignaciones (solo para administradores)
+    Usa un cursor del lado del servidor que lee EXPORT_BATCH_SIZE filas por lote,
+    de modo que la memoria no crece con el historial completo de inscripciones
+    
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
+    @param format: "ndjson" (mismo formato que /all, un objeto por línea) o "csv" (columnas planas)
+    @return: Archivo en streaming
+    @raises HTTPException: Si el usuario no es administrador
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+
+    qb = QueryBuilder()
+    filtros_asignaciones(qb, estudiante_id, estudio_id, profesor_id, fecha_desde, fecha_hasta)
+    order = order_and_limit(qb, PageParams(sort=sort), ORDEN_ASIGNACIONES, legacy_order=" ORDER BY a.id")
+    sql = SELECT_ASIGNACIONES + qb.where_sql() + order
+
+    def generar():
+        # La conexión se toma del pool dentro del generador: la respuesta se envía
+        # después de que termina la petición y debe vivir lo que dure el streaming
+        with pool.connection() as raw:
+            with raw.cursor(name="export_asignaciones") as cur:
+                cur.itersize = Config.EXPORT_BATCH_SIZE
+                cur.execute(sql, qb.params)
+                if format == "csv":
+                    yield csv_header(COLUMNAS_ASIGNACIONES)
+                while True:
+                    rows = cur.fetchmany(Config.EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    if format == "csv":
+                        yield csv_batch(rows, COLUMNAS_ASIGNACIONES)
+                    else:
+                        yield ndjson_batch(rows, formatear_asignacion)
+
+    return export_response(generar(), format, "asignaciones")
 
 # Endpoints adicionales para CRUD de asignaciones (solo para administradores)
+
+# Inscripción en lote en una sola sentencia: solo se combinan estudiantes y materias
+# existentes, y la restricción única (estudiante_id, estudio_id) descarta las repetidas.
+# Devuelve los ids existentes y los pares insertados para armar el resumen.
+SQL_ASIGNACION_LOTE = """
+    WITH est AS (
+        SELECT id FROM estudiantes WHERE id = ANY({0}::int[])
+    ), mat AS (
+        SELECT id FROM estudios WHERE id = ANY({1}::int[])
+    ), insertadas AS (
+        INSERT INTO asignacion (estudiante_id, estudio_id, fecha_inscripcion)
+        SELECT est.id, mat.id, COALESCE({2}::date, CURRENT_DATE)
+        FROM est CROSS JOIN mat
+        ON CONFLICT (estudiante_id, estudio_id) DO NOTHING
+        RETURNING estudiante_id, estudio_id
+    )
+    SELECT
+        ARRAY(SELECT id FROM est) AS estudiantes,
+        ARRAY(SELECT id FROM mat) AS estudios,
+        ARRAY(SELECT ARRAY[estudiante_id, estudio_id] FROM insertadas) AS insertadas
+"""
+
+def resumen_lote(lote: AsignacionLote, fila):
+    """Resumen de una inscripción en lote: pares insertados, ya existentes e ids inexistentes"""
+    estudiantes, estudios = set(fila["estudiantes"]), set(fila["estudios"])
+    insertadas = [tuple(par) for par in fila["insertadas"]]
+    nuevas = set(insertadas)
+    duplicadas = [
+        [estudiante_id, estudio_id]
+        for estudiante_id in lote.estudiante_ids if estudiante_id in estudiantes
+        for estudio_id in lote.estudio_ids if estudio_id in estudios
+        if (estudiante_id, estudio_id) not in nuevas
+    ]
+    return {
+        "insertadas": len(insertadas),
+        "omitidas": len(duplicadas),
+        "asignaciones": [list(par) for par in insertadas],
+        "duplicadas": duplicadas,
+        "estudiantes_inexistentes": [i for i in lote.estudiante_ids if i not in estudiantes],
+        "estudios_inexistentes": [i for i in lote.estudio_ids if i not in estudios],
+    }
+
+def validar_tamano_lote(lote: AsignacionLote):
+    pares = len(lote.estudiante_ids) * len(lote.estudio_ids)
+    if pares > Config.ASIGNACION_LOTE_MAX_PARES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote genera {pares} asignaciones; el máximo es {Config.ASIGNACION_LOTE_MAX_PARES}",
+        )
+
 @router.post("/create")
-def create_asignacion(request: Request, estudiante_id: int, estudio_id: int):
+def create_asignacion(
+    estudiante_id: int,
+    estudio_id: int,
+    fecha_inscripcion: Optional[date] = None,
+    user_data: dict = Depends(get_token_claims),
+    conn=Depends(get_db),
+):
     """
     Endpoint para crear una nueva asignación (solo para administradores)
     
-    @param request: Objeto Request de FastAPI
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
     @param estudiante_id: ID del estudiante
     @param estudio_id: ID de la materia/estudio
-    @return: Mensaje de confirmación
-    @raises HTTPException: Si el usuario no es administrador o hay errores
+    @param fecha_inscripcion: Fecha de inscripción (por defecto, la fecha actual)
+    @return: La asignación creada
+    @raises HTTPException: Si el usuario no es administrador, ya existe la inscripción o no existen el estudiante o la materia
     """
     # Verificar que sea administrador
-    user_data = decode_token(request)
-    if user_data["rol_id"] != 3:
+    if user_data.get("rol_id") != 3:
         raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
     
-    # Lógica para crear asignación...
-    return {"message": "Asignación creada exitosamente"}
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            INSERT INTO asignacion (estudiante_id, estudio_id, fecha_inscripcion)
+            VALUES (%s, %s, COALESCE(%s::date, CURRENT_DATE))
+            ON CONFLICT (estudiante_id, estudio_id) DO NOTHING
+            RETURNING id, estudiante_id, estudio_id, fecha_inscripcion
+            """,
+            (estudiante_id, estudio_id, fecha_inscripcion),
+        )
+        asignacion = cur.fetchone()
+        conn.commit()
+    except errors.ForeignKeyViolation:
+        raise HTTPException(status_code=404, detail="Estudiante o materia no encontrados")
+    finally:
+        cur.close()
+
+    if asignacion is None:
+        raise HTTPException(status_code=400, detail="El estudiante ya está inscrito en esta materia")
+    table_versions.bump("asignacion")
+    return {"message": "Asignación creada exitosamente", "asignacion": asignacion}
+
+@router.post("/batch")
+def create_asignaciones_lote(lote: AsignacionLote, user_data: dict = Depends(get_token_claims), conn=Depends(get_db)):
+    """
+    Endpoint para inscribir varios estudiantes en varias materias (solo para administradores)
+    Inserta todos los pares estudiante-materia en una sola sentencia y omite los que ya existían
+    
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
+    @param lote: Listas de estudiantes y materias (y fecha opcional)
+    @return: Resumen con los pares insertados, omitidos e ids inexistentes
+    @raises HTTPException: Si el usuario no es administrador o el lote es demasiado grande
+    """
+    # Verificar que sea administrador
+    if user_data.get("rol_id") != 3:
+        raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
+    validar_tamano_lote(lote)
+
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            SQL_ASIGNACION_LOTE.format("%s", "%s", "%s"),
+            (lote.estudiante_ids, lote.estudio_ids, lote.fecha_inscripcion),
+        )
+        fila = cur.fetchone()
+        conn.commit()
+        if fila["insertadas"]:
+            table_versions.bump("asignacion")
+    finally:
+        cur.close()
+
+    return resumen_lote(lote, fila)
 
 @router.put("/update/{id}")
-def update_asignacion(request: Request, id: int):
+def update_asignacion(id: int, asignacion: Asignacion, user_data: dict = Depends(get_token_claims), conn=Depends(get_db)):
     """
     Endpoint para actualizar una asignación (solo para administradores)
     
-    @param request: Objeto Request de FastAPI
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
     @param id: ID de la asignación a actualizar
-    @return: Mensaje de confirmación
-    @raises HTTPException: Si el usuario no es administrador
+    @param asignacion: Nuevos datos (estudiante, materia y fecha opcional)
+    @return: La asignación actualizada
+    @raises HTTPException: Si el usuario no es administrador, no existe o duplicaría una inscripción
     """
     # Verificar que sea administrador
-    user_data = decode_token(request)
-    if user_data["rol_id"] != 3:
+    if user_data.get("rol_id") != 3:
         raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
     
-    # Lógica para actualizar asignación...
-    return {"message": "Asignación actualizada exitosamente"}
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE asignacion
+            SET estudiante_id = %s, estudio_id = %s,
+                fecha_inscripcion = COALESCE(%s::date, fecha_inscripcion)
+            WHERE id = %s
+            RETURNING id, estudiante_id, estudio_id, fecha_inscripcion
+            """,
+            (asignacion.estudiante_id, asignacion.estudio_id, asignacion.fecha_inscripcion, id),
+        )
+        actualizada = cur.fetchone()
+        conn.commit()
+    except errors.UniqueViolation:
+        raise HTTPException(status_code=400, detail="El estudiante ya está inscrito en esta materia")
+    except errors.ForeignKeyViolation:
+        raise HTTPException(status_code=404, detail="Estudiante o materia no encontrados")
+    finally:
+        cur.close()
+
+    if actualizada is None:
+        raise HTTPException(status_code=404, detail="Asignación no encontrada")
+    table_versions.bump("asignacion")
+    return {"message": "Asignación actualizada exitosamente", "asignacion": actualizada}
 
 @router.delete("/delete/{id}")
-def delete_asignacion(request: Request, id: int):
+def delete_asignacion(id: int, user_data: dict = Depends(get_token_claims), conn=Depends(get_db)):
     """
     Endpoint para eliminar una asignación (solo para administradores)
     
-    @param request: Objeto Request de FastAPI
+    @param user_data: Claims verificados del token JWT (sub, rol, rol_id)
     @param id: ID de la asignación a eliminar
     @return: Mensaje de confirmación
-    @raises HTTPException: Si el usuario no es administrador
+    @raises HTTPException: Si el usuario no es administrador o la asignación no existe
     """
     # Verificar que sea administrador
-    user_data = decode_token(request)
-    if user_data["rol_id"] != 3:
+    if user_data.get("rol_id") != 3:
         raise HTTPException(status_code=403, detail="Acceso denegado. Solo para administradores.")
     
-    # Lógica para eliminar asignación...
+    cur = conn.cursor()
+    try:
+        cur.execute('DELETE FROM asignacion WHERE id = %s RETURNING id', (id,))
+        eliminada = cur.fetchone()
+        conn.commit()
+    finally:
+        cur.close()
+
+    if eliminada is None:
+        raise HTTPException(status_code=404, detail="Asignación no encontrada")
+    table_versions.bump("asignacion")
     return {"message": "Asignación eliminada exitosamente"}
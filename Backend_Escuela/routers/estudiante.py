@@ -1,35 +1,38 @@
 # routers/estudiante.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from psycopg2 import errors
+from config import Config
 from models.estudiante import Estudiante
-from db import get_db_connection
-from typing import List
+from db import get_db
+from security.auth import verificar_rol
+from bulk_import import detect_format, iter_records, validate_batches, copy_buffer, ImportReport
+from pagination import (QueryBuilder, SortField, cursor_int, cursor_text, PageParams, page_params, like_prefix,
+                        order_and_limit, split_page, set_next_cursor, SearchParams, search_params, search_sql)
+from responses import json_rows, etag_tables
+from cache import table_versions
+from typing import List, Optional
 import json
 
 router = APIRouter()
 
 # Ruta para crear un nuevo estudiante
 @router.post("/create/", response_model=Estudiante)
-def create_estudiante(estudiante: Estudiante):
+def create_estudiante(estudiante: Estudiante, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
         
-        # Verificar si el estudiante ya existe por correo
-        cur.execute('SELECT id FROM estudiantes WHERE correo = %s', (estudiante.correo,))
-        existing = cur.fetchone()
-        if existing:
-            raise HTTPException(status_code=400, detail="Ya existe un estudiante con este correo")
-        
-        # Insertar el nuevo estudiante
+        # Insertar el nuevo estudiante; si el correo ya existe no se inserta nada
         cur.execute(
-            'INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion) VALUES (%s, %s, %s, %s, %s) RETURNING id, nombre, apellido, correo, edad, direccion',
+            'INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion) VALUES (%s, %s, %s, %s, %s) ON CONFLICT (correo) DO NOTHING RETURNING id, nombre, apellido, correo, edad, direccion',
             (estudiante.nombre, estudiante.apellido, estudiante.correo, estudiante.edad, estudiante.direccion)
         )
         new_estudiante_data = cur.fetchone()
         conn.commit()
         
         if new_estudiante_data is None:
-            raise HTTPException(status_code=400, detail="Error al crear el estudiante")
+            raise HTTPException(status_code=400, detail="Ya existe un estudiante con este correo")
+        table_versions.bump("estudiantes")
         
         # Crear objeto Estudiante con los datos retornados
         new_estudiante = Estudiante(
@@ -49,51 +52,198 @@ def create_estudiante(estudiante: Estudiante):
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al crear el estudiante: {str(e)}")
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
+
+# Tabla temporal donde se cargan con COPY las filas válidas de una importación
+CREAR_TABLA_IMPORTACION = '''
+    CREATE TEMP TABLE estudiantes_import (
+        linea INT, nombre TEXT, apellido TEXT, correo TEXT, edad INT, direccion TEXT
+    ) ON COMMIT DROP
+'''
+COLUMNAS_IMPORTACION = ["linea", "nombre", "apellido", "correo", "edad", "direccion"]
+
+# Filas que no caben en las columnas de estudiantes (se reportan en lugar de abortar la carga)
+DESCARTAR_IMPORTACION_LARGOS = '''
+    DELETE FROM estudiantes_import
+    WHERE length(nombre) > 100 OR length(apellido) > 100 OR length(correo) > 100 OR length(direccion) > 255
+    RETURNING linea, correo
+'''
+
+# Paso final: una sola sentencia desde la tabla temporal; ON CONFLICT cubre inserciones concurrentes
+INSERTAR_IMPORTACION = '''
+    INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion)
+    SELECT nombre, apellido, correo, edad, direccion FROM estudiantes_import ORDER BY linea
+    ON CONFLICT (correo) DO NOTHING
+    RETURNING correo
+'''
+
+def filas_importacion(validos):
+    return [(linea, e.nombre, e.apellido, e.correo, e.edad, e.direccion) for linea, e in validos]
+
+def separar_existentes(validos, existentes, report):
+    """Reporta las filas cuyo correo ya está registrado y devuelve las demás"""
+    report.add_errors([
+        {"linea": linea, "correo": e.correo, "error": "Ya existe un estudiante con este correo"}
+        for linea, e in validos if e.correo in existentes
+    ])
+    nuevos = [(linea, e) for linea, e in validos if e.correo not in existentes]
+    report.add_valid(len(nuevos))
+    return nuevos
+
+def rechazar_no_insertados(staged, insertados, report):
+    report.reject([
+        {"linea": linea, "correo": correo, "error": "Ya existe un estudiante con este correo"}
+        for correo, linea in staged.items() if correo not in insertados
+    ])
+
+# Ruta para importar estudiantes de forma masiva (CSV con encabezado o JSON por línea)
+@router.post("/import/", dependencies=[Depends(verificar_rol(3))])
+def import_estudiantes(
+    file: UploadFile = File(...),
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    dry_run: bool = False,
+    conn=Depends(get_db),
+):
+    """
+    Valida las filas contra el modelo Estudiante por lotes, detecta los correos ya
+    registrados con una consulta por lote y carga las válidas con COPY en una tabla
+    temporal, desde donde se insertan en una sola sentencia. Devuelve un reporte
+    con los errores por línea; con dry_run solo se valida.
+    """
+    fmt = detect_format(file, formato)
+    report = ImportReport(max_errors=Config.IMPORT_MAX_ERRORS, dry_run=dry_run)
+    staged = {}  # correo -> línea de las filas cargadas en la tabla temporal
+    cur = conn.cursor()
+    try:
+        cur.execute(CREAR_TABLA_IMPORTACION)
+        lotes = validate_batches(iter_records(file.file, fmt), Estudiante, Config.IMPORT_BATCH_SIZE, unique_field="correo")
+        for validos, errores in lotes:
+            report.add_errors(errores)
+            if not validos:
+                continue
+
+            # Correos ya registrados: una consulta por lote
+            cur.execute('SELECT correo FROM estudiantes WHERE correo = ANY(%s)', ([e.correo for _, e in validos],))
+            existentes = {row['correo'] for row in cur.fetchall()}
+            nuevos = separar_existentes(validos, existentes, report)
+
+            cur.copy_expert(
+                f"COPY estudiantes_import ({', '.join(COLUMNAS_IMPORTACION)}) FROM STDIN WITH (FORMAT csv)",
+                copy_buffer(filas_importacion(nuevos)),
+            )
+            staged.update((e.correo, linea) for linea, e in nuevos)
+
+        cur.execute(DESCARTAR_IMPORTACION_LARGOS)
+        largos = cur.fetchall()
+        report.reject([{"linea": row['linea'], "correo": row['correo'], "error": "Algún campo supera el largo permitido"} for row in largos])
+        for row in largos:
+            staged.pop(row['correo'], None)
+
+        if not dry_run and staged:
+            cur.execute(INSERTAR_IMPORTACION)
+            insertados = {row['correo'] for row in cur.fetchall()}
+            report.insertados = len(insertados)
+            rechazar_no_insertados(staged, insertados, report)
+            conn.commit()
+            if report.insertados:
+                table_versions.bump("estudiantes")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al importar los estudiantes: {str(e)}")
+    finally:
+        if cur is not None:
+            cur.close()
+
+    return report.to_dict()
+
+# Columnas de los estudiantes en las lecturas (lista, por id); compartida con routers/aio/estudiante.py
+SELECT_ESTUDIANTES = 'SELECT id, nombre, apellido, correo, edad, direccion FROM estudiantes'
+
+# Campos por los que se puede ordenar la lista de estudiantes
+ORDEN_ESTUDIANTES = {
+    "id": SortField("id", "id", cursor_int),
+    "nombre": SortField("nombre", "nombre", cursor_text),
+    "apellido": SortField("apellido", "apellido", cursor_text),
+    "correo": SortField("correo", "correo", cursor_text),
+}
+
+# Filtros de la lista de estudiantes (compartidos con routers/aio/estudiante.py)
+def filtros_estudiantes(qb, nombre=None, apellido=None, correo=None, edad_min=None, edad_max=None):
+    qb.where_if(like_prefix(nombre), "nombre ILIKE {}")
+    qb.where_if(like_prefix(apellido), "apellido ILIKE {}")
+    qb.where_if(correo, "correo = {}")
+    qb.where_if(edad_min, "edad >= {}")
+    qb.where_if(edad_max, "edad <= {}")
 
 # Ruta para obtener todos los estudiantes
-@router.get("/estudiante_view")
-def get_estudiantes():
+@router.get("/estudiante_view", dependencies=[Depends(etag_tables("estudiantes"))])
+def get_estudiantes(
+    response: Response,
+    nombre: Optional[str] = None,
+    apellido: Optional[str] = None,
+    correo: Optional[str] = None,
+    edad_min: Optional[int] = None,
+    edad_max: Optional[int] = None,
+    page: PageParams = Depends(page_params),
+    conn=Depends(get_db),
+):
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todos, como antes)
+    qb = QueryBuilder()
+    filtros_estudiantes(qb, nombre, apellido, correo, edad_min, edad_max)
+    order = order_and_limit(qb, page, ORDEN_ESTUDIANTES, legacy_order=" ORDER BY id")
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute('SELECT id, nombre, apellido, correo, edad, direccion FROM estudiantes ORDER BY id')
-        estudiantes_data = cur.fetchall()
-        
-        # Convertir los datos a lista de diccionarios
-        estudiantes = []
-        for row in estudiantes_data:
-            estudiante_dict = {
-                "id": row['id'],
-                "nombre": row['nombre'],
-                "apellido": row['apellido'],
-                "correo": row['correo'],
-                "edad": row['edad'],
-                "direccion": row['direccion']
-            }
-            estudiantes.append(estudiante_dict)
-        
-        return estudiantes
+        cur.execute(SELECT_ESTUDIANTES + qb.where_sql() + order, qb.params)
+        estudiantes_data, next_cursor = split_page(cur.fetchall(), page, ORDEN_ESTUDIANTES)
+        set_next_cursor(response, next_cursor)
+        
+        # Las filas se serializan tal cual (sin copiarlas a dicts nuevos)
+        return json_rows(estudiantes_data, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error en get_estudiantes: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error al obtener los estudiantes: {str(e)}")
     finally:
-        if 'cur' in locals():
+        if cur is not None:
+            cur.close()
+
+# Texto en el que se busca; idéntico a la expresión del índice de migrations/005_busqueda_trigram.sql
+DOCUMENTO_ESTUDIANTES = "(nombre || ' ' || apellido || ' ' || correo)"
+COLUMNAS_BUSQUEDA_ESTUDIANTES = "id, nombre, apellido, correo, edad, direccion"
+
+# Ruta para buscar estudiantes por nombre, apellido o correo (tolera errores de tipeo)
+@router.get("/buscar", dependencies=[Depends(etag_tables("estudiantes"))])
+def buscar_estudiantes(response: Response, search: SearchParams = Depends(search_params), conn=Depends(get_db)):
+    qb = QueryBuilder()
+    sql = search_sql(qb, "estudiantes", COLUMNAS_BUSQUEDA_ESTUDIANTES, DOCUMENTO_ESTUDIANTES, search)
+    cur = None
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, qb.params)
+        return json_rows(cur.fetchall(), response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar estudiantes: {str(e)}")
+    finally:
+        if cur is not None:
             cur.close()
-        if 'conn' in locals():
-            conn.close()
 
 # Ruta para obtener un estudiante por ID
 @router.get("/{id}", response_model=Estudiante)
-def get_estudiante(id: int):
+def get_estudiante(id: int, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute('SELECT id, nombre, apellido, correo, edad, direccion FROM estudiantes WHERE id = %s', (id,))
+        cur.execute(SELECT_ESTUDIANTES + ' WHERE id = %s', (id,))
         estudiante_data = cur.fetchone()
         
         if estudiante_data is None:
@@ -115,29 +265,18 @@ def get_estudiante(id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener el estudiante: {str(e)}")
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
 
 # Ruta para actualizar la información de un estudiante por su ID
 @router.put("/update/{id}", response_model=Estudiante)
-def update_estudiante(id: int, estudiante: Estudiante):
+def update_estudiante(id: int, estudiante: Estudiante, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
         
-        # Verificar si el estudiante existe
-        cur.execute('SELECT id FROM estudiantes WHERE id = %s', (id,))
-        existing = cur.fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
-        
-        # Verificar si el correo ya existe en otro estudiante
-        cur.execute('SELECT id FROM estudiantes WHERE correo = %s AND id != %s', (estudiante.correo, id))
-        duplicate = cur.fetchone()
-        if duplicate:
-            raise HTTPException(status_code=400, detail="Ya existe otro estudiante con este correo")
-        
-        # Actualizar el estudiante
+        # Actualizar el estudiante: sin fila devuelta no existe, y el índice único
+        # de correo rechaza el correo de otro estudiante
         cur.execute(
             'UPDATE estudiantes SET nombre = %s, apellido = %s, correo = %s, edad = %s, direccion = %s WHERE id = %s RETURNING id, nombre, apellido, correo, edad, direccion',
             (estudiante.nombre, estudiante.apellido, estudiante.correo, estudiante.edad, estudiante.direccion, id)
@@ -147,6 +286,7 @@ def update_estudiante(id: int, estudiante: Estudiante):
         
         if updated_estudiante_data is None:
             raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+        table_versions.bump("estudiantes")
         
         updated_estudiante = Estudiante(
             id=updated_estudiante_data['id'],
@@ -161,29 +301,31 @@ def update_estudiante(id: int, estudiante: Estudiante):
         
     except HTTPException:
         raise
+    except errors.UniqueViolation:
+        conn.rollback()
+        raise HTTPException(status_code=400, detail="Ya existe otro estudiante con este correo")
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al actualizar el estudiante: {str(e)}")
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
 
 # Ruta para eliminar un estudiante por su ID
 @router.delete("/delete/{id}")
-def delete_estudiante(id: int):
+def delete_estudiante(id: int, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
         
-        # Verificar si el estudiante existe
-        cur.execute('SELECT id FROM estudiantes WHERE id = %s', (id,))
-        existing = cur.fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
-        
-        # Eliminar el estudiante
-        cur.execute('DELETE FROM estudiantes WHERE id = %s', (id,))
+        # Eliminar el estudiante (sin fila devuelta no existía)
+        cur.execute('DELETE FROM estudiantes WHERE id = %s RETURNING id', (id,))
+        deleted = cur.fetchone()
         conn.commit()
+        if deleted is None:
+            raise HTTPException(status_code=404, detail="Estudiante no encontrado")
+        # Sus asignaciones se eliminan en cascada
+        table_versions.bump("estudiantes", "asignacion")
         
         return {"message": "Estudiante eliminado exitosamente", "id": id}
         
@@ -193,5 +335,5 @@ def delete_estudiante(id: int):
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar el estudiante: {str(e)}")
     finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+        if cur is not None:
+            cur.close()
\ No newline at end of file
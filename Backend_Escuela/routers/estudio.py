@@ -1,15 +1,20 @@
 # routers/estudio.py
-from fastapi import APIRouter, HTTPException
-from db import get_db_connection
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from db import get_db
 from models.estudio import Estudio
+from pagination import (QueryBuilder, SortField, cursor_int, cursor_text, PageParams, page_params, like_prefix,
+                        order_and_limit, split_page, set_next_cursor)
+from responses import json_rows, etag_tables
+from cache import table_versions
 
 router = APIRouter()
 
 # Ruta para crear un nuevo estudio
 @router.post("/estudios_create/")
-def create_estudio(estudio: Estudio):
+def create_estudio(estudio: Estudio, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
         cur.execute('INSERT INTO estudios (nombre, descripcion, profesor_id) VALUES (%s, %s, %s) RETURNING *',
                     (estudio.nombre, estudio.descripcion, estudio.profesor_id))
@@ -17,33 +22,63 @@ def create_estudio(estudio: Estudio):
         conn.commit()
         if new_estudio is None:
             raise HTTPException(status_code=400, detail="Error al crear el estudio")
+        table_versions.bump("estudios")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear el estudio: {e}")
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
     return new_estudio
 
+# Lista de estudios; compartida con routers/aio/estudio.py
+SELECT_ESTUDIOS = 'SELECT * FROM estudios'
+
+# Campos por los que se puede ordenar la lista de estudios
+ORDEN_ESTUDIOS = {
+    "id": SortField("id", "id", cursor_int),
+    "nombre": SortField("nombre", "nombre", cursor_text),
+}
+
+# Filtros de la lista de estudios (compartidos con routers/aio/estudio.py)
+def filtros_estudios(qb, nombre=None, profesor_id=None):
+    qb.where_if(like_prefix(nombre), "nombre ILIKE {}")
+    qb.where_if(profesor_id, "profesor_id = {}")
+
 # Ruta para obtener todos los estudios
-@router.get("/estudios_get/")
-def get_estudios():
+@router.get("/estudios_get/", dependencies=[Depends(etag_tables("estudios"))])
+def get_estudios(
+    response: Response,
+    nombre: Optional[str] = None,
+    profesor_id: Optional[int] = None,
+    page: PageParams = Depends(page_params),
+    conn=Depends(get_db),
+):
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todos, como antes)
+    qb = QueryBuilder()
+    filtros_estudios(qb, nombre, profesor_id)
+    order = order_and_limit(qb, page, ORDEN_ESTUDIOS)
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute('SELECT * FROM estudios')
-        estudios = cur.fetchall()
+        cur.execute(SELECT_ESTUDIOS + qb.where_sql() + order, qb.params)
+        estudios, next_cursor = split_page(cur.fetchall(), page, ORDEN_ESTUDIOS)
+        set_next_cursor(response, next_cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener los estudios: {e}")
     finally:
-        cur.close()
-        conn.close()
-    return estudios
+        if cur is not None:
+            cur.close()
+    return json_rows(estudios, response)
 
 # Ruta para actualizar la información de un estudio por su ID
 @router.put("/estudios_update/{id}")
-def update_estudio(id: int, estudio: Estudio):
+def update_estudio(id: int, estudio: Estudio, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
         cur.execute('UPDATE estudios SET nombre = %s, descripcion = %s, profesor_id = %s WHERE id = %s RETURNING *',
                     (estudio.nombre, estudio.descripcion, estudio.profesor_id, id))
@@ -51,31 +86,34 @@ def update_estudio(id: int, estudio: Estudio):
         conn.commit()
         if updated_estudio is None:
             raise HTTPException(status_code=404, detail="Estudio no encontrado")
+        table_versions.bump("estudios")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al actualizar el estudio: {e}")
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
     return updated_estudio
 
 # Ruta para eliminar un estudio por su ID
 @router.delete("/estudios_delete/{id}")
-def delete_estudio(id: int):
+def delete_estudio(id: int, conn=Depends(get_db)):
+    cur = None
     try:
-        conn = get_db_connection()
         cur = conn.cursor()
         cur.execute('DELETE FROM estudios WHERE id = %s RETURNING *', (id,))
         deleted_estudio = cur.fetchone()
         conn.commit()
         if deleted_estudio is None:
             raise HTTPException(status_code=404, detail="Estudio no encontrado")
+        # Sus asignaciones se eliminan en cascada
+        table_versions.bump("estudios", "asignacion")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar el estudio: {e}")
     finally:
-        cur.close()
-        conn.close()
+        if cur is not None:
+            cur.close()
     return {"message": "Estudio eliminado"}
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import jwt
-from db import get_db_connection
-from bcrypt import checkpw
+from db import get_db
+from security.passwords import verify_password_async, rehash_if_needed_async
+from security.tokens import create_login_token
+from security.auth import SQL_BUSCAR_USUARIO
 from config import Config  # Asegúrate de importar la clase Config
 import logging
 
@@ -15,28 +17,30 @@ ALGORITHM = Config.ALGORITHM
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 
+# Consultar el usuario, su rol y su perfil (psycopg2 es bloqueante: se ejecuta en el threadpool)
+def buscar_usuario(conn, correo):
+    cur = conn.cursor()
+    try:
+        cur.execute(SQL_BUSCAR_USUARIO.format("%s"), (correo,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+
+# Guardar el hash regenerado con los parámetros actuales del servicio de contraseñas
+def actualizar_contrasena(conn, user_id, hashed):
+    cur = conn.cursor()
+    try:
+        cur.execute("UPDATE usuarios SET contrasena = %s WHERE id = %s", (hashed, user_id))
+    finally:
+        cur.close()
+
 # Ruta para iniciar sesión y obtener el token JWT
 @router.post("/")
-async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), conn=Depends(get_db)):
     logging.info(f"Usuario: {form_data.username}, Password: {form_data.password}")
-    conn = None
-    cur = None
     try:
-        # Conexión a la base de datos
-        conn = get_db_connection()
-        cur = conn.cursor()
-
         # Consultar el usuario y su rol
-        cur.execute(
-            """ 
-            SELECT u.*, r.nombre AS rol_nombre
-            FROM public.usuarios u
-            JOIN public.roles r ON u.rol_id = r.id  -- Usando rol_id aquí
-            WHERE u.correo = %s
-        """,
-            (form_data.username,),
-        )
-        user = cur.fetchone()
+        user = await run_in_threadpool(buscar_usuario, conn, form_data.username)
 
         # Verificar si se encontró al usuario
         if not user:
@@ -44,20 +48,25 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
                 status_code=400, detail="Nombre de usuario o contraseña incorrectos"
             )
 
-        # Verificar contraseña
-        if not checkpw(
-            form_data.password.encode("utf-8"), user["contrasena"].encode("utf-8")
-        ):
+        # Verificar contraseña (en el pool de procesos, sin bloquear el event loop)
+        if not await verify_password_async(form_data.password, user["contrasena"]):
             raise HTTPException(status_code=400, detail=" contraseña incorrecta")
 
+        # Regenerar el hash si se creó con otro esquema o costo (no impide el inicio de sesión)
+        try:
+            new_hash = await rehash_if_needed_async(form_data.password, user["contrasena"])
+            if new_hash:
+                await run_in_threadpool(actualizar_contrasena, conn, user["id"], new_hash)
+        except Exception as e:
+            logging.warning(f"No se pudo actualizar el hash del usuario {user['id']}: {e}")
+
         # Verificar rol---=agregado para validar derechos de usuario=
         #if user["rol_nombre"] != "admin":
             #raise HTTPException(status_code=403, detail="No tiene permisos para acceder a este recurso")
         
     
-        # Crear token JWT
-        token_data = {"sub": user["correo"], "rol": user["rol_nombre"], "rol_id": user["rol_id"]}
-        token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+        # Crear token JWT (con el perfil embebido si AUTH_STATELESS está activo)
+        token = create_login_token(user)
 
         # Preparar respuesta con información del usuario
         user_info = {
@@ -73,12 +82,6 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
         raise  # Relevamos el error específico
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al iniciar sesión: {e}")
-    finally:
-        # Cerramos el cursor y la conexión
-        if cur is not None:
-            cur.close()
-        if conn is not None:
-            conn.close()
 
     return {
         "access_token": token, 
@@ -1,44 +1,41 @@
 
-from fastapi import APIRouter, HTTPException
-from db import get_db_connection
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from psycopg2 import errors
+from db import get_db
 from models.profesores import Profesor
+from pagination import (QueryBuilder, SortField, cursor_int, cursor_text, PageParams, page_params, like_prefix,
+                        order_and_limit, split_page, set_next_cursor, SearchParams, search_params, search_sql)
+from responses import json_rows, etag_tables
+from cache import table_versions
 
 router = APIRouter()
 
 # Endpoint para listar profesores
-@router.get("/profesores/list")
-def listar_profesores():
-    conn = get_db_connection()
+@router.get("/profesores/list", dependencies=[Depends(etag_tables("profesores"))])
+def listar_profesores(conn=Depends(get_db)):
     cur = conn.cursor()
     cur.execute('SELECT id, nombre, apellido FROM profesores')
     profesores = cur.fetchall()
-    cur.close(); conn.close()
+    cur.close()
     return profesores
 
 # Ruta para crear un nuevo profesor
 @router.post("/profesores_create/", response_model=Profesor)
-def create_profesor(profesor: Profesor):
-    conn = None
+def create_profesor(profesor: Profesor, conn=Depends(get_db)):
     cur = None
     try:
-        # Conexión a la base de datos
-        conn = get_db_connection()
         cur = conn.cursor()
         
-        # Verificar si el correo ya existe en la base de datos
-        cur.execute('SELECT id FROM profesores WHERE correo = %s', (profesor.correo,))
-        existing_profesor = cur.fetchone()
-        if existing_profesor:
-            raise HTTPException(status_code=400, detail="El correo ya está registrado")
-        
-        # Insertar nuevo profesor en la base de datos
-        cur.execute('INSERT INTO profesores (nombre, apellido, correo, especialidad, usuario_id) VALUES (%s, %s, %s, %s, %s) RETURNING id, nombre, apellido, correo, especialidad, usuario_id',
+        # Insertar nuevo profesor en la base de datos; si el correo ya existe no se inserta nada
+        cur.execute('INSERT INTO profesores (nombre, apellido, correo, especialidad, usuario_id) VALUES (%s, %s, %s, %s, %s) ON CONFLICT (correo) DO NOTHING RETURNING id, nombre, apellido, correo, especialidad, usuario_id',
                     (profesor.nombre, profesor.apellido, profesor.correo, profesor.especialidad, profesor.usuario_id))
         new_profesor_data = cur.fetchone()
         conn.commit()
         
         if new_profesor_data is None:
-            raise HTTPException(status_code=400, detail="Error al crear el profesor")
+            raise HTTPException(status_code=400, detail="El correo ya está registrado")
+        table_versions.bump("profesores")
         
         # Crear objeto Profesor con los datos retornados
         new_profesor = Profesor(
@@ -59,71 +56,91 @@ def create_profesor(profesor: Profesor):
         # Manejamos cualquier otro error
         raise HTTPException(status_code=500, detail=f"Error al crear el profesor: {e}")
     finally:
-        # Cerramos el cursor y la conexión
+        # Cerramos el cursor (la conexión vuelve al pool)
         if cur is not None:
             cur.close()
-        if conn is not None:
-            conn.close()
+
+# Columnas de los profesores en la lista; compartida con routers/aio/profesores.py
+SELECT_PROFESORES = 'SELECT id, nombre, apellido, correo, especialidad, usuario_id FROM profesores'
+
+# Campos por los que se puede ordenar la lista de profesores
+ORDEN_PROFESORES = {
+    "id": SortField("id", "id", cursor_int),
+    "nombre": SortField("nombre", "nombre", cursor_text),
+    "apellido": SortField("apellido", "apellido", cursor_text),
+    "especialidad": SortField("especialidad", "especialidad", cursor_text),
+}
+
+# Filtros de la lista de profesores (compartidos con routers/aio/profesores.py)
+def filtros_profesores(qb, nombre=None, apellido=None, especialidad=None):
+    qb.where_if(like_prefix(nombre), "nombre ILIKE {}")
+    qb.where_if(like_prefix(apellido), "apellido ILIKE {}")
+    qb.where_if(especialidad, "especialidad = {}")
 
 # Ruta para obtener todos los profesores
-@router.get("/profesores_get/")
-def get_profesores():
-    conn = None
+@router.get("/profesores_get/", dependencies=[Depends(etag_tables("profesores"))])
+def get_profesores(
+    response: Response,
+    nombre: Optional[str] = None,
+    apellido: Optional[str] = None,
+    especialidad: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+    conn=Depends(get_db),
+):
+    # Filtros, orden y cursor (limit opcional: sin él se devuelven todos, como antes)
+    qb = QueryBuilder()
+    filtros_profesores(qb, nombre, apellido, especialidad)
+    order = order_and_limit(qb, page, ORDEN_PROFESORES, legacy_order=" ORDER BY id")
     cur = None
     try:
-        # Conexión a la base de datos
-        conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute('SELECT id, nombre, apellido, correo, especialidad, usuario_id FROM profesores ORDER BY id')
-        profesores_data = cur.fetchall()
+        cur.execute(SELECT_PROFESORES + qb.where_sql() + order, qb.params)
+        profesores_data, next_cursor = split_page(cur.fetchall(), page, ORDEN_PROFESORES)
+        set_next_cursor(response, next_cursor)
         
-        # Convertir los datos a lista de diccionarios
-        profesores = []
-        for row in profesores_data:
-            profesor_dict = {
-                "id": row['id'],
-                "nombre": row['nombre'],
-                "apellido": row['apellido'],
-                "correo": row['correo'],
-                "especialidad": row['especialidad'],
-                "usuario_id": row['usuario_id']
-            }
-            profesores.append(profesor_dict)
-        
-        return profesores
+        # Las filas se serializan tal cual (sin copiarlas a dicts nuevos)
+        return json_rows(profesores_data, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener los profesores: {e}")
     finally:
-        # Cerramos el cursor y la conexión
+        # Cerramos el cursor (la conexión vuelve al pool)
+        if cur is not None:
+            cur.close()
+
+# Texto en el que se busca; idéntico a la expresión del índice de migrations/005_busqueda_trigram.sql
+DOCUMENTO_PROFESORES = "(nombre || ' ' || apellido || ' ' || correo || ' ' || especialidad)"
+COLUMNAS_BUSQUEDA_PROFESORES = "id, nombre, apellido, correo, especialidad, usuario_id"
+
+# Ruta para buscar profesores por nombre, apellido, correo o especialidad (tolera errores de tipeo)
+@router.get("/profesores/buscar", dependencies=[Depends(etag_tables("profesores"))])
+def buscar_profesores(response: Response, search: SearchParams = Depends(search_params), conn=Depends(get_db)):
+    qb = QueryBuilder()
+    sql = search_sql(qb, "profesores", COLUMNAS_BUSQUEDA_PROFESORES, DOCUMENTO_PROFESORES, search)
+    cur = None
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, qb.params)
+        return json_rows(cur.fetchall(), response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al buscar profesores: {e}")
+    finally:
         if cur is not None:
             cur.close()
-        if conn is not None:
-            conn.close()
 
 # Ruta para actualizar la información de un profesor por su ID
 @router.put("/profesores_update/{id}", response_model=Profesor)
-def update_profesor(id: int, profesor: Profesor):
-    conn = None
+def update_profesor(id: int, profesor: Profesor, conn=Depends(get_db)):
     cur = None
     try:
-        # Conexión a la base de datos
-        conn = get_db_connection()
         cur = conn.cursor()
         
-        # Verificar si el profesor existe
-        cur.execute('SELECT id FROM profesores WHERE id = %s', (id,))
-        existing = cur.fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="Profesor no encontrado")
-        
-        # Verificar si el correo ya existe en otro profesor
-        cur.execute('SELECT id FROM profesores WHERE correo = %s AND id != %s', (profesor.correo, id))
-        duplicate = cur.fetchone()
-        if duplicate:
-            raise HTTPException(status_code=400, detail="Ya existe otro profesor con este correo")
-        
-        # Actualizar el profesor
+        # Actualizar el profesor: sin fila devuelta no existe, y el índice único
+        # de correo rechaza el correo de otro profesor
         cur.execute('UPDATE profesores SET nombre = %s, apellido = %s, correo = %s, especialidad = %s, usuario_id = %s WHERE id = %s RETURNING id, nombre, apellido, correo, especialidad, usuario_id',
                     (profesor.nombre, profesor.apellido, profesor.correo, profesor.especialidad, profesor.usuario_id, id))
         updated_profesor_data = cur.fetchone()
@@ -131,6 +148,7 @@ def update_profesor(id: int, profesor: Profesor):
 
         if updated_profesor_data is None:
             raise HTTPException(status_code=404, detail="Profesor no encontrado")
+        table_versions.bump("profesores")
         
         updated_profesor = Profesor(
             id=updated_profesor_data['id'],
@@ -145,24 +163,22 @@ def update_profesor(id: int, profesor: Profesor):
             
     except HTTPException:
         raise
+    except errors.UniqueViolation:
+        conn.rollback()
+        raise HTTPException(status_code=400, detail="Ya existe otro profesor con este correo")
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al actualizar el profesor: {e}")
     finally:
-        # Cerramos el cursor y la conexión
+        # Cerramos el cursor (la conexión vuelve al pool)
         if cur is not None:
             cur.close()
-        if conn is not None:
-            conn.close()
 
 # Ruta para eliminar un profesor por su ID
 @router.delete("/profesores_delete/{id}")
-def delete_profesor(id: int):
-    conn = None
+def delete_profesor(id: int, conn=Depends(get_db)):
     cur = None
     try:
-        # Conexión a la base de datos
-        conn = get_db_connection()
         cur = conn.cursor()
         cur.execute('DELETE FROM profesores WHERE id = %s RETURNING *', (id,))
         deleted_profesor = cur.fetchone()
@@ -170,16 +186,16 @@ def delete_profesor(id: int):
 
         if deleted_profesor is None:
             raise HTTPException(status_code=404, detail="Profesor no encontrado")
+        # Sus materias quedan sin profesor (ON DELETE SET NULL)
+        table_versions.bump("profesores", "estudios")
             
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar el profesor: {e}")
     finally:
-        # Cerramos el cursor y la conexión
+        # Cerramos el cursor (la conexión vuelve al pool)
         if cur is not None:
             cur.close()
-        if conn is not None:
-            conn.close()
 
     return {"message": "Profesor eliminado"}
@@ -1,72 +1,184 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
 
-from db import get_db_connection
-from models.rol_user import Usuario  # Asegúrate de que el modelo Usuario esté definido correctamente
-
-# Contexto de encriptación para las contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from config import Config
+from db import get_db
+from cache import table_versions
+from security.auth import invalidar_usuario, verificar_rol
+from security.passwords import hash_passwords
+from models.rol_user import Usuario, UsuarioLote, ROL_PROFESOR, ROL_ESTUDIANTE, ROL_ADMIN
 
 router = APIRouter()
 
+def _sql_registro(vincular):
+    """
+    Registro en una sola sentencia: el usuario y su perfil de estudiante o profesor se
+    crean juntos (o ninguno).
+
+    @param vincular: Si un estudiante/profesor ya cargado sin usuario (p. ej. por
+        /estudiantes/create/) se vincula al usuario nuevo. Solo para el registro en lote
+        de los administradores: el correo no se verifica, así que en el registro público
+        un perfil existente no se entrega a quien lo reclame.
+    """
+    def perfil_existente(tabla):
+        if vincular:
+            return f"DO UPDATE SET usuario_id = EXCLUDED.usuario_id WHERE {tabla}.usuario_id IS NULL"
+        return "DO NOTHING"
+
+    return '''
+    WITH datos AS (
+        SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::int[], %s::int[], %s::text[], %s::text[])
+            AS d(nombre, apellido, correo, contrasena, rol_id, edad, direccion, especialidad)
+    ), nuevos AS (
+        INSERT INTO usuarios (nombre, apellido, correo, contrasena, rol_id)
+        SELECT nombre, apellido, correo, contrasena, rol_id FROM datos
+        ON CONFLICT (correo) DO NOTHING
+        RETURNING id, nombre, apellido, correo, rol_id
+    ), estudiantes_nuevos AS (
+        INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion, usuario_id)
+        SELECT n.nombre, n.apellido, n.correo, d.edad, d.direccion, n.id
+        FROM nuevos n JOIN datos d USING (correo)
+        WHERE n.rol_id = {estudiante}
+        ON CONFLICT (correo) {conflicto_estudiantes}
+        RETURNING id, usuario_id
+    ), profesores_nuevos AS (
+        INSERT INTO profesores (nombre, apellido, correo, especialidad, usuario_id)
+        SELECT n.nombre, n.apellido, n.correo, d.especialidad, n.id
+        FROM nuevos n JOIN datos d USING (correo)
+        WHERE n.rol_id = {profesor}
+        ON CONFLICT (correo) {conflicto_profesores}
+        RETURNING id, usuario_id
+    )
+    SELECT n.id, n.nombre, n.apellido, n.correo, n.rol_id, e.id AS estudiante_id, p.id AS profesor_id
+    FROM nuevos n
+    LEFT JOIN estudiantes_nuevos e ON e.usuario_id = n.id
+    LEFT JOIN profesores_nuevos p ON p.usuario_id = n.id
+    ORDER BY n.id
+'''.format(estudiante=ROL_ESTUDIANTE, profesor=ROL_PROFESOR,
+           conflicto_estudiantes=perfil_existente("estudiantes"),
+           conflicto_profesores=perfil_existente("profesores"))
+
+# Registro público: un correo que ya tiene perfil de estudiante o profesor se rechaza
+SQL_REGISTRO = _sql_registro(vincular=False)
+# Registro en lote (administradores): los perfiles sin usuario se vinculan al usuario nuevo
+SQL_REGISTRO_VINCULAR = _sql_registro(vincular=True)
+
+def correos_registrados(cur, correos):
+    """Correos de la lista que ya tienen usuario (para no gastar hashes en ellos)"""
+    cur.execute('SELECT correo FROM usuarios WHERE correo = ANY(%s)', (correos,))
+    return {row['correo'] for row in cur.fetchall()}
+
+def registrar(cur, usuarios, vincular=False):
+    """
+    Crea los usuarios y sus perfiles vinculados en una sola sentencia.
+    Las contraseñas se hashean en paralelo en el pool de procesos del servicio de contraseñas.
+
+    @param usuarios: Usuarios a registrar (sin correos repetidos ni ya registrados)
+    @param vincular: Vincular los estudiantes/profesores existentes sin usuario (solo administradores)
+    @return: Filas creadas con estudiante_id / profesor_id
+    @raises HTTPException: Si el correo ya pertenece a un estudiante o profesor (vinculado a otro
+        usuario, si vincular es True)
+    """
+    hashes = hash_passwords([u.contrasena for u in usuarios])
+    cur.execute(SQL_REGISTRO_VINCULAR if vincular else SQL_REGISTRO, (
+        [u.nombre for u in usuarios], [u.apellido for u in usuarios], [u.correo for u in usuarios], hashes,
+        [u.rol_id for u in usuarios], [u.edad for u in usuarios], [u.direccion for u in usuarios],
+        [u.especialidad for u in usuarios],
+    ))
+    filas = cur.fetchall()
+    sin_perfil = [f['correo'] for f in filas
+                  if (f['rol_id'] == ROL_ESTUDIANTE and f['estudiante_id'] is None)
+                  or (f['rol_id'] == ROL_PROFESOR and f['profesor_id'] is None)]
+    if sin_perfil:
+        motivo = "vinculado a otro usuario" if vincular else "registrado"
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ya existe un estudiante o profesor {motivo} con este correo: {', '.join(sin_perfil)}",
+        )
+    return filas
+
+def confirmar_registro(conn, filas):
+    conn.commit()
+    tablas = set()
+    for fila in filas:
+        # Descartar cualquier entrada previa con este correo en la caché de usuarios
+        invalidar_usuario(correo=fila['correo'])
+        if fila['estudiante_id'] is not None:
+            tablas.add("estudiantes")
+        if fila['profesor_id'] is not None:
+            tablas.add("profesores")
+    if tablas:
+        table_versions.bump(*tablas)
+
 # Ruta para registrar un nuevo usuario
 @router.post("/registro/")
-def registrar_usuario(usuario: Usuario):
-    conn = None
+def registrar_usuario(usuario: Usuario, conn=Depends(get_db)):
     cur = None
     try:
-        # Conexión a la base de datos
-        conn = get_db_connection()
         cur = conn.cursor()
 
-        # Verificar si el correo ya está registrado
-        cur.execute('SELECT * FROM usuarios WHERE correo = %s', (usuario.correo,))
-        existing_user = cur.fetchone()
-        if existing_user:
+        # Verificar si el correo ya está registrado (antes de calcular el hash)
+        if correos_registrados(cur, [usuario.correo]):
             raise HTTPException(status_code=400, detail="El correo ya está registrado")
 
-        # Encriptar la contraseña antes de guardarla
-        hashed_password = pwd_context.hash(usuario.contrasena)
+        filas = registrar(cur, [usuario])
+        # Registrado en paralelo por otra petición entre la verificación y el INSERT
+        if not filas:
+            raise HTTPException(status_code=400, detail="El correo ya está registrado")
+        confirmar_registro(conn, filas)
 
-        # Insertar nuevo usuario con rol_id en la base de datos
-        if usuario.rol_id == 3:
-            cur.execute(
-                'INSERT INTO usuarios (nombre, apellido, correo, contrasena, rol_id) VALUES (%s, %s, %s, %s, %s) RETURNING *',
-                (usuario.nombre, usuario.apellido, usuario.correo, hashed_password, usuario.rol_id)
-        )
-        # insertar en tabla estudiantes..    
-        if usuario.rol_id == 1:
-            cur.execute(
-                'INSERT INTO estudiantes (nombre, apellido, correo, contrasena, rol_id) VALUES (%s, %s, %s, %s, %s) RETURNING *',
-                (usuario.nombre, usuario.apellido, usuario.correo, hashed_password, usuario.rol_id)
-        )
-        # insertar en tabla profesores..
-        if usuario.rol_id == 2:
-            cur.execute(
-                'INSERT INTO profesores (nombre, apellido, correo, contrasena, rol_id) VALUES (%s, %s, %s, %s, %s) RETURNING *',
-                (usuario.nombre, usuario.apellido, usuario.correo, hashed_password, usuario.rol_id)
-        )
-        # insertar en tabla profesores..
-        if usuario.rol_id == 2:
-            cur.execute(
-                'INSERT INTO profesores (nombre, apellido, correo, contrasena, rol_id) VALUES (%s, %s, %s, %s, %s) RETURNING *',
-                (usuario.nombre, usuario.apellido, usuario.correo, hashed_password, usuario.rol_id)
-        )
-        new_usuario = cur.fetchone()
-        conn.commit()
-        
     except HTTPException:
         # Relevamos el error específico
+        conn.rollback()
         raise
     except Exception as e:
         # Manejamos cualquier otro error
+        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error al registrar el usuario: {e}")
     finally:
-        # Cerramos el cursor y la conexión si fueron creados
+        # Cerramos el cursor si fue creado (la conexión vuelve al pool)
+        if cur is not None:
+            cur.close()
+
+    return filas[0]
+
+# Ruta para registrar una lista de clase completa (solo administradores)
+@router.post("/registro/lote/", dependencies=[Depends(verificar_rol(ROL_ADMIN))])
+def registrar_usuarios_lote(lote: UsuarioLote, conn=Depends(get_db)):
+    """
+    Registra todos los usuarios de la lista en una transacción: si un perfil no se puede
+    vincular no se registra ninguno. Los correos ya registrados se omiten.
+
+    @param lote: Usuarios a registrar (hasta REGISTRO_LOTE_MAX)
+    @return: Usuarios creados y correos omitidos
+    @raises HTTPException: Si el lote es demasiado grande o un perfil no se puede vincular
+    """
+    if len(lote.usuarios) > Config.REGISTRO_LOTE_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote tiene {len(lote.usuarios)} usuarios; el máximo es {Config.REGISTRO_LOTE_MAX}",
+        )
+
+    cur = None
+    try:
+        cur = conn.cursor()
+        existentes = correos_registrados(cur, [u.correo for u in lote.usuarios])
+        nuevos = [u for u in lote.usuarios if u.correo not in existentes]
+        filas = registrar(cur, nuevos, vincular=True) if nuevos else []
+        confirmar_registro(conn, filas)
+    except HTTPException:
+        conn.rollback()
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al registrar los usuarios: {e}")
+    finally:
         if cur is not None:
             cur.close()
-        if conn is not None:
-            conn.close()
 
-    return new_usuario
+    creados = {fila['correo'] for fila in filas}
+    return {
+        "registrados": len(filas),
+        "usuarios": filas,
+        "omitidos": [u.correo for u in lote.usuarios if u.correo not in creados],
+    }
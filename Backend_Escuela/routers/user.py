@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
-from jose import jwt, JWTError
-from db import get_db_connection
-from security.tokens import create_access_token
-from security.auth import get_current_user, verificar_rol
-from passlib.context import CryptContext  # Importar CryptContext para la verificación de contraseñas
+from db import get_db
+from security.tokens import create_access_token, revoke_token
+from security.auth import get_current_user, get_token_claims, verificar_rol, invalidar_usuario
+from security.passwords import verify_password
 from models.user import User, UserUpdate, UserProfile
 
 
@@ -16,21 +15,14 @@ ROLES_VALIDOS = [1, 2, 3]  # 1: estudiante, 2: profesor, 3: administrador
 
 # Configuración para JWT
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-SECRET_KEY = "tu_clave_secreta"  # Cambia esto por tu clave real
-ALGORITHM = "HS256"
-security = HTTPBearer()
 
-# Contexto de encriptación para verificar contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Verificación de contraseña hasheada
+# Verificación de contraseña hasheada (servicio de contraseñas, cualquier esquema soportado)
 def verificar_contrasena(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_password(plain_password, hashed_password)
 
 # Ruta para iniciar sesión
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    conn = get_db_connection()
+def login(form_data: OAuth2PasswordRequestForm = Depends(), conn=Depends(get_db)):
     cur = conn.cursor()
     
     try:
@@ -56,9 +48,8 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al iniciar sesión: {e}")
     finally:
-        # Cerrar el cursor y la conexión si fueron creados
+        # Cerrar el cursor (la conexión vuelve al pool)
         cur.close()
-        conn.close()
 
 # Ruta para obtener información del usuario actual
 @router.get("/me", dependencies=[Depends(get_current_user)])
@@ -79,21 +70,18 @@ def get_current_user_profile(current_user: dict = Depends(get_current_user)):
 
 # Endpoint para obtener perfil de usuario por id
 @router.get("/usuarios/perfil/{id}", response_model=User)
-def get_user_profile(id: int):
-    conn = get_db_connection()
+def get_user_profile(id: int, conn=Depends(get_db)):
     cur = conn.cursor()
     cur.execute("SELECT id, nombre, apellido, correo FROM usuarios WHERE id = %s", (id,))
     user_data = cur.fetchone()
     cur.close()
-    conn.close()
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return User(id=user_data['id'], nombre=user_data['nombre'], apellido=user_data['apellido'], correo=user_data['correo'])
 
 # Endpoint para actualizar perfil de usuario
 @router.put("/usuarios/perfil/{id}", response_model=User)
-def update_user_profile(id: int, user_update: UserUpdate):
-    conn = get_db_connection()
+def update_user_profile(id: int, user_update: UserUpdate, conn=Depends(get_db)):
     cur = conn.cursor()
     cur.execute(
         "UPDATE usuarios SET nombre = %s, apellido = %s, correo = %s WHERE id = %s RETURNING id, nombre, apellido, correo",
@@ -102,9 +90,10 @@ def update_user_profile(id: int, user_update: UserUpdate):
     updated_user = cur.fetchone()
     conn.commit()
     cur.close()
-    conn.close()
     if not updated_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    # El correo o el nombre cambiaron: descartar el usuario en caché
+    invalidar_usuario(user_id=id)
     return User(id=updated_user['id'], nombre=updated_user['nombre'], apellido=updated_user['apellido'], correo=updated_user['correo'])
 
 # Ruta solo accesible para administradores (rol_id = 1)
@@ -122,45 +111,39 @@ def read_profesor_data(current_user: dict = Depends(get_current_user)):
 def read_estudiante_data(current_user: dict = Depends(get_current_user)):
     return {"message": "Datos de estudiante", "usuario": current_user}
 
+# Perfil completo del usuario; {0} es el marcador del correo (compartida con routers/aio/user.py)
+SQL_PERFIL = """
+    SELECT
+        u.id, u.nombre, u.apellido, u.correo, u.rol_id, r.nombre AS rol,
+        e.edad, e.direccion, e.id AS estudiante_id,
+        p.especialidad, p.id AS profesor_id
+    FROM usuarios u
+    LEFT JOIN roles r ON u.rol_id = r.id
+    LEFT JOIN estudiantes e ON u.id = e.usuario_id
+    LEFT JOIN profesores p ON u.id = p.usuario_id
+    WHERE u.correo = {0}
+"""
+
 # Endpoint para obtener el perfil del usuario autenticado usando JWT
 @router.get("/perfil/", response_model=UserProfile)
-def get_user_profile(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def get_user_profile(claims: dict = Depends(get_token_claims), conn=Depends(get_db)):
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        conn = get_db_connection()
+        # El "sub" del token es el correo del usuario
+        correo = claims["sub"]
         cur = conn.cursor()
-        cur.execute("""
-            SELECT 
-                u.id, u.nombre, u.apellido, u.correo, u.rol_id, r.nombre AS rol,
-                e.edad, e.direccion, e.id AS estudiante_id,
-                p.especialidad, p.id AS profesor_id
-            FROM usuarios u
-            LEFT JOIN roles r ON u.rol_id = r.id
-            LEFT JOIN estudiantes e ON u.id = e.usuario_id
-            LEFT JOIN profesores p ON u.id = p.usuario_id
-            WHERE u.id = %s
-        """, (user_id,))
+        cur.execute(SQL_PERFIL.format("%s"), (correo,))
         user = cur.fetchone()
         cur.close()
-        conn.close()
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        return UserProfile(
-            id=user[0],
-            nombre=user[1],
-            apellido=user[2],
-            correo=user[3],
-            rol_id=user[4],
-            rol=user[5],
-            edad=user[6],
-            direccion=user[7],
-            estudiante_id=user[8],
-            especialidad=user[9],
-            profesor_id=user[10]
-        )
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token inválido")
+        return UserProfile(**user)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+# Cerrar sesión: revocar el token actual (tokens sin estado con jti)
+@router.post("/logout/")
+def logout(claims: dict = Depends(get_token_claims)):
+    revocado = revoke_token(claims)
+    return {"message": "Sesión cerrada", "revocado": revocado}
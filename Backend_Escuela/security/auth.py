@@ -1,7 +1,9 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from db import get_db_connection
+from jose import JWTError
+from db import get_db
+from cache import TTLCache
+from security.tokens import decode_access_token, is_revoked
 
 # Importa la configuración desde el archivo config.py
 from config import Config
@@ -11,48 +13,102 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 SECRET_KEY = Config.SECRET_KEY  # Obtener la clave secreta de la configuración
 ALGORITHM = Config.ALGORITHM  # Obtener el algoritmo de la configuración
 
+# Caché de usuarios autenticados (clave: correo del token -> diccionario del usuario)
+user_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+
+# Invalidar el usuario en caché cuando cambia o se elimina su registro
+def invalidar_usuario(correo: str = None, user_id: int = None):
+    if correo is not None:
+        user_cache.pop(correo)
+    if user_id is not None:
+        user_cache.discard_where(lambda user: user["id"] == user_id)
+
+# Aciertos/fallos de la caché de usuarios
+def user_cache_stats():
+    return user_cache.stats()
+
+# Dependencia única de autenticación: devuelve los claims verificados del token.
+# FastAPI la resuelve una vez por petición y decode_access_token evita volver a
+# verificar la firma de un token ya visto.
+def get_token_claims(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="No autorizado")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    if is_revoked(payload):
+        raise HTTPException(status_code=401, detail="Token revocado")
+    return payload
+
+# Usuario construido a partir de un token sin estado (AUTH_STATELESS), sin consultar la base de datos
+def user_from_claims(claims: dict):
+    if "uid" not in claims:
+        return None
+    return {
+        "id": claims["uid"],
+        "nombre": claims.get("nombre"),
+        "apellido": claims.get("apellido"),
+        "correo": claims["sub"],
+        "rol_id": claims.get("rol_id"),
+        "rol_nombre": claims.get("rol")
+    }
+
+# Usuario con su rol y su perfil vinculado; {0} es el marcador del correo
+# (login de routers/login.py y routers/aio/login.py)
+SQL_BUSCAR_USUARIO = """
+    SELECT u.*, r.nombre AS rol_nombre, e.id AS estudiante_id, p.id AS profesor_id
+    FROM public.usuarios u
+    JOIN public.roles r ON u.rol_id = r.id
+    LEFT JOIN public.estudiantes e ON e.usuario_id = u.id
+    LEFT JOIN public.profesores p ON p.usuario_id = u.id
+    WHERE u.correo = {0}
+"""
+
+# Usuario y nombre de su rol; {0} es el marcador del correo (compartida con security/auth_async.py)
+SQL_USUARIO_ACTUAL = '''
+    SELECT u.id, u.nombre, u.apellido, u.correo, u.rol_id, r.nombre as rol_nombre
+    FROM usuarios u
+    LEFT JOIN roles r ON u.rol_id = r.id
+    WHERE u.correo = {0}
+'''
+
 # Función para obtener el usuario actual a partir del token
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(claims: dict = Depends(get_token_claims), conn=Depends(get_db)):
+    # Token sin estado: el perfil viene en los claims
+    stateless_user = user_from_claims(claims)
+    if stateless_user is not None:
+        return stateless_user
+
+    user_email = claims["sub"]
+    # Usuario ya resuelto recientemente: no consultar la base de datos
+    cached = user_cache.get(user_email)
+    if cached is not None:
+        return cached
+    
+    # Obtener información completa del usuario desde la base de datos
+    cur = conn.cursor()
+    
     try:
-        # Decodificar el token usando la clave secreta y el algoritmo configurados
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_email = payload.get("sub")
-        user_role_id = payload.get("rol_id")
-        
-        if user_email is None:
-            raise HTTPException(status_code=401, detail="Credenciales inválidas")
+        # Consulta que incluye información del rol desde la tabla roles
+        cur.execute(SQL_USUARIO_ACTUAL.format("%s"), (user_email,))
+        user = cur.fetchone()
         
-        # Obtener información completa del usuario desde la base de datos
-        conn = get_db_connection()
-        cur = conn.cursor()
+        if user is None:
+            raise HTTPException(status_code=401, detail="Usuario no encontrado")
         
-        try:
-            # Consulta que incluye información del rol desde la tabla roles
-            cur.execute('''
-                SELECT u.id, u.nombre, u.apellido, u.correo, u.rol_id, r.nombre as rol_nombre 
-                FROM usuarios u 
-                LEFT JOIN roles r ON u.rol_id = r.id 
-                WHERE u.correo = %s
-            ''', (user_email,))
-            user = cur.fetchone()
-            
-            if user is None:
-                raise HTTPException(status_code=401, detail="Usuario no encontrado")
-            
-            return {
-                "id": user['id'],
-                "nombre": user['nombre'], 
-                "apellido": user['apellido'],
-                "correo": user['correo'],
-                "rol_id": user['rol_id'],
-                "rol_nombre": user['rol_nombre']
-            }
-        finally:
-            cur.close()
-            conn.close()
-            
-    except JWTError:
-        raise HTTPException(status_code=401, detail="No autorizado")
+        current_user = {
+            "id": user['id'],
+            "nombre": user['nombre'], 
+            "apellido": user['apellido'],
+            "correo": user['correo'],
+            "rol_id": user['rol_id'],
+            "rol_nombre": user['rol_nombre']
+        }
+        user_cache.set(user_email, current_user)
+        return current_user
+    finally:
+        cur.close()
 
 # Dependencia para verificar si el usuario tiene un rol específico
 def verificar_rol(rol_id: int):
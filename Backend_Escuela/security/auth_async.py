@@ -0,0 +1,36 @@
+from fastapi import Depends, HTTPException, Request
+from db_async import request_connection
+from security.auth import get_token_claims, user_from_claims, user_cache, SQL_USUARIO_ACTUAL
+
+# Versión asíncrona de get_current_user (usada cuando DB_MODE=async).
+# Solo toma una conexión del pool cuando tiene que consultar la base de datos.
+async def get_current_user(request: Request, claims: dict = Depends(get_token_claims)):
+    # Token sin estado: el perfil viene en los claims
+    stateless_user = user_from_claims(claims)
+    if stateless_user is not None:
+        return stateless_user
+
+    user_email = claims["sub"]
+    # Usuario ya resuelto recientemente (caché compartida con security/auth.py)
+    cached = user_cache.get(user_email)
+    if cached is not None:
+        return cached
+
+    # Consulta que incluye información del rol desde la tabla roles
+    async with request_connection(request) as conn:
+        user = await conn.fetchrow(SQL_USUARIO_ACTUAL.format("$1"), user_email)
+
+    if user is None:
+        raise HTTPException(status_code=401, detail="Usuario no encontrado")
+
+    current_user = dict(user)
+    user_cache.set(user_email, current_user)
+    return current_user
+
+# Dependencia para verificar si el usuario tiene un rol específico
+def verificar_rol(rol_id: int):
+    async def role_checker(current_user: dict = Depends(get_current_user)):
+        if current_user["rol_id"] != rol_id:
+            raise HTTPException(status_code=403, detail="Permiso denegado")
+        return current_user
+    return role_checker
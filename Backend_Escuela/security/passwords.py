@@ -0,0 +1,376 @@
+"""
+Servicio único de contraseñas.
+
+- Esquemas: bcrypt ($2b$...) y scrypt ($scrypt$ln=..,r=..,p=..$sal$hash), que usa memoria
+  además de CPU y encarece los ataques con GPU
+- El costo se calibra al iniciar para que una verificación tarde como máximo
+  HASH_LATENCY_BUDGET_MS en este equipo (o se fija con HASH_COST)
+- needs_rehash() indica si un hash guardado usa otro esquema o un costo menor; el
+  login lo vuelve a generar tras una verificación correcta. Nunca se baja el costo
+  de un hash guardado: un proceso calibrado en un equipo ocupado no debilita los
+  hashes, ni dos workers con costos distintos los reescriben en cada login
+- El trabajo se ejecuta en un pool de procesos acotado (HASH_WORKERS)
+
+Uso como CLI:  python -m security.passwords --benchmark
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import bcrypt
+from fastapi import HTTPException
+from config import Config
+
+SCHEMES = ("bcrypt", "scrypt")
+
+# Rango de costos permitido por esquema: rondas de bcrypt y log2(N) de scrypt
+COST_LIMITS = {
+    "bcrypt": (10, 16),
+    "scrypt": (14, 18),
+}
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+logger = logging.getLogger(__name__)
+
+# Pool de procesos: el hash/verificación no bloquea el event loop ni el threadpool
+# de Starlette, y como máximo HASH_WORKERS se ejecutan a la vez.
+_executor = None
+_lock = threading.Lock()
+_params = {"scheme": None, "cost": None, "calibrated": False, "warned_low_cost": False}
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "rejected": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "rehashed": 0,
+}
+
+
+# --- Esquemas (se ejecutan en los procesos del pool: deben ser de nivel de módulo) ---
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def _scrypt(password: str, salt: bytes, ln: int, r: int, p: int) -> bytes:
+    n = 1 << ln
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n, dklen=32)
+
+
+def _hash_worker(password: str, scheme: str, cost: int) -> str:
+    if scheme == "scrypt":
+        salt = os.urandom(16)
+        digest = _scrypt(password, salt, cost, SCRYPT_R, SCRYPT_P)
+        return f"$scrypt$ln={cost},r={SCRYPT_R},p={SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=cost)).decode('utf-8')
+
+
+def _verify_worker(password: str, hashed: str) -> bool:
+    if hashed.startswith("$scrypt$"):
+        try:
+            _, _, settings, salt, digest = hashed.split("$")
+            opts = dict(item.split("=") for item in settings.split(","))
+            expected = _unb64(digest)
+            actual = _scrypt(password, _unb64(salt), int(opts["ln"]), int(opts["r"]), int(opts["p"]))
+        except (ValueError, KeyError):
+            return False
+        return hmac.compare_digest(actual, expected)
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+def parse_hash(hashed: str):
+    """Devuelve (esquema, costo) de un hash guardado, o (None, None) si no se reconoce"""
+    if hashed.startswith("$scrypt$"):
+        try:
+            opts = dict(item.split("=") for item in hashed.split("$")[2].split(","))
+            return "scrypt", int(opts["ln"])
+        except (ValueError, KeyError, IndexError):
+            return None, None
+    if hashed[:4] in ("$2a$", "$2b$", "$2y$"):
+        try:
+            return "bcrypt", int(hashed[4:6])
+        except ValueError:
+            return None, None
+    return None, None
+
+
+# --- Calibración ---
+
+def _time_hash(scheme: str, cost: int, samples: int = 1) -> float:
+    """Segundos que tarda un hash con estos parámetros en el proceso actual"""
+    best = None
+    for _ in range(samples):
+        start = time.perf_counter()
+        _hash_worker("calibracion", scheme, cost)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(scheme: str = None, budget_ms: float = None):
+    """
+    Elige el mayor costo cuyo hash tarde como máximo `budget_ms` en este equipo.
+    Si ni el costo mínimo cabe en el presupuesto se usa el mínimo (nunca se baja de él).
+    """
+    scheme = scheme or Config.HASH_SCHEME
+    budget = (budget_ms if budget_ms is not None else Config.HASH_LATENCY_BUDGET_MS) / 1000
+    low, high = COST_LIMITS[scheme]
+    cost = low
+    elapsed = _time_hash(scheme, cost, samples=2)
+    # Cada punto de costo duplica el trabajo: se estima el siguiente antes de medirlo
+    while cost < high and elapsed * 2 <= budget:
+        cost += 1
+        elapsed = _time_hash(scheme, cost)
+    if elapsed > budget and cost > low:
+        cost -= 1
+    return cost
+
+
+def configure():
+    """Fija el esquema y el costo actuales (HASH_COST o calibración contra el presupuesto)"""
+    scheme = Config.HASH_SCHEME
+    if scheme not in SCHEMES:
+        raise ValueError(f"HASH_SCHEME inválido: {scheme} (opciones: {', '.join(SCHEMES)})")
+    if Config.HASH_COST:
+        low, high = COST_LIMITS[scheme]
+        cost = min(max(int(Config.HASH_COST), low), high)
+        calibrated = False
+    else:
+        cost = calibrate(scheme)
+        calibrated = True
+    with _lock:
+        _params.update(scheme=scheme, cost=cost, calibrated=calibrated)
+    logger.info("Contraseñas: esquema %s, costo %s (%s)", scheme, cost,
+                "calibrado" if calibrated else "HASH_COST")
+    return scheme, cost
+
+
+def current_params():
+    """Esquema y costo con los que se generan los hashes nuevos"""
+    with _lock:
+        if _params["scheme"] is not None:
+            return _params["scheme"], _params["cost"]
+    return configure()
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True si el hash guardado usa otro esquema o un costo menor que el actual"""
+    scheme, cost = current_params()
+    stored_scheme, stored_cost = parse_hash(hashed)
+    if stored_scheme != scheme:
+        return True
+    if stored_cost > cost:
+        _warn_low_cost(stored_cost, cost)
+    return stored_cost < cost
+
+
+def _warn_low_cost(stored_cost, cost):
+    """Avisa (una vez por proceso) si el costo actual es menor que el de los hashes guardados"""
+    with _lock:
+        if _params["warned_low_cost"]:
+            return
+        _params["warned_low_cost"] = True
+        calibrated = _params["calibrated"]
+    logger.warning(
+        "Contraseñas: el costo actual (%s%s) es menor que el de hashes guardados (%s); "
+        "no se reescriben. Fije HASH_COST para que todos los procesos usen el mismo.",
+        cost, ", calibrado" if calibrated else "", stored_cost,
+    )
+
+
+# --- Pool de procesos ---
+
+def start_hashing_pool():
+    """Crea el pool de procesos (llamado al iniciar la aplicación o en el primer uso)"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            # "spawn" evita heredar hilos y locks del servidor al crear los procesos
+            _executor = ProcessPoolExecutor(
+                max_workers=Config.HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _executor
+
+
+def shutdown_hashing_pool():
+    """Detiene el pool de procesos (llamado al apagar la aplicación)"""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _done(future):
+    with _lock:
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+
+
+def _submit(fn, *args):
+    executor = start_hashing_pool()
+    with _lock:
+        # Rechazar si la cola ya está llena en lugar de acumular esperas sin límite
+        if _stats["in_flight"] >= Config.HASH_WORKERS + Config.HASH_MAX_QUEUE:
+            _stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Servicio de contraseñas saturado, intente de nuevo")
+        _stats["in_flight"] += 1
+        _stats["submitted"] += 1
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        with _lock:
+            _stats["in_flight"] -= 1
+        raise
+    future.add_done_callback(_done)
+    return future
+
+
+def hash_password(password: str) -> str:
+    """Genera un hash con los parámetros actuales (bloquea el hilo actual, no el event loop)"""
+    return _submit(_hash_worker, password, *current_params()).result()
+
+
+def hash_passwords(passwords) -> list:
+    """
+    Hashes de varias contraseñas en paralelo, en el mismo orden (registro en lote).
+    Mantiene como máximo HASH_WORKERS en vuelo para no ocupar la cola que comparten
+    los logins; bloquea el hilo actual.
+    """
+    scheme, cost = current_params()
+    hashes = [None] * len(passwords)
+    pending = {}
+    queue = iter(enumerate(passwords))
+    try:
+        for index, password in queue:
+            pending[_submit(_hash_worker, password, scheme, cost)] = index
+            if len(pending) >= Config.HASH_WORKERS:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    hashes[pending.pop(future)] = future.result()
+        for future in pending:
+            hashes[pending[future]] = future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+    return hashes
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Verifica si una contraseña coincide con su hash (bloquea el hilo actual)"""
+    return _submit(_verify_worker, password, hashed).result()
+
+
+async def hash_password_async(password: str) -> str:
+    """Genera un hash con los parámetros actuales sin bloquear el event loop"""
+    return await asyncio.wrap_future(_submit(_hash_worker, password, *current_params()))
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verifica una contraseña sin bloquear el event loop"""
+    return await asyncio.wrap_future(_submit(_verify_worker, password, hashed))
+
+
+async def rehash_if_needed_async(password: str, hashed: str):
+    """
+    Tras una verificación correcta: devuelve el hash nuevo si el guardado usa otros
+    parámetros, o None si no hace falta actualizarlo.
+    """
+    if not needs_rehash(hashed):
+        return None
+    new_hash = await hash_password_async(password)
+    with _lock:
+        _stats["rehashed"] += 1
+    return new_hash
+
+
+def hashing_stats():
+    """Métricas del servicio de contraseñas (parámetros, en ejecución, en cola y rechazadas)"""
+    with _lock:
+        stats = dict(_stats)
+        stats.update(scheme=_params["scheme"], cost=_params["cost"], calibrated=_params["calibrated"])
+    stats["latency_budget_ms"] = Config.HASH_LATENCY_BUDGET_MS
+    stats["workers"] = Config.HASH_WORKERS
+    stats["max_queue"] = Config.HASH_MAX_QUEUE
+    stats["queue_depth"] = max(0, stats["in_flight"] - Config.HASH_WORKERS)
+    stats["running"] = min(stats["in_flight"], Config.HASH_WORKERS)
+    return stats
+
+
+# --- Benchmark ---
+
+def benchmark(schemes=SCHEMES, seconds: float = 1.0):
+    """Mide hashes/seg por núcleo (un solo proceso) para cada esquema y costo permitido"""
+    results = []
+    for scheme in schemes:
+        low, high = COST_LIMITS[scheme]
+        for cost in range(low, high + 1):
+            count, start = 0, time.perf_counter()
+            while True:
+                _hash_worker("benchmark", scheme, cost)
+                count += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= seconds:
+                    break
+            per_hash = elapsed / count
+            results.append({
+                "scheme": scheme,
+                "cost": cost,
+                "ms_per_hash": round(per_hash * 1000, 2),
+                "hashes_per_sec_per_core": round(1 / per_hash, 2),
+                "within_budget": per_hash * 1000 <= Config.HASH_LATENCY_BUDGET_MS,
+            })
+            # Los costos siguientes tardarían demasiado en medirse
+            if per_hash > 4 * seconds:
+                break
+    return results
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Servicio de contraseñas")
+    parser.add_argument("--benchmark", action="store_true", help="Medir hashes/seg por núcleo para cada configuración")
+    parser.add_argument("--scheme", choices=SCHEMES, action="append", help="Esquema a medir (por defecto todos)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Tiempo de medición por configuración")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    if not args.benchmark:
+        scheme, cost = configure()
+        print(f"Esquema: {scheme}  Costo elegido: {cost}  Presupuesto: {Config.HASH_LATENCY_BUDGET_MS} ms")
+        return
+
+    results = benchmark(args.scheme or SCHEMES, args.seconds)
+    if args.json:
+        print(json.dumps({"cores": os.cpu_count(), "results": results}, indent=2))
+        return
+    print(f"Núcleos: {os.cpu_count()}  Presupuesto: {Config.HASH_LATENCY_BUDGET_MS} ms")
+    print(f"{'esquema':<8} {'costo':>5} {'ms/hash':>10} {'hash/s/núcleo':>14}  presupuesto")
+    for row in results:
+        print(f"{row['scheme']:<8} {row['cost']:>5} {row['ms_per_hash']:>10} "
+              f"{row['hashes_per_sec_per_core']:>14}  {'sí' if row['within_budget'] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
+import hashlib
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
 from jose import jwt
+from cache import TTLCache
 from config import Config  # Importar la clase Config en lugar de las variables directamente
 
 # Usar las configuraciones de la clase Config
 SECRET_KEY = Config.SECRET_KEY
 ALGORITHM = Config.ALGORITHM
 
+# Claims ya verificados, por hash del token (la firma se verifica una sola vez por token)
+claims_cache = TTLCache(maxsize=Config.TOKEN_CACHE_SIZE, ttl=Config.TOKEN_CACHE_TTL)
+
+# Lista de revocación en memoria (jti -> exp) para los tokens del modo sin estado
+_revoked = {}
+_revoked_lock = threading.Lock()
+
 # Función para crear un token JWT
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=15)):
     to_encode = data.copy()
@@ -13,3 +25,61 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+# Función para decodificar y verificar un token JWT (lanza JWTError si no es válido)
+def decode_access_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = claims_cache.get(key)
+    if claims is not None:
+        # Un token guardado puede vencer antes que su entrada en caché
+        exp = claims.get("exp")
+        if exp is None or exp > time.time():
+            return claims
+        claims_cache.pop(key)
+
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    # Guardar hasta el vencimiento del token (o TOKEN_CACHE_TTL si no tiene exp)
+    ttl = claims_cache.ttl
+    exp = claims.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        claims_cache.set(key, claims, ttl=ttl)
+    return claims
+
+# Función para crear el token de inicio de sesión a partir de la fila del usuario.
+# En modo sin estado (AUTH_STATELESS) el token lleva el id, nombre, rol y los
+# estudiante_id/profesor_id vinculados, con un vencimiento corto y un jti revocable.
+def create_login_token(user: dict) -> str:
+    token_data = {"sub": user["correo"], "rol": user["rol_nombre"], "rol_id": user["rol_id"]}
+    if not Config.AUTH_STATELESS:
+        return jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+
+    token_data.update({
+        "uid": user["id"],
+        "nombre": user["nombre"],
+        "apellido": user["apellido"],
+        "estudiante_id": user.get("estudiante_id"),
+        "profesor_id": user.get("profesor_id"),
+        "jti": uuid.uuid4().hex,
+    })
+    return create_access_token(token_data, timedelta(minutes=Config.STATELESS_TOKEN_EXPIRE_MINUTES))
+
+# Revocar un token (cierre de sesión); se recuerda solo hasta su vencimiento
+def revoke_token(claims: dict):
+    jti = claims.get("jti")
+    if jti is None:
+        return False
+    now = time.time()
+    with _revoked_lock:
+        # Limpiar los jti que ya vencieron
+        for old_jti in [key for key, exp in _revoked.items() if exp <= now]:
+            del _revoked[old_jti]
+        _revoked[jti] = claims.get("exp", now + Config.TOKEN_CACHE_TTL)
+    return True
+
+# Saber si un token fue revocado
+def is_revoked(claims: dict) -> bool:
+    jti = claims.get("jti")
+    return jti is not None and jti in _revoked
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+from fastapi.responses import StreamingResponse
+
+# Formatos de exportación en streaming y su tipo de contenido
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def ndjson_batch(rows, formatter=dict):
+    """Un lote de filas como NDJSON (un objeto JSON por línea)"""
+    return "".join(
+        json.dumps(formatter(row), ensure_ascii=False, default=str) + "\n"
+        for row in rows
+    )
+
+
+def csv_header(columns):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+
+def csv_batch(rows, columns):
+    """Un lote de filas como CSV, con las columnas en el orden indicado"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    return buffer.getvalue()
+
+
+def export_response(chunks, fmt, filename):
+    """
+    StreamingResponse para una exportación: `chunks` es un generador (síncrono o
+    asíncrono) que produce el archivo por lotes, así que la memoria no crece con
+    el número de filas.
+    """
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,117 @@
+"""
+Importación masiva (bulk_import.py), sin base de datos: lectura del archivo, validación
+por lotes y el reporte que devuelve la ruta.
+"""
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from bulk_import import ImportReport, iter_records, validate_batches
+from models.estudiante import Estudiante
+
+
+def estudiante(correo, edad=20):
+    return {"nombre": "Ana", "apellido": "Pérez", "correo": correo, "edad": edad, "direccion": "Calle 1"}
+
+
+def registros(*filas):
+    return list(enumerate(filas, start=2))
+
+
+def test_lotes_del_tamano_pedido():
+    lotes = list(validate_batches(registros(*(estudiante(f"e{i}@x.com") for i in range(5))), Estudiante, 2))
+    assert [len(validos) for validos, _ in lotes] == [2, 2, 1]
+    assert all(not errores for _, errores in lotes)
+    assert lotes[0][0][0][0] == 2
+    assert isinstance(lotes[0][0][0][1], Estudiante)
+
+
+def test_los_errores_cuentan_para_el_lote():
+    filas = registros(estudiante("a@x.com"), "JSON inválido", estudiante("b@x.com", edad="veinte"))
+    (validos, errores), = validate_batches(filas, Estudiante, 3)
+    assert [linea for linea, _ in validos] == [2]
+    assert errores[0] == {"linea": 3, "error": "JSON inválido"}
+    assert errores[1]["linea"] == 4 and errores[1]["error"].startswith("edad:")
+
+
+def test_correo_invalido_y_campo_faltante():
+    sin_edad = estudiante("c@x.com")
+    del sin_edad["edad"]
+    (_, errores), = validate_batches(registros(estudiante("sin-arroba"), sin_edad), Estudiante, 10)
+    assert "correo" in errores[0]["error"]
+    assert "edad" in errores[1]["error"]
+
+
+def test_correo_repetido_en_el_archivo():
+    filas = registros(estudiante("a@x.com"), estudiante("b@x.com"), estudiante("a@x.com"))
+    lotes = list(validate_batches(filas, Estudiante, 2, unique_field="correo"))
+    validos = [linea for lote, _ in lotes for linea, _ in lote]
+    errores = [e for _, lote in lotes for e in lote]
+    assert validos == [2, 3]
+    assert errores == [{"linea": 4, "correo": "a@x.com", "error": "correo repetido en el archivo"}]
+
+
+def test_sin_campo_unico_se_aceptan_repetidos():
+    filas = registros(estudiante("a@x.com"), estudiante("a@x.com"))
+    (validos, errores), = validate_batches(filas, Estudiante, 10)
+    assert len(validos) == 2 and not errores
+
+
+def test_sin_registros_no_hay_lotes():
+    assert list(validate_batches([], Estudiante, 10)) == []
+
+
+def test_csv_linea_a_linea():
+    archivo = io.BytesIO("nombre,apellido,correo,edad,direccion\nAna,Pérez,a@x.com,20,Calle 1\nEva,Gil,b@x.com,21,Calle 2,extra\n".encode())
+    filas = list(iter_records(archivo, "csv"))
+    assert filas[0] == (2, {"nombre": "Ana", "apellido": "Pérez", "correo": "a@x.com", "edad": "20", "direccion": "Calle 1"})
+    assert filas[1] == (3, "La fila tiene más columnas que el encabezado")
+
+
+def test_ndjson_lineas_invalidas():
+    archivo = io.BytesIO(b'{"nombre": "Ana"}\n\n[1, 2]\n{roto\n')
+    filas = list(iter_records(archivo, "ndjson"))
+    assert filas[0] == (1, {"nombre": "Ana"})
+    assert filas[1] == (3, "Cada línea debe ser un objeto JSON")
+    assert filas[2][0] == 4 and filas[2][1].startswith("JSON inválido")
+
+
+@pytest.mark.parametrize("contenido, detalle", [
+    (b"", "El archivo CSV está vacío o no tiene encabezado"),
+    (b"nombre\n\xff\xfe\n", "El archivo debe estar codificado en UTF-8"),
+])
+def test_csv_ilegible_responde_400(contenido, detalle):
+    with pytest.raises(HTTPException) as error:
+        list(iter_records(io.BytesIO(contenido), "csv"))
+    assert (error.value.status_code, error.value.detail) == (400, detalle)
+
+
+def test_reporte_cuenta_validos_y_errores():
+    reporte = ImportReport()
+    reporte.add_valid(3)
+    reporte.add_errors([{"linea": 5, "error": "x"}, {"linea": 2, "error": "y"}])
+    reporte.insertados = 3
+    datos = reporte.to_dict()
+    assert (datos["total"], datos["validos"], datos["insertados"], datos["rechazados"]) == (5, 3, 3, 2)
+    assert [e["linea"] for e in datos["errores"]] == [2, 5]
+    assert datos["dry_run"] is False
+
+
+def test_reporte_rechazo_posterior_a_la_validacion():
+    reporte = ImportReport(dry_run=True)
+    reporte.add_valid(4)
+    reporte.reject([{"linea": 3, "correo": "a@x.com", "error": "ya existe"}])
+    datos = reporte.to_dict()
+    assert (datos["total"], datos["validos"], datos["rechazados"]) == (4, 3, 1)
+    assert datos["dry_run"] is True
+
+
+def test_reporte_acota_los_errores():
+    reporte = ImportReport(max_errors=2)
+    reporte.add_errors([{"linea": i, "error": "x"} for i in range(5)])
+    datos = reporte.to_dict()
+    assert len(datos["errores"]) == 2
+    assert datos["errores_omitidos"] == 3
+    assert datos["rechazados"] == 5
+    assert datos["total"] == 5
@@ -0,0 +1,104 @@
+"""
+Las escrituras de estudiantes y profesores usan una sola sentencia, también al
+responder 400 (correo repetido) o 404 (id inexistente).
+"""
+import psycopg2
+import pytest
+from fastapi import HTTPException
+
+from models.estudiante import Estudiante
+from models.profesores import Profesor
+from query_trace import trace_queries
+from routers.estudiante import create_estudiante, update_estudiante, delete_estudiante
+from routers.profesores import create_profesor, update_profesor
+
+DOMINIO = "@escrituras.test"
+ID_INEXISTENTE = 2_000_000_000
+
+
+@pytest.fixture(autouse=True)
+def limpiar(dsn):
+    def borrar():
+        conn = psycopg2.connect(dsn)
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("DELETE FROM estudiantes WHERE correo LIKE %s", ("%" + DOMINIO,))
+                cur.execute("DELETE FROM profesores WHERE correo LIKE %s", ("%" + DOMINIO,))
+        finally:
+            conn.close()
+    borrar()
+    yield
+    borrar()
+
+
+def una_sentencia(call_route, handler, *args, status=None):
+    """Ejecuta el handler y verifica que envió exactamente una sentencia (y el código esperado)"""
+    with trace_queries() as trace:
+        if status is None:
+            result = call_route(handler, *args)
+        else:
+            with pytest.raises(HTTPException) as error:
+                call_route(handler, *args)
+            assert error.value.status_code == status
+            result = None
+    assert trace.count == 1, trace.statements
+    return result
+
+
+def estudiante(correo, nombre="Ana"):
+    return Estudiante(nombre=nombre, apellido="Prueba", correo=correo, edad=16, direccion="Calle 1")
+
+
+def profesor(correo, nombre="Luis"):
+    return Profesor(nombre=nombre, apellido="Prueba", correo=correo, especialidad="Arte", usuario_id=None)
+
+
+def id_estudiante(dsn, correo):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM estudiantes WHERE correo = %s", (correo,))
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_estudiante_create(call_route):
+    creado = una_sentencia(call_route, create_estudiante, estudiante("ana" + DOMINIO))
+    assert creado.correo == "ana" + DOMINIO
+    una_sentencia(call_route, create_estudiante, estudiante("ana" + DOMINIO), status=400)
+
+
+def test_estudiante_update(call_route, dsn):
+    call_route(create_estudiante, estudiante("ana" + DOMINIO))
+    call_route(create_estudiante, estudiante("eva" + DOMINIO))
+    id = id_estudiante(dsn, "ana" + DOMINIO)
+
+    actualizado = una_sentencia(call_route, update_estudiante, id, estudiante("ana" + DOMINIO, nombre="Ana María"))
+    assert actualizado.nombre == "Ana María"
+    una_sentencia(call_route, update_estudiante, id, estudiante("eva" + DOMINIO), status=400)
+    una_sentencia(call_route, update_estudiante, ID_INEXISTENTE, estudiante("zoe" + DOMINIO), status=404)
+
+
+def test_estudiante_delete(call_route, dsn):
+    call_route(create_estudiante, estudiante("ana" + DOMINIO))
+    id = id_estudiante(dsn, "ana" + DOMINIO)
+
+    assert una_sentencia(call_route, delete_estudiante, id)["id"] == id
+    una_sentencia(call_route, delete_estudiante, id, status=404)
+
+
+def test_profesor_create(call_route):
+    creado = una_sentencia(call_route, create_profesor, profesor("luis" + DOMINIO))
+    assert creado.id is not None
+    una_sentencia(call_route, create_profesor, profesor("luis" + DOMINIO), status=400)
+
+
+def test_profesor_update(call_route):
+    creado = call_route(create_profesor, profesor("luis" + DOMINIO))
+    call_route(create_profesor, profesor("raul" + DOMINIO))
+
+    actualizado = una_sentencia(call_route, update_profesor, creado.id, profesor("luis" + DOMINIO, nombre="Luis Ángel"))
+    assert actualizado.nombre == "Luis Ángel"
+    una_sentencia(call_route, update_profesor, creado.id, profesor("raul" + DOMINIO), status=400)
+    una_sentencia(call_route, update_profesor, ID_INEXISTENTE, profesor("sara" + DOMINIO), status=404)
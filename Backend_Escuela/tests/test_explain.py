@@ -0,0 +1,158 @@
+"""
+Las consultas de los routers usan índices (EXPLAIN sobre la base de TEST_DATABASE_URI).
+
+Con enable_seqscan desactivado el planificador solo elige un Seq Scan cuando no
+existe un índice utilizable, así que la verificación no depende del tamaño de la
+base (funciona igual sobre los datos de poblar_base_datos.sql). Falla si alguna
+consulta recorre secuencialmente una tabla grande: falta aplicar migraciones
+(python migrate.py) o un índice nuevo.
+
+Las consultas salen de las constantes SQL que importan los routers; si se agrega
+una constante nueva sin incluirla aquí (o en EXCLUIDAS), test_constantes_cubiertas falla.
+"""
+import importlib
+import json
+
+import psycopg2
+import pytest
+from psycopg2.extras import RealDictCursor
+
+from pagination import QueryBuilder, PageParams, SearchParams, order_and_limit, encode_cursor, search_sql
+from routers.asignacion import (SELECT_ASIGNACIONES, ORDEN_ASIGNACIONES, SQL_ASIGNACIONES_ESTUDIANTE,
+                                SQL_ASIGNACIONES_PROFESOR, SQL_ASIGNACION_LOTE, FILTRO_POR_CORREO,
+                                FILTRO_POR_ID, filtros_asignaciones)
+from routers.estudiante import (SELECT_ESTUDIANTES, ORDEN_ESTUDIANTES, DOCUMENTO_ESTUDIANTES,
+                                COLUMNAS_BUSQUEDA_ESTUDIANTES)
+from routers.profesores import (SELECT_PROFESORES, ORDEN_PROFESORES, DOCUMENTO_PROFESORES,
+                                COLUMNAS_BUSQUEDA_PROFESORES)
+from routers.estudio import SELECT_ESTUDIOS, ORDEN_ESTUDIOS
+from routers.rol_usero import SQL_REGISTRO, SQL_REGISTRO_VINCULAR
+from routers.user import SQL_PERFIL
+from security.auth import SQL_BUSCAR_USUARIO, SQL_USUARIO_ACTUAL
+
+# Tablas que crecen con la escuela (roles es un catálogo fijo de pocas filas)
+TABLAS_GRANDES = {"usuarios", "estudiantes", "profesores", "estudios", "asignacion", "roster_profesor"}
+
+# Módulos cuyas constantes SQL deben estar cubiertas
+MODULOS = ("routers.asignacion", "routers.estudiante", "routers.profesores", "routers.estudio",
+           "routers.rol_usero", "routers.user", "security.auth")
+
+# Constantes que no se pueden verificar con EXPLAIN fuera de su endpoint
+EXCLUIDAS = {
+    "DESCARTAR_IMPORTACION_LARGOS": "lee la tabla temporal de la importación (solo existe en esa transacción)",
+    "INSERTAR_IMPORTACION": "lee la tabla temporal de la importación (solo existe en esa transacción)",
+}
+
+SENTENCIAS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def _keyset(select, fields, sort, cursor_values, filtros=None):
+    """Consulta de una página intermedia, construida con los mismos helpers que los routers"""
+    qb = QueryBuilder()
+    if filtros:
+        filtros(qb)
+    page = PageParams(limit=50, cursor=encode_cursor(sort, cursor_values), sort=sort)
+    order = order_and_limit(qb, page, fields)
+    return select + qb.where_sql() + order, qb.params
+
+
+def _busqueda(tabla, columnas, documento):
+    qb = QueryBuilder()
+    return search_sql(qb, tabla, columnas, documento, SearchParams(q="gonzales", limit=20)), qb.params
+
+
+def consultas():
+    """(constante, nombre, sql, parámetros, extensión requerida) de las consultas que deben usar índices"""
+    correo = FILTRO_POR_CORREO.format("%s")
+    por_id = FILTRO_POR_ID.format("%s")
+    yield "SQL_BUSCAR_USUARIO", "login: usuario por correo", SQL_BUSCAR_USUARIO.format("%s"), ("admin@escuela.com",), None
+    yield "SQL_USUARIO_ACTUAL", "auth: usuario actual", SQL_USUARIO_ACTUAL.format("%s"), ("admin@escuela.com",), None
+    yield "SQL_PERFIL", "auth/perfil", SQL_PERFIL.format("%s"), ("juan.perez@escuela.com",), None
+    yield ("SQL_ASIGNACIONES_ESTUDIANTE", "asignaciones/estudiante: por correo",
+           SQL_ASIGNACIONES_ESTUDIANTE.format(filtro=correo), ("juan.perez@escuela.com",), None)
+    yield ("SQL_ASIGNACIONES_ESTUDIANTE", "asignaciones/estudiante: por id",
+           SQL_ASIGNACIONES_ESTUDIANTE.format(filtro=por_id), (1,), None)
+    yield ("SQL_ASIGNACIONES_PROFESOR", "asignaciones/profesor: por correo",
+           SQL_ASIGNACIONES_PROFESOR.format(filtro=correo), ("maria.gonzalez@escuela.com",), None)
+    yield ("SQL_ASIGNACIONES_PROFESOR", "asignaciones/profesor: por id",
+           SQL_ASIGNACIONES_PROFESOR.format(filtro=por_id), (1,), None)
+    yield ("SQL_ASIGNACION_LOTE", "asignaciones/batch",
+           SQL_ASIGNACION_LOTE.format("%s", "%s", "%s"), ([1, 2], [1, 2], None), None)
+    yield "SELECT_ESTUDIANTES", "estudiantes/{id}", SELECT_ESTUDIANTES + " WHERE id = %s", (1,), None
+    yield ("SELECT_ESTUDIANTES", "estudiantes: página por nombre",
+           *_keyset(SELECT_ESTUDIANTES, ORDEN_ESTUDIANTES, "nombre", ["M", 1]), None)
+    yield ("SELECT_ESTUDIANTES", "estudiantes: página por apellido (desc)",
+           *_keyset(SELECT_ESTUDIANTES, ORDEN_ESTUDIANTES, "-apellido", ["M", 1]), None)
+    yield ("SELECT_PROFESORES", "profesores: página por especialidad",
+           *_keyset(SELECT_PROFESORES, ORDEN_PROFESORES, "especialidad", ["M", 1]), None)
+    yield ("SELECT_ESTUDIOS", "estudios: página por nombre",
+           *_keyset(SELECT_ESTUDIOS, ORDEN_ESTUDIOS, "nombre", ["M", 1]), None)
+    yield ("SELECT_ASIGNACIONES", "asignaciones/all: página de un estudiante",
+           *_keyset(SELECT_ASIGNACIONES, ORDEN_ASIGNACIONES, "id", [1],
+                    filtros=lambda qb: filtros_asignaciones(qb, estudiante_id=1)), None)
+    yield ("SELECT_ASIGNACIONES", "asignaciones/all: página de un profesor",
+           *_keyset(SELECT_ASIGNACIONES, ORDEN_ASIGNACIONES, "id", [1],
+                    filtros=lambda qb: filtros_asignaciones(qb, profesor_id=1)), None)
+    yield ("SQL_REGISTRO", "usuarios/registro",
+           SQL_REGISTRO, (["Ana"], ["Prueba"], ["ana@explain.test"], ["hash"], [2], [16], [None], [None]), None)
+    yield ("SQL_REGISTRO_VINCULAR", "usuarios/registro/lote",
+           SQL_REGISTRO_VINCULAR, (["Ana"], ["Prueba"], ["ana@explain.test"], ["hash"], [2], [16], [None], [None]), None)
+    yield (None, "estudiantes/buscar",
+           *_busqueda("estudiantes", COLUMNAS_BUSQUEDA_ESTUDIANTES, DOCUMENTO_ESTUDIANTES), "pg_trgm")
+    yield (None, "profesores/buscar",
+           *_busqueda("profesores", COLUMNAS_BUSQUEDA_PROFESORES, DOCUMENTO_PROFESORES), "pg_trgm")
+
+
+CONSULTAS = list(consultas())
+
+
+def constantes_sql():
+    """Nombres de las constantes con sentencias SQL definidas en los módulos de MODULOS"""
+    nombres = set()
+    for nombre_modulo in MODULOS:
+        modulo = importlib.import_module(nombre_modulo)
+        for nombre, valor in vars(modulo).items():
+            if nombre.isupper() and isinstance(valor, str) and valor.lstrip().upper().startswith(SENTENCIAS):
+                nombres.add(nombre)
+    return nombres
+
+
+def seq_scans(plan):
+    """Tablas grandes recorridas con Seq Scan en un plan JSON de EXPLAIN"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in TABLAS_GRANDES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def test_constantes_cubiertas():
+    cubiertas = {constante for constante, *_ in CONSULTAS if constante}
+    faltan = constantes_sql() - cubiertas - set(EXCLUIDAS)
+    assert not faltan, f"Constantes SQL sin verificar con EXPLAIN: {', '.join(sorted(faltan))}"
+
+
+@pytest.fixture(scope="module")
+def explain_cur(dsn):
+    conn = psycopg2.connect(dsn, cursor_factory=RealDictCursor)
+    cur = conn.cursor()
+    cur.execute("SET enable_seqscan = off")
+    cur.execute("SELECT extname FROM pg_extension")
+    cur.extensiones = {row["extname"] for row in cur.fetchall()}
+    yield cur
+    cur.close()
+    conn.rollback()
+    conn.close()
+
+
+@pytest.mark.parametrize("constante, nombre, sql, params, extension", CONSULTAS, ids=[c[1] for c in CONSULTAS])
+def test_consulta_usa_indices(explain_cur, constante, nombre, sql, params, extension):
+    if extension and extension not in explain_cur.extensiones:
+        pytest.skip(f"La extensión {extension} no está instalada en la base de prueba")
+    explain_cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    plan = explain_cur.fetchone()["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    tablas = seq_scans(plan[0]["Plan"])
+    assert not tablas, f"{nombre}: Seq Scan en {', '.join(sorted(set(tablas)))}"
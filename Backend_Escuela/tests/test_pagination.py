@@ -0,0 +1,113 @@
+"""
+Paginación por cursor (pagination.py), sin base de datos.
+"""
+import base64
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import (QueryBuilder, PageParams, SortField, cursor_int, cursor_text, decode_cursor,
+                        encode_cursor, order_and_limit, split_page)
+from routers.estudiante import ORDEN_ESTUDIANTES
+
+
+def cursor_crudo(data):
+    """Cursor armado a mano (p. ej. uno adulterado por el cliente)"""
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def estado(error):
+    return error.value.status_code, error.value.detail
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = encode_cursor("-apellido", ["Pérez", 7])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "-apellido") == ["Pérez", 7]
+
+
+def test_cursor_con_fechas():
+    cursor = encode_cursor("fecha", [date(2026, 3, 1), 4])
+    assert decode_cursor(cursor, "fecha") == ["2026-03-01", 4]
+
+
+@pytest.mark.parametrize("cursor", ["no-es-base64!", cursor_crudo([1, 2]), cursor_crudo({"s": "id"})])
+def test_cursor_ilegible(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "id")
+    assert estado(error) == (400, "Cursor inválido")
+
+
+def test_cursor_de_otro_orden():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(encode_cursor("nombre", ["Ana", 1]), "apellido")
+    assert error.value.status_code == 400
+
+
+def test_pagina_por_id():
+    qb = QueryBuilder()
+    order = order_and_limit(qb, PageParams(limit=10, cursor=encode_cursor("id", [5])), ORDEN_ESTUDIANTES)
+    assert qb.where_sql() == " WHERE id > %s"
+    assert qb.params == [5]
+    assert order == " ORDER BY id ASC LIMIT 11"
+
+
+def test_pagina_por_campo_descendente():
+    qb = QueryBuilder(paramstyle="numeric")
+    page = PageParams(limit=10, cursor=encode_cursor("-apellido", ["Pérez", 7]), sort="-apellido")
+    order = order_and_limit(qb, page, ORDEN_ESTUDIANTES)
+    assert qb.where_sql() == " WHERE (apellido, id) < ($1, $2)"
+    assert qb.params == ["Pérez", 7]
+    assert order == " ORDER BY apellido DESC, id DESC LIMIT 11"
+
+
+@pytest.mark.parametrize("sort, valores", [
+    ("id", ["x"]),
+    ("id", [True]),
+    ("id", [{"a": 1}]),
+    ("id", [1, 2]),
+    ("nombre", ["Ana", "7"]),
+    ("nombre", [{"a": 1}, 7]),
+    ("nombre", [["Ana"], 7]),
+    ("nombre", ["Ana"]),
+])
+def test_cursor_adulterado_responde_400(sort, valores):
+    page = PageParams(limit=10, cursor=cursor_crudo({"s": sort, "v": valores}), sort=sort)
+    with pytest.raises(HTTPException) as error:
+        order_and_limit(QueryBuilder(), page, ORDEN_ESTUDIANTES)
+    assert estado(error) == (400, "Cursor inválido")
+
+
+def test_cursor_valores_no_lista():
+    page = PageParams(limit=10, cursor=cursor_crudo({"s": "id", "v": 5}))
+    with pytest.raises(HTTPException) as error:
+        order_and_limit(QueryBuilder(), page, ORDEN_ESTUDIANTES)
+    assert error.value.status_code == 400
+
+
+def test_texto_nulo_en_el_cursor():
+    assert cursor_text(None) is None
+    assert cursor_int(3) == 3
+    with pytest.raises(ValueError):
+        cursor_text(3)
+
+
+def test_todos_los_ordenes_validan_el_cursor():
+    from routers.asignacion import ORDEN_ASIGNACIONES
+    from routers.estudio import ORDEN_ESTUDIOS
+    from routers.profesores import ORDEN_PROFESORES
+    for campos in (ORDEN_ESTUDIANTES, ORDEN_PROFESORES, ORDEN_ESTUDIOS, ORDEN_ASIGNACIONES):
+        for nombre, campo in campos.items():
+            assert campo.parse is (cursor_int if nombre == "id" else cursor_text), nombre
+
+
+def test_split_page_cursor_siguiente():
+    campos = {"id": SortField("id", "id", cursor_int), "nombre": SortField("nombre", "nombre", cursor_text)}
+    filas = [{"id": i, "nombre": f"n{i}"} for i in range(1, 5)]
+    page = PageParams(limit=3, sort="nombre")
+    pagina, siguiente = split_page(filas, page, campos)
+    assert pagina == filas[:3]
+    assert decode_cursor(siguiente, "nombre") == ["n3", 3]
+    assert split_page(filas[:3], page, campos) == (filas[:3], None)
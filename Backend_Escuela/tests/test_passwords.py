@@ -0,0 +1,51 @@
+"""
+needs_rehash solo pide un hash nuevo si cambia el esquema o sube el costo (sin base de datos).
+"""
+import pytest
+
+from security import passwords
+
+BCRYPT_12 = "$2b$12$" + "a" * 53
+SCRYPT_15 = "$scrypt$ln=15,r=8,p=1$c2Fs$ZGlnZXN0"
+
+
+@pytest.fixture
+def parametros(monkeypatch):
+    def fijar(scheme, cost, calibrated=False):
+        monkeypatch.setitem(passwords._params, "scheme", scheme)
+        monkeypatch.setitem(passwords._params, "cost", cost)
+        monkeypatch.setitem(passwords._params, "calibrated", calibrated)
+        monkeypatch.setitem(passwords._params, "warned_low_cost", False)
+    return fijar
+
+
+def test_parse_hash():
+    assert passwords.parse_hash(BCRYPT_12) == ("bcrypt", 12)
+    assert passwords.parse_hash(SCRYPT_15) == ("scrypt", 15)
+    assert passwords.parse_hash("texto plano") == (None, None)
+
+
+def test_mismo_esquema_y_costo(parametros):
+    parametros("bcrypt", 12)
+    assert not passwords.needs_rehash(BCRYPT_12)
+
+
+def test_costo_mayor_rehash(parametros):
+    parametros("bcrypt", 13)
+    assert passwords.needs_rehash(BCRYPT_12)
+
+
+def test_costo_menor_no_baja_el_hash(parametros, caplog):
+    parametros("bcrypt", 10, calibrated=True)
+    assert not passwords.needs_rehash(BCRYPT_12)
+    assert not passwords.needs_rehash(BCRYPT_12)
+    avisos = [r for r in caplog.records if r.levelname == "WARNING"]
+    assert len(avisos) == 1
+
+
+def test_otro_esquema_rehash(parametros):
+    parametros("scrypt", 14)
+    assert passwords.needs_rehash(BCRYPT_12)
+    parametros("bcrypt", 16)
+    assert passwords.needs_rehash(SCRYPT_15)
+    assert passwords.needs_rehash("texto plano")
@@ -0,0 +1,81 @@
+"""
+El registro público no entrega a quien lo reclame un estudiante o profesor ya
+cargado sin usuario; solo el registro en lote de los administradores lo vincula.
+"""
+import psycopg2
+import pytest
+from fastapi import HTTPException
+
+from models.rol_user import Usuario, UsuarioLote, ROL_ESTUDIANTE
+from routers.rol_usero import registrar_usuario, registrar_usuarios_lote
+
+DOMINIO = "@registro.test"
+
+
+@pytest.fixture(autouse=True)
+def limpiar(dsn):
+    def borrar():
+        conn = psycopg2.connect(dsn)
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("DELETE FROM estudiantes WHERE correo LIKE %s", ("%" + DOMINIO,))
+                cur.execute("DELETE FROM usuarios WHERE correo LIKE %s", ("%" + DOMINIO,))
+        finally:
+            conn.close()
+    borrar()
+    yield
+    borrar()
+
+
+def consultar(dsn, sql, params):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchone()
+    finally:
+        conn.close()
+
+
+def estudiante_sin_usuario(dsn, correo):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO estudiantes (nombre, apellido, correo, edad, direccion) VALUES ('Ana', 'Prueba', %s, 16, 'Calle 1')",
+                (correo,),
+            )
+    finally:
+        conn.close()
+
+
+def usuario(correo):
+    return Usuario(nombre="Ana", apellido="Prueba", correo=correo, contrasena="secreta", rol_id=ROL_ESTUDIANTE, edad=16)
+
+
+def test_registro_publico_no_vincula_perfil_existente(call_route, dsn):
+    correo = "ana" + DOMINIO
+    estudiante_sin_usuario(dsn, correo)
+
+    with pytest.raises(HTTPException) as error:
+        call_route(registrar_usuario, usuario(correo))
+    assert error.value.status_code == 400
+
+    assert consultar(dsn, "SELECT count(*) FROM usuarios WHERE correo = %s", (correo,))[0] == 0
+    assert consultar(dsn, "SELECT usuario_id FROM estudiantes WHERE correo = %s", (correo,))[0] is None
+
+
+def test_registro_publico_crea_perfil(call_route, dsn):
+    correo = "eva" + DOMINIO
+    fila = call_route(registrar_usuario, usuario(correo))
+    assert fila["estudiante_id"] is not None
+
+
+def test_registro_lote_vincula_perfil_existente(call_route, dsn):
+    correo = "ana" + DOMINIO
+    estudiante_sin_usuario(dsn, correo)
+
+    resultado = call_route(registrar_usuarios_lote, UsuarioLote(usuarios=[usuario(correo)]))
+    assert resultado["registrados"] == 1
+    usuario_id = resultado["usuarios"][0]["id"]
+    assert consultar(dsn, "SELECT usuario_id FROM estudiantes WHERE correo = %s", (correo,))[0] == usuario_id
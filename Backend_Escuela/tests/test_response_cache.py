@@ -0,0 +1,136 @@
+"""
+Caché de respuestas (response_cache.py), sin base de datos: a quién se le sirve una
+respuesta guardada y cuándo deja de servirse.
+"""
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from cache import table_versions
+from response_cache import ResponseCacheMiddleware, CachePolicy, response_cache
+from security.auth import user_cache
+from security.tokens import create_access_token
+
+TABLA = "tabla_prueba_cache"
+
+
+def token(correo, rol_id, stateless=True):
+    claims = {"sub": correo, "rol_id": rol_id}
+    if stateless:
+        claims["uid"] = hash(correo) % 1000
+    return {"Authorization": f"Bearer {create_access_token(claims)}"}
+
+
+@pytest.fixture
+def app():
+    llamadas = []
+    api = FastAPI()
+
+    @api.get("/lista")
+    def lista(request: Request):
+        llamadas.append("lista")
+        return {"autorizacion": request.headers.get("authorization", "")[-12:], "n": len(llamadas)}
+
+    @api.get("/personal")
+    def personal(request: Request):
+        llamadas.append("personal")
+        return {"autorizacion": request.headers.get("authorization", "")[-12:]}
+
+    @api.get("/error")
+    def error():
+        llamadas.append("error")
+        return Response(status_code=404)
+
+    @api.get("/etag")
+    def etag(response: Response):
+        llamadas.append("etag")
+        response.headers["ETag"] = '"v1"'
+        return {"ok": True}
+
+    api.add_middleware(ResponseCacheMiddleware, policies={
+        "/lista": CachePolicy(tables=(TABLA,)),
+        "/personal": CachePolicy(tables=(TABLA,), personal=True),
+        "/error": CachePolicy(tables=(TABLA,)),
+        "/etag": CachePolicy(tables=(TABLA,)),
+    })
+    response_cache.clear()
+    user_cache.clear()
+    api.state.llamadas = llamadas
+    yield api
+    response_cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+def test_roles_distintos_no_comparten_entrada(app, client):
+    admin, estudiante = token("admin@cache.test", 3), token("est@cache.test", 2)
+    assert client.get("/lista", headers=admin).headers["x-cache"] == "MISS"
+    r = client.get("/lista", headers=estudiante)
+    assert r.headers["x-cache"] == "MISS"
+    assert r.json()["autorizacion"] == estudiante["Authorization"][-12:]
+    assert client.get("/lista", headers=admin).headers["x-cache"] == "HIT"
+    assert len(app.state.llamadas) == 2
+
+
+def test_ruta_personal_no_se_comparte_entre_usuarios(app, client):
+    ana, eva = token("ana@cache.test", 2), token("eva@cache.test", 2)
+    assert client.get("/personal", headers=ana).headers["x-cache"] == "MISS"
+    r = client.get("/personal", headers=eva)
+    assert r.headers["x-cache"] == "MISS"
+    assert r.json()["autorizacion"] == eva["Authorization"][-12:]
+    assert client.get("/personal", headers=ana).json()["autorizacion"] == ana["Authorization"][-12:]
+
+
+def test_ruta_personal_sin_token_no_se_cachea(client):
+    assert "x-cache" not in client.get("/personal").headers
+
+
+def test_bump_invalida_la_entrada(app, client):
+    admin = token("admin@cache.test", 3)
+    assert client.get("/lista", headers=admin).headers["x-cache"] == "MISS"
+    assert client.get("/lista", headers=admin).headers["x-cache"] == "HIT"
+    table_versions.bump(TABLA)
+    r = client.get("/lista", headers=admin)
+    assert r.headers["x-cache"] == "MISS"
+    assert r.json()["n"] == 2
+
+
+def test_respuesta_no_200_no_se_guarda(app, client):
+    admin = token("admin@cache.test", 3)
+    assert client.get("/error", headers=admin).headers["x-cache"] == "MISS"
+    assert client.get("/error", headers=admin).headers["x-cache"] == "MISS"
+    assert app.state.llamadas == ["error", "error"]
+
+
+def test_if_none_match_en_un_hit_responde_304(app, client):
+    admin = token("admin@cache.test", 3)
+    assert client.get("/etag", headers=admin).headers["x-cache"] == "MISS"
+    r = client.get("/etag", headers={**admin, "If-None-Match": '"v1"'})
+    assert r.status_code == 304
+    assert r.headers["x-cache"] == "HIT"
+    assert r.headers["etag"] == '"v1"'
+    assert client.get("/etag", headers={**admin, "If-None-Match": '"otra"'}).status_code == 200
+    assert app.state.llamadas == ["etag"]
+
+
+def test_token_con_estado_usa_el_rol_resuelto(app, client):
+    # El token dice rol 2; la base (caché de usuarios) ya lo tiene como rol 3
+    viejo = token("cambio@cache.test", 2, stateless=False)
+    assert "x-cache" not in client.get("/lista", headers=viejo).headers  # usuario sin resolver
+
+    user_cache.set("cambio@cache.test", {"id": 1, "correo": "cambio@cache.test", "rol_id": 3})
+    assert client.get("/lista", headers=viejo).headers["x-cache"] == "MISS"
+    assert client.get("/lista", headers=viejo).headers["x-cache"] == "HIT"
+
+    # Otro usuario con el mismo rol en el token, resuelto todavía como rol 2, no recibe la entrada del rol 3
+    otro = token("otro@cache.test", 2, stateless=False)
+    user_cache.set("otro@cache.test", {"id": 2, "correo": "otro@cache.test", "rol_id": 2})
+    assert client.get("/lista", headers=otro).headers["x-cache"] == "MISS"
+
+
+def test_token_invalido_no_se_cachea(client):
+    assert "x-cache" not in client.get("/lista", headers={"Authorization": "Bearer basura"}).headers
@@ -0,0 +1,124 @@
+"""
+Versiones de tablas (cache.TableVersions) y su seguimiento desde la base (version_listener.py).
+
+Las pruebas del listener usan TEST_DATABASE_URI con la migración 006 aplicada; simulan
+dos workers con dos listeners y escriben por fuera de la API.
+"""
+import time
+
+import psycopg2
+import pytest
+
+from cache import TableVersions
+from version_listener import VersionListener
+
+
+def test_local_cuenta_en_memoria():
+    versiones = TableVersions()
+    antes = versiones.etag("estudios")
+    versiones.bump("estudios")
+    assert versiones.etag("estudios") != antes
+    assert versiones.version("estudios") == 1
+
+
+def test_compartidas_pendiente_hasta_leer_la_base():
+    versiones = TableVersions()
+    avisos = []
+    versiones.set_pending_callback(lambda: avisos.append(True))
+    versiones.load("db1", {"estudios": 3})
+    assert versiones.etag("estudios") == '"db1-3"'
+
+    versiones.bump("estudios")
+    assert avisos
+    assert versiones.etag("estudios") is None
+    assert versiones.etag("profesores") == '"db1-0"'
+
+    # Otro bump durante la lectura: la tabla sigue pendiente
+    marcas = versiones.pending()
+    versiones.bump("estudios")
+    versiones.refresh(marcas, {"estudios": 4})
+    assert versiones.etag("estudios") is None
+
+    versiones.refresh(versiones.pending(), {"estudios": 5})
+    assert versiones.etag("estudios") == '"db1-5"'
+
+
+def test_compartidas_avisos_atrasados_y_desconexion():
+    versiones = TableVersions()
+    invalidadas = []
+    versiones.subscribe(invalidadas.append)
+    versiones.load("db1", {"estudios": 3})
+
+    versiones.apply("estudios", 2)
+    assert versiones.version("estudios") == 3
+    versiones.apply("estudios", 7)
+    assert versiones.etag("estudios") == '"db1-7"'
+    assert ("estudios",) in invalidadas
+
+    versiones.disconnect()
+    assert versiones.etag("estudios") is None
+    versiones.load("db1", {"estudios": 8})
+    assert versiones.etag("estudios") == '"db1-8"'
+
+
+def esperar(condicion, segundos=5.0):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def workers(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('table_versions')")
+            if cur.fetchone()[0] is None:
+                pytest.skip("Falta la migración 006 (table_versions) en la base de prueba")
+    finally:
+        conn.close()
+
+    listeners = [VersionListener(dsn, TableVersions(), reconnect_delay=0.1) for _ in range(2)]
+    for listener in listeners:
+        listener.start()
+    assert esperar(lambda: all(l.versions.stats()["shared"] for l in listeners))
+    yield [listener.versions for listener in listeners]
+    for listener in listeners:
+        listener.stop()
+
+
+def escribir(dsn, sql):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(sql)
+    finally:
+        conn.close()
+
+
+def test_escritura_externa_llega_a_todos_los_workers(dsn, workers):
+    a, b = workers
+    antes = a.etag("estudios")
+    assert b.etag("estudios") == antes
+
+    escribir(dsn, "UPDATE estudios SET nombre = nombre WHERE id = (SELECT min(id) FROM estudios)")
+    assert esperar(lambda: a.etag("estudios") != antes and b.etag("estudios") == a.etag("estudios"))
+
+
+def test_sentencia_sin_filas_no_cambia_la_version(dsn, workers):
+    a, _ = workers
+    antes = a.version("estudios")
+    escribir(dsn, "UPDATE estudios SET nombre = nombre WHERE id = -1")
+    escribir(dsn, "UPDATE estudios SET nombre = nombre WHERE id = (SELECT min(id) FROM estudios)")
+    assert esperar(lambda: a.version("estudios") > antes)
+    assert a.version("estudios") == antes + 1
+
+
+def test_bump_propio_espera_la_version_de_la_base(dsn, workers):
+    a, b = workers
+    escribir(dsn, "UPDATE estudios SET nombre = nombre WHERE id = (SELECT min(id) FROM estudios)")
+    a.bump("estudios")
+    assert esperar(lambda: a.etag("estudios") is not None and a.etag("estudios") == b.etag("estudios"))
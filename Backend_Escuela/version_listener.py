@@ -0,0 +1,129 @@
+"""
+Sigue las versiones de tablas de la base (migración 006) para cache.table_versions.
+
+Un hilo por proceso mantiene una conexión psycopg2 propia con LISTEN table_versions:
+- Al conectar (y al reconectar) carga todas las versiones de la tabla table_versions
+- Cada NOTIFY 'tabla:version' (enviado al confirmar una escritura, de este u otro
+  proceso) actualiza la versión de esa tabla
+- Tras una escritura propia (TableVersions.bump) relee las tablas pendientes, de modo
+  que el ETag vuelve a armarse con la versión que ya incluye esa escritura
+
+Así el ETag y la caché de respuestas son coherentes con varios workers de uvicorn y
+con escrituras hechas fuera de la API. Si la migración no está aplicada se sigue con
+contadores en memoria (un solo worker) y se avisa en el log.
+"""
+import logging
+import select
+import socket
+import threading
+
+import psycopg2
+from cache import table_versions
+from config import Config
+
+CHANNEL = "table_versions"
+# Cada cuánto se comprueba la conexión si no llegan avisos (segundos)
+KEEPALIVE = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class VersionListener:
+    def __init__(self, dsn, versions, reconnect_delay=5.0):
+        self.dsn = dsn
+        self.versions = versions
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread = None
+        # Par de sockets para despertar al hilo desde bump() (select no acepta pipes en Windows)
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+
+    def start(self):
+        self.versions.set_pending_callback(self.wake)
+        self._thread = threading.Thread(target=self._run, name="version-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.versions.set_pending_callback(None)
+        self._stop.set()
+        self.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._wake_recv.close()
+        self._wake_send.close()
+
+    def wake(self):
+        try:
+            self._wake_send.send(b"x")
+        except (BlockingIOError, OSError):
+            pass  # ya hay un aviso pendiente o el listener se detuvo
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    # LISTEN antes de cargar: ningún aviso se pierde entre la carga y la escucha
+                    cur.execute(f"LISTEN {CHANNEL}")
+                    cur.execute("SELECT 'table_versions'::regclass::oid")
+                    epoch = f"db{cur.fetchone()[0]}"
+                    cur.execute("SELECT tabla, version FROM table_versions")
+                    self.versions.load(epoch, dict(cur.fetchall()))
+                logger.info("Versiones de tablas: compartidas (LISTEN %s)", CHANNEL)
+                self._listen(conn)
+            except psycopg2.errors.UndefinedTable:
+                logger.warning("Versiones de tablas: falta la tabla table_versions (python migrate.py); "
+                               "se usan contadores en memoria, válidos solo con un worker")
+                return
+            except psycopg2.Error as e:
+                self.versions.disconnect()
+                logger.warning("Versiones de tablas: sin conexión (%s); reintento en %ss", e, self.reconnect_delay)
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        with conn.cursor() as cur:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([conn, self._wake_recv], [], [], KEEPALIVE)
+                if self._wake_recv in ready:
+                    try:
+                        while self._wake_recv.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                if not ready:
+                    cur.execute("SELECT 1")
+                conn.poll()
+                while conn.notifies:
+                    table, _, version = conn.notifies.pop(0).payload.rpartition(":")
+                    self.versions.apply(table, int(version))
+                marks = self.versions.pending()
+                if marks:
+                    cur.execute("SELECT tabla, version FROM table_versions WHERE tabla = ANY(%s)", (list(marks),))
+                    self.versions.refresh(marks, dict(cur.fetchall()))
+
+
+_listener = None
+
+
+def start_version_listener():
+    """Inicia el listener (llamado al iniciar la aplicación, si TABLE_VERSIONS_LISTEN)"""
+    global _listener
+    if Config.TABLE_VERSIONS_LISTEN and _listener is None:
+        _listener = VersionListener(Config.DATABASE_URI, table_versions, Config.TABLE_VERSIONS_RECONNECT)
+        _listener.start()
+
+
+def stop_version_listener():
+    """Detiene el listener (llamado al apagar la aplicación)"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()